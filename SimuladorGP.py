@@ -9,8 +9,13 @@ Compatible con ArcGIS Pro / ArcGIS Enterprise GP Tool
 """
 
 import arcpy, json, re, ast, traceback
+import numpy as np
 from arcpy.sa import *
 
+from simulador_cache import SURFACE_LAMBERT, DistanceCache
+from simulador_distancia import iter_distances
+from simulador_raster import ImpactAccumulator, RasterInputs
+
 # ───────────────────── 1 · CONFIGURACIÓN GLOBAL ──────────────────────────────
 arcpy.CheckOutExtension("Spatial")
 arcpy.env.overwriteOutput = True
@@ -29,6 +34,15 @@ raster_penalizacion = r"C:/Users/Sebastian/Documents/ArcGIS/Projects/CIDENAL/CID
 # Máscara / área de estadísticas
 area_interes = r"C:/Users/Sebastian/Documents/ArcGIS/Projects/CIDENAL/CIDENAL.gdb/AreaInteres"
 
+# Caché en disco de distancias ajustadas por ubicación (None = sin caché)
+cache_distancias = r"C:/Users/Sebastian/Documents/ArcGIS/Projects/CIDENAL/cache_distancias"
+
+# Distancias: False = simulador_distancia para todas las fuentes en un lote
+# (geodésica en forma cerrada, < 0.1 m de DistanceAccumulation GEODESIC sin
+# superficie); True = DistanceAccumulation por proyecto, como antes
+distancias_arcgis = False
+METODO_ARCGIS = ("DistanceAccumulation", "GEODESIC", "BINARY 1 -30 30", "BINARY 1 45")
+
 # Constantes
 limite_superior = 100
 cell_size       = 0.002          
@@ -88,58 +102,104 @@ def script_tool(atributos_json_str, geometrias_json_str):
 
         # --- 3.3 Preparar capa de proyectos ----
         arcpy.MakeFeatureLayer_management(fc_path, "proyectos_lyr")
-        deltas_dim = {k: [] for k in rasters_base}
+        # Bases y penalización como arreglos sobre la malla de area_interes;
+        # los incrementos se suman en los buffers fijos del acumulador (no
+        # un ráster temporal por proyecto y dimensión).  La malla se alinea a
+        # las celdas de las bases (las tres comparten retícula), como la
+        # salida de Con(base + inc_sum, ...) del cálculo original
+        entradas   = RasterInputs.from_arcpy(rasters_base, raster_penalizacion,
+                                             area_interes, cell_size,
+                                             snap_raster=rasters_base["SEGURIDAD"])
+        grid       = entradas.grid
+        esquina    = arcpy.Point(grid.extent[0], grid.extent[1])
+        acumulador = ImpactAccumulator(entradas)
 
-        # --- 3.4 Recorrer proyectos ----
+        # Caché: la clave incluye un hash de la penalización sobre la malla
+        # (float64: la misma precisión que las distancias sin caché)
+        cache = DistanceCache(cache_distancias, dtype=np.float64) if cache_distancias else None
+
+        # --- 3.4 Proyectos por celda de origen ----
+        # La fuente se rasteriza a su celda: los proyectos de una misma celda
+        # comparten superficie de distancia y se calcula una sola vez
+        fuentes = {}
         with arcpy.da.SearchCursor(
             fc_path,
-            ["OID@","SEGURIDAD","GOBERNABILIDAD","DESARROLLO","AREAAFECTACION"]
+            ["OID@","SEGURIDAD","GOBERNABILIDAD","DESARROLLO","AREAAFECTACION","SHAPE@XY"]
         ) as cur:
-            for oid, seg, gob, des, radio in cur:
-                arcpy.SelectLayerByAttribute_management("proyectos_lyr", "NEW_SELECTION",
-                                                        f"OBJECTID = {oid}")
-
-                # Distancia acumulada (una vez por proyecto)
-                radio_impacto = max(radio, 1)
-                with arcpy.EnvManager(extent=area_interes,
-                                      cellSize=cell_size,
-                                      outputCoordinateSystem=sr):
-                    dist = DistanceAccumulation("proyectos_lyr",
-                                                distance_method="GEODESIC",
-                                                vertical_factor="BINARY 1 -30 30",
-                                                horizontal_factor="BINARY 1 45")
-                dist_adj = dist * Raster(raster_penalizacion)
-
-                # Delta por dimensión
-                for dim, valor in (("SEGURIDAD", seg),
-                                   ("GOBERNABILIDAD", gob),
-                                   ("DESARROLLO", des)):
-                    if valor <= 0:
-                        continue
-                    impacto   = Exp(-dist_adj / float(radio_impacto)) + 1
-                    base      = Raster(rasters_base[dim])
-                    necesidad = 1 - (base / 100.0)
-                    incremento = (impacto - 1) * valor * necesidad
-                    delta_path = f"in_memory/R_{dim.lower()}_{oid}_delta"
-                    incremento.save(delta_path)
-                    deltas_dim[dim].append(delta_path)
-
-        # --- 3.5 Consolidar ráster final por dimensión ----
+            for oid, seg, gob, des, radio, (lon, lat) in cur:
+                valores = {"SEGURIDAD": seg, "GOBERNABILIDAD": gob, "DESARROLLO": des}
+                if not any(valor > 0 for valor in valores.values()):
+                    continue
+                celda = grid.cell_of(lon, lat)
+                if celda is None:        # fuera de area_interes: no hay distancia
+                    continue
+                fuentes.setdefault(celda, []).append((oid, lon, lat, radio, valores))
+        celdas = list(fuentes)
+
+        def distancias(indices):
+            """(i, dist_adj) de las celdas ``indices``, en streaming."""
+            if distancias_arcgis:
+                for i in indices:
+                    oid = fuentes[celdas[i]][0][0]
+                    arcpy.SelectLayerByAttribute_management("proyectos_lyr", "NEW_SELECTION",
+                                                            f"OBJECTID = {oid}")
+                    with arcpy.EnvManager(extent=area_interes,
+                                          cellSize=cell_size,
+                                          outputCoordinateSystem=sr):
+                        _, metodo, vertical, horizontal = METODO_ARCGIS
+                        dist = DistanceAccumulation("proyectos_lyr",
+                                                    distance_method=metodo,
+                                                    vertical_factor=vertical,
+                                                    horizontal_factor=horizontal)
+                        yield i, arcpy.RasterToNumPyArray(dist * Raster(raster_penalizacion),
+                                                          esquina, grid.n_cols, grid.n_rows,
+                                                          nodata_to_value=np.nan)
+            else:
+                # Todas las fuentes en un lote (forma cerrada, sin pase de ArcGIS)
+                puntos = [fuentes[celdas[i]][0][1:3] for i in indices]
+                for k, dist in iter_distances(grid, puntos):
+                    yield indices[k], dist * entradas.penalty
+
+        def sumar(i, dist_adj):
+            """Incremento de cada proyecto de la celda i (Exp una vez por proyecto)."""
+            dist_adj = np.asarray(dist_adj, dtype=float)
+            for _, _, _, radio, valores in fuentes[celdas[i]]:
+                acumulador.add(dist_adj, radio, valores)
+
+        # --- 3.5 Distancias ajustadas: de la caché o calculadas en lote ----
+        if cache:
+            metodo = METODO_ARCGIS if distancias_arcgis else SURFACE_LAMBERT
+            claves = [cache.key(grid, *fuentes[celda][0][1:3], entradas.penalty_version, metodo)
+                      for celda in celdas]
+            superficies = cache.get_or_compute_many(claves, distancias)
+        else:
+            superficies = distancias(list(range(len(celdas))))
+        for i, dist_adj in superficies:
+            sumar(i, dist_adj)
+
+        if cache:
+            arcpy.AddMessage(f"Caché de distancias: {cache.hits} reutilizadas, "
+                             f"{cache.misses} calculadas")
+
+        # --- 3.6 Consolidar ráster final por dimensión ----
         rasters_final = {}
-        for dim, deltas in deltas_dim.items():
-            if not deltas:
+        for dim in rasters_base:
+            if not acumulador.counts[dim]:
                 continue
-            inc_sum = (Raster(deltas[0]) if len(deltas) == 1
-                       else CellStatistics([Raster(p) for p in deltas], "SUM", "DATA"))
-            base     = Raster(rasters_base[dim])
-            final_r  = Con(base + inc_sum > limite_superior,
-                           limite_superior,
-                           base + inc_sum)
+            with arcpy.EnvManager(outputCoordinateSystem=sr):
+                suma_r = arcpy.NumPyArrayToRaster(acumulador.final(dim), esquina,
+                                                  cell_size, cell_size, np.nan)
+            # Misma retícula y extensión que Con(base + inc_sum, ...): alineado
+            # a la base y recortado a la intersección con ella
+            base = Raster(rasters_base[dim])
+            with arcpy.EnvManager(outputCoordinateSystem=sr, snapRaster=base,
+                                  extent="MINOF", cellSize=cell_size):
+                final_r = SetNull(IsNull(base), suma_r)
             out_path = f"in_memory/R_{dim.lower()}_final"
             final_r.save(out_path)
             rasters_final[dim] = out_path
 
-        # --- 3.6 Medias globales (máscara area_interes) ----
+        # --- 3.7 Medias globales (máscara area_interes) ----
         medias = {}
         for dim, path in rasters_final.items():
             with arcpy.EnvManager(mask=area_interes, extent=area_interes):
@@ -147,7 +207,7 @@ def script_tool(atributos_json_str, geometrias_json_str):
                 medias[dim] = float(val.replace(",", "."))
         medias = {k: medias.get(k, 0) for k in rasters_base}
 
-        # --- 3.7 Crear tablas de salida ----
+        # --- 3.8 Crear tablas de salida ----
         proyecto_info_fc = "memory/Proyecto_Info"
         estadisticas_fc  = "memory/Estadisticas_Medias"
         arcpy.CreateTable_management("memory", "Proyecto_Info")
@@ -195,7 +255,7 @@ def script_tool(atributos_json_str, geometrias_json_str):
                               medias["DESARROLLO"], "ciclo-1",
                               indice, vida])
 
-        # --- 3.8 Sincronizar con servicios Hosted ----
+        # --- 3.9 Sincronizar con servicios Hosted ----
         try:
             arcpy.Append_management(proyecto_info_fc, srv_proyectos,   "NO_TEST")
             arcpy.Append_management(estadisticas_fc,  srv_indicadores, "NO_TEST")
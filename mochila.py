@@ -20,60 +20,160 @@ Criterios de orden y desempate permanecen:
 2. a igualdad de Δ vida, gastar más presupuesto
 3. luego, mayor vida_total
 
-Requisitos: pandas ≥ 1.0, openpyxl (for Excel export)
+Perfilado: cada solver acepta ``stats=SolverStats()`` (tiempos por fase,
+celdas DP, nodos, operaciones de heap, pico de memoria);
+``enable_profiling(ruta)`` o la variable de entorno ``MOCHILA_PROFILE``
+escriben un registro JSON por línea en cada llamada (ver `perfilado.py`).
+
+Requisitos: pandas ≥ 1.0, numpy, openpyxl (for Excel export)
 """
 
+import time
+import numpy as np
 import pandas as pd
 import heapq
-from typing import List, Tuple, Optional
+from typing import Callable, Dict, List, NamedTuple, Sequence, Tuple, Optional
+
+# Estadísticas y registro JSON (compartidos con el motor de rásters)
+from perfilado import SolverStats, disable_profiling, enable_profiling, instrument as _instrument
+
+def _dp_cells(cost_int: np.ndarray, budget_int: int, n_groups: int) -> int:
+    """Celdas que actualiza la DP densa (una pasada por variante factible + copia)."""
+    c = np.asarray(cost_int)
+    c = c[(c >= 0) & (c <= budget_int)]
+    return int((budget_int + 1 - c).sum()) + n_groups * (budget_int + 1)
+
 
 # ------------------------------------------------------------------ #
-# 1. COMBINACIÓN ÓPTIMA  (MCKP)                                      #
+# 0. REDUCCIÓN DE VARIANTES (pre‑proceso común)                      #
 # ------------------------------------------------------------------ #
 
-def mckp_max_delta(
+class ReducedProblem(NamedTuple):
+    """Instancia reducida: ``df`` (índice 0..n‑1), ``index_map`` (fila
+    reducida → etiqueta original) y ``summary`` con lo que se eliminó."""
+    df: pd.DataFrame
+    index_map: np.ndarray
+    summary: dict
+
+
+def reduce_variants(
     df: pd.DataFrame,
     group_col: str,
     life_col: str,
     cost_col: str,
     base_life: float,
     budget: float,
-    id_col: Optional[str] = None,
     scale: int = 100,
-) -> Tuple[pd.DataFrame, float, float]:
-    """Multiple‑choice knapsack:  0‑1 por grupo."""
+    top_n: int = 1,
+    allow_empty: bool = True,
+) -> ReducedProblem:
+    """Elimina variantes que no pueden aparecer entre las ``top_n`` mejores.
+
+    Reglas (todas exactas; los costes se comparan ya escalados):
+    • variante que no cabe sola en el presupuesto;
+    • variante con al menos ``top_n`` *dominadoras* en su grupo (coste ≤ y
+      Δ estrictamente mayor): cambiarla por cada una da ``top_n``
+      soluciones distintas y mejores.  Un Δ < 0 cuenta además con la
+      alternativa de omitirla (si la selección vacía no es válida, hace
+      falta otra variante factible con mayor Δ fuera del grupo);
+    • grupos que se quedan sin variantes.
+
+    Con Δ iguales no se elimina nada: el desempate (gasto, vida, índices)
+    podría preferir la variante descartada.  Las variantes LP‑dominadas
+    (bajo la envolvente convexa del grupo) sí pueden formar parte del
+    óptimo entero, así que solo se cuentan en ``summary``.
+
+    ``allow_empty`` = True para ``mckp_max_delta`` (la selección vacía es
+    válida) y False para ``top_n_combinations``.  Se conserva el orden de
+    grupos y de variantes, por lo que los solvers suman en el mismo orden.
+    """
+    budget_int = int(round(budget * scale))
+    delta = (df[life_col] - base_life).to_numpy(dtype=float)
+    cost_int = (df[cost_col] * scale).round().astype(int).to_numpy()
+    groups = _group_positions(df, group_col)
+
+    feasible = (cost_int >= 0) & (cost_int <= budget_int)
+    n_dominators = np.zeros(len(df), dtype=int)
+    group_best = np.full(len(groups), -np.inf)
+    lp_dominated = 0
+    for g, pos in enumerate(groups):
+        pos = pos[feasible[pos]]
+        if not len(pos):
+            continue
+        c, d = cost_int[pos], delta[pos]
+        group_best[g] = d.max()
+        # dominadora[k, j]: k tiene coste ≤ y Δ estrictamente mayor que j
+        n_dominators[pos] = ((c[:, None] <= c[None, :]) & (d[:, None] > d[None, :])).sum(axis=0)
+        hull_costs = np.cumsum([dc for dc, _ in _group_hull(c.astype(float), d)])
+        useful = (d > 0) & (n_dominators[pos] == 0)
+        lp_dominated += int(useful.sum()) - len(set(hull_costs.tolist()) & set(c[useful].astype(float).tolist()))
+
+    # Alternativa "omitir" para variantes con Δ < 0
+    if allow_empty:
+        skip_alt = delta < 0
+    else:
+        order = np.argsort(-group_best)
+        first = order[0] if len(order) else -1
+        second_best = group_best[order[1]] if len(order) > 1 else -np.inf
+        codes = np.full(len(df), -1)
+        for g, pos in enumerate(groups):
+            codes[pos] = g
+        best_elsewhere = np.where(codes == first, second_best,
+                                  group_best[first] if len(order) else -np.inf)
+        skip_alt = (delta < 0) & (best_elsewhere > delta)
+
+    dominated = feasible & (n_dominators + skip_alt.astype(int) >= top_n)
+    keep = feasible & ~dominated
+    kept_groups = [pos[keep[pos]] for pos in groups]
+    positions = np.concatenate([pos for pos in kept_groups if len(pos)] or [np.empty(0, dtype=int)])
+
+    reduced = df.iloc[positions].copy()
+    index_map = reduced.index.to_numpy()
+    reduced.reset_index(drop=True, inplace=True)
+
+    n_before, n_after = len(df), len(reduced)
+    summary = {
+        "groups_before": len(groups),
+        "groups_after": sum(1 for pos in kept_groups if len(pos)),
+        "variants_before": n_before,
+        "variants_after": n_after,
+        "removed_infeasible": int((~feasible).sum()),
+        "removed_dominated": int(dominated.sum()),
+        "lp_dominated_kept": lp_dominated,
+        "shrink": 1.0 - n_after / n_before if n_before else 0.0,
+    }
+    return ReducedProblem(reduced, index_map, summary)
 
-    df = df.copy()
-    df["delta_vida"] = df[life_col] - base_life
 
-    # — Agrupar por nombre de proyecto —
-    # Store original indices for each group
-    groups_with_indices = {name: g.index.tolist() for name, g in df.groupby(group_col, sort=False)}
-    group_names = list(groups_with_indices.keys()) # Keep order of groups as they appear in df
-    groups = [groups_with_indices[name] for name in group_names]
+# ------------------------------------------------------------------ #
+# 1. COMBINACIÓN ÓPTIMA  (MCKP)                                      #
+# ------------------------------------------------------------------ #
 
+def _group_positions(df: pd.DataFrame, group_col: str) -> List[np.ndarray]:
+    """Posiciones (no etiquetas) de cada grupo, en orden de aparición."""
+    codes, uniques = pd.factorize(df[group_col], sort=False)
+    if not len(uniques):
+        return []
+    order = np.argsort(codes, kind="stable")
+    bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+    return [order[bounds[g]:bounds[g + 1]] for g in range(len(uniques))]
 
-    # Escalar costes a enteros
-    cost_int = (df[cost_col] * scale).round().astype(int).tolist()
-    budget_int = int(round(budget * scale))
-    delta_vals = df["delta_vida"].tolist()
+
+def _mckp_dp_legacy(
+    groups: List[List[int]],
+    cost_int: List[int],
+    delta_vals: List[float],
+    budget_int: int,
+) -> Tuple[float, List[int]]:
+    """DP original: cada celda guarda (Δ, −coste, lista de índices)."""
 
     # DP: para cada coste almacenamos (delta, cost_neg) y la lista de selecciones (indices originales)
     # dp[b] = (current_max_delta, negative_cost_for_tie_breaking, list_of_selected_original_indices)
     dp = [(-float("inf"), 0, []) for _ in range(budget_int + 1)]
     dp[0] = (0.0, 0, [])
 
-    # dp_group_choices[b] stores the specific item chosen from each group for the solution at budget b
-    # This helps reconstruct which item from which group was chosen.
-    # dp_group_choices[b] = {group_index: chosen_item_original_index}
-    # This was commented out as it wasn't fully utilized in the reconstruction logic below,
-    # but could be useful for more detailed path tracking if needed.
-    # dp_group_choices = [{} for _ in range(budget_int + 1)]
-
-
     for group_idx, grp_item_indices in enumerate(groups): # Iterate through groups of items
         new_dp = dp[:] # Start with current DP table for this group
-        # new_dp_group_choices = dp_group_choices[:] # if dp_group_choices were used
 
         for item_original_idx in grp_item_indices: # Iterate through items within the current group
             # Ensure item_original_idx is within bounds for cost_int and delta_vals
@@ -116,8 +216,257 @@ def mckp_max_delta(
                 best_b_idx = b_idx
 
     best_delta_val, _, best_sel_indices = dp[best_b_idx]
-    
-    opt_df = df.loc[list(set(best_sel_indices))].copy() # Use set to ensure unique indices before .loc
+    return best_delta_val, best_sel_indices
+
+
+def _mckp_dp_array(
+    groups: List[np.ndarray],
+    cost_int: np.ndarray,
+    delta_vals: np.ndarray,
+    budget_int: int,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """DP vectorizada sobre el eje de presupuesto.
+
+    Devuelve ``dp`` (mejor Δ con coste *exacto* b, ``-inf`` si no es
+    alcanzable) y la matriz de retroceso ``choice[g, b]``: 0 = se omite el
+    grupo g, k > 0 = se eligió su k‑ésima variante.
+    """
+    dp = np.full(budget_int + 1, -np.inf)
+    dp[0] = 0.0
+    max_variants = max((len(pos) for pos in groups), default=0)
+    choice = np.zeros((len(groups), budget_int + 1), dtype=np.min_scalar_type(max_variants))
+
+    for g, pos in enumerate(groups):
+        dp = _mckp_dp_step(dp, cost_int[pos], delta_vals[pos], choice[g])
+    return dp, choice
+
+
+def _mckp_dp_step(
+    dp: np.ndarray,
+    costs: np.ndarray,
+    deltas: np.ndarray,
+    choice_row: np.ndarray,
+) -> np.ndarray:
+    """Añade un grupo (variantes ``costs``/``deltas``) a la tabla ``dp``.
+
+    Escribe en ``choice_row`` la variante elegida (1..k, 0 = omitir) por
+    celda y devuelve la tabla nueva.
+    """
+    budget_int = len(dp) - 1
+    new_dp = dp.copy()
+    for k, (c, d) in enumerate(zip(costs.tolist(), deltas.tolist()), start=1):
+        if c < 0 or c > budget_int:
+            continue
+        cand = dp[: budget_int + 1 - c] + d
+        target = new_dp[c:]
+        # Estricto: ante empate gana la opción previa (omitir / variante
+        # anterior), igual que la DP original.
+        better = cand > target
+        target[better] = cand[better]
+        choice_row[c:][better] = k
+    return new_dp
+
+
+def _best_budget_cell(dp: np.ndarray) -> int:
+    """Celda con mayor Δ; a igualdad, la de mayor gasto."""
+    return int(np.flatnonzero(dp == dp.max())[-1])
+
+
+def _mckp_backtrack(
+    choice: np.ndarray,
+    groups: List[np.ndarray],
+    cost_int: np.ndarray,
+    b: int,
+) -> List[int]:
+    """Reconstruye la selección (posiciones) que termina en la celda b."""
+    sel = []
+    for g in range(len(groups) - 1, -1, -1):
+        k = int(choice[g, b])
+        if k:
+            p = int(groups[g][k - 1])
+            sel.append(p)
+            b -= int(cost_int[p])
+    sel.reverse()
+    return sel
+
+
+def _mckp_sparse(
+    groups: List[np.ndarray],
+    costs: np.ndarray,
+    delta_vals: np.ndarray,
+    budget: float,
+    max_states: Optional[int] = None,
+    stats: Optional[SolverStats] = None,
+    keep_ties: bool = True,
+) -> Optional[Tuple[float, List[int]]]:
+    """MCKP exacto sobre estados Pareto (coste, Δ), sin discretizar costes.
+
+    Tras cada grupo se conservan solo los estados no dominados, ordenados
+    por coste: los que tienen Δ ≥ que todos los más baratos (los de igual
+    Δ y más gasto también, porque el desempate prefiere gastar más).  Los
+    empates exactos quedan con la primera opción (omitir, luego variantes
+    en orden), como en la DP densa.  La memoria crece con el número de
+    estados Pareto, no con ``budget * scale``.
+
+    Devuelve (Δ, posiciones) o ``None`` si algún paso supera
+    ``max_states`` estados.  ``stats`` cuenta estados generados y
+    conservados.  ``keep_ties=False`` descarta los estados de igual Δ y
+    más gasto (a lo sumo un estado por valor de Δ).
+    """
+    limit = budget + 1e-9 * max(1.0, abs(budget))
+    state_c = np.zeros(1)
+    state_d = np.zeros(1)
+    steps = []  # por grupo: (padre, posición elegida o -1)
+
+    for pos in groups:
+        cand_c, cand_d, cand_parent, cand_item = [state_c], [state_d], [np.arange(len(state_c))], [np.full(len(state_c), -1)]
+        for p in pos:
+            c = state_c + costs[p]
+            ok = c <= limit
+            if not ok.any():
+                continue
+            cand_c.append(c[ok])
+            cand_d.append(state_d[ok] + delta_vals[p])
+            cand_parent.append(np.flatnonzero(ok))
+            cand_item.append(np.full(int(ok.sum()), int(p)))
+        c, d = np.concatenate(cand_c), np.concatenate(cand_d)
+        parent, item = np.concatenate(cand_parent), np.concatenate(cand_item)
+
+        order = np.lexsort((-d, c))  # estable: ante empate exacto, el primero
+        c, d, parent, item = c[order], d[order], parent[order], item[order]
+        prev_max = np.concatenate(([-np.inf], np.maximum.accumulate(d)[:-1]))
+        new_cost = np.concatenate(([True], c[1:] != c[:-1]))
+        keep = ((d >= prev_max) if keep_ties else (d > prev_max)) & new_cost
+
+        state_c, state_d = c[keep], d[keep]
+        steps.append((parent[keep], item[keep]))
+        if stats is not None:
+            stats.count("states_generated", len(c))
+            stats.count("states_kept", len(state_c))
+        if max_states is not None and len(state_c) > max_states:
+            return None
+
+    best = int(np.flatnonzero(state_d == state_d.max())[-1])
+    best_delta = float(state_d[best])
+    sel = []
+    for parent, item in reversed(steps):
+        if item[best] >= 0:
+            sel.append(int(item[best]))
+        best = int(parent[best])
+    sel.reverse()
+    return best_delta, sel
+
+
+def _mckp_approx(
+    groups: List[np.ndarray],
+    costs: np.ndarray,
+    delta_vals: np.ndarray,
+    budget: float,
+    eps: float,
+    stats: Optional[SolverStats] = None,
+) -> Tuple[float, List[int], dict]:
+    """MCKP aproximado con garantía Δ ≥ (1 − eps)·óptimo y cota certificada.
+
+    1. Relajación lagrangiana: con las envolventes convexas de los grupos
+       el dual se resuelve ordenando los segmentos por eficiencia; la cota
+       (``upper_bound``) es el llenado greedy con el primer segmento que no
+       cabe fraccionado.
+    2. Reparación greedy: se siguen tomando segmentos enteros que quepan
+       (un grupo cuyo segmento no cupo queda cerrado) y luego cada grupo se
+       mejora a la variante de mayor Δ que quepa en lo que sobra.  Se
+       compara con la mejor variante sola, así que ``Δ ≥ cota / 2``.
+    3. Si la brecha supera ``eps · cota``: DP de estados Pareto con Δ
+       redondeado a múltiplos de ``K = eps · Δ_greedy / G`` (FPTAS): a lo
+       sumo un estado por valor redondeado y una pérdida < ``G · K``.
+
+    Costes reales (sin ``scale``); se ignoran variantes con Δ ≤ 0 o que no
+    caben solas.  Devuelve (Δ, posiciones, info).
+    """
+    limit = budget + 1e-9 * max(1.0, abs(budget))
+    cand = [pos[(costs[pos] <= limit) & (delta_vals[pos] > 0)] for pos in groups]
+    cand = [pos for pos in cand if len(pos)]
+
+    # — 1 y 2: segmentos de las envolventes en orden de eficiencia —
+    segs = []  # (eficiencia, grupo, Δcoste, ΔΔ, variante destino)
+    for g, pos in enumerate(cand):
+        pts = _group_hull_points(costs[pos], delta_vals[pos])
+        for (c0, d0, _), (c1, d1, k) in zip(pts, pts[1:]):
+            dc, dd = c1 - c0, d1 - d0
+            segs.append((dd / dc if dc > 0 else np.inf, g, dc, dd, int(pos[k])))
+    segs.sort(key=lambda s: -s[0])
+    if stats is not None:
+        stats.count("hull_segments", len(segs))
+
+    cap, upper, fractional = limit, 0.0, False
+    chosen: Dict[int, int] = {}
+    closed = set()
+    for eff, g, dc, dd, p in segs:
+        if g in closed:
+            continue
+        if dc <= cap:
+            cap -= dc
+            chosen[g] = p
+            if not fractional:
+                upper += dd
+        else:
+            if not fractional:
+                upper += cap * eff
+                fractional = True
+            closed.add(g)
+
+    for g, pos in enumerate(cand):
+        cur = chosen.get(g)
+        cur_c, cur_d = (costs[cur], delta_vals[cur]) if cur is not None else (0.0, 0.0)
+        fits = pos[(costs[pos] - cur_c <= cap) & (delta_vals[pos] > cur_d)]
+        if len(fits):
+            p = int(fits[np.argmax(delta_vals[fits])])
+            cap -= costs[p] - cur_c
+            chosen[g] = p
+
+    def value(sel: List[int]) -> float:
+        total = 0.0
+        for p in sel:
+            total += delta_vals[p]
+        return float(total)
+
+    sel = [chosen[g] for g in range(len(cand)) if g in chosen]
+    best_delta, method = value(sel), "lagrangian"
+    if cand:
+        single = max((int(p) for pos in cand for p in pos), key=lambda p: delta_vals[p])
+        if delta_vals[single] > best_delta:
+            sel, best_delta = [single], float(delta_vals[single])
+
+    # — 3: FPTAS si la brecha no alcanza la garantía —
+    if upper - best_delta > eps * upper and best_delta > 0:
+        k = eps * best_delta / len(cand)
+        scaled = np.floor(delta_vals / k)
+        solved = _mckp_sparse(cand, costs, scaled, budget, stats=stats, keep_ties=False)
+        profit, fptas_sel = solved
+        upper = min(upper, k * (profit + len(cand)))
+        fptas_delta = value(fptas_sel)
+        method = "fptas"
+        if fptas_delta > best_delta:
+            sel, best_delta = fptas_sel, fptas_delta
+
+    upper = max(upper, best_delta)
+    info = {
+        "eps": eps,
+        "method": method,
+        "upper_bound": upper,
+        "gap": upper - best_delta,
+        "rel_gap": (upper - best_delta) / upper if upper > 0 else 0.0,
+    }
+    return best_delta, sel, info
+
+
+def _selection_frame(
+    df: pd.DataFrame,
+    labels: List,
+    cost_col: str,
+    id_col: Optional[str] = None,
+) -> Tuple[pd.DataFrame, float]:
+    """Filas elegidas (ordenadas por Δ vida) y su coste total."""
+    opt_df = df.loc[list(set(labels))].copy() # Use set to ensure unique indices before .loc
 
     # Add id_col if specified and not already present
     if id_col:
@@ -129,14 +478,252 @@ def mckp_max_delta(
 
     opt_df.sort_values("delta_vida", ascending=False, inplace=True)
     total_cost = opt_df[cost_col].sum()
-    return opt_df.reset_index(drop=True), best_delta_val, total_cost
+    opt_df.reset_index(drop=True, inplace=True)
+    return opt_df, total_cost
+
+
+def mckp_max_delta(
+    df: pd.DataFrame,
+    group_col: str,
+    life_col: str,
+    cost_col: str,
+    base_life: float,
+    budget: float,
+    id_col: Optional[str] = None,
+    scale: int = 100,
+    engine: str = "array",
+    reduce: bool = False,
+    eps: float = 0.01,
+    stats: Optional[SolverStats] = None,
+) -> Tuple[pd.DataFrame, float, float]:
+    """Multiple‑choice knapsack:  0‑1 por grupo.
+
+    ``engine`` elige la implementación de la DP:
+    • ``"array"``  – NumPy; actualiza todo el eje de presupuesto por
+      variante y guarda solo una matriz compacta de retroceso.
+    • ``"legacy"`` – DP original en Python puro (listas por celda), útil
+      para comparar.
+    • ``"sparse"`` – estados Pareto (coste, Δ) con costes reales, sin
+      ``scale``: memoria proporcional al número de estados.
+    • ``"auto"``   – ``"sparse"`` y, si los estados superan las
+      ``budget * scale + 1`` celdas de la DP densa, ``"array"``.
+    • ``"approx"`` – para carteras grandes: relajación lagrangiana con
+      reparación greedy y, si hace falta, FPTAS (ver ``_mckp_approx``).
+      Garantiza Δ ≥ (1 − ``eps``)·óptimo; la cota superior certificada y
+      la brecha quedan en ``opt_df.attrs["approx"]``.  Sin ``scale`` y sin
+      el desempate por gasto; exige costes ≥ 0.
+    Todas siguen el mismo desempate; ``"array"`` y ``"legacy"`` dan el
+    mismo resultado, y ``"sparse"`` también cuando los costes son
+    múltiplos de ``1/scale`` (si no, evita el error de redondeo).
+
+    ``reduce=True`` aplica antes ``reduce_variants`` (resumen en
+    ``opt_df.attrs["reduction"]``).  ``stats`` (``SolverStats``) recibe
+    tiempos por fase (prepare, reduce, dp, backtrack, frame) y contadores.
+    """
+    with _instrument("mckp_max_delta", stats, engine=engine, reduce=reduce, budget=budget,
+                     scale=scale, variants=len(df)) as st:
+        return _mckp_max_delta(df, group_col, life_col, cost_col, base_life, budget,
+                               id_col, scale, engine, reduce, eps, st)
+
+
+def _mckp_max_delta(df, group_col, life_col, cost_col, base_life, budget, id_col, scale,
+                    engine, reduce, eps, st: SolverStats) -> Tuple[pd.DataFrame, float, float]:
+    with st.phase("prepare"):
+        df = df.copy()
+        df["delta_vida"] = df[life_col] - base_life
+        budget_int = int(round(budget * scale))
+
+    work, reduced = df, None
+    if reduce:
+        with st.phase("reduce"):
+            reduced = reduce_variants(df, group_col, life_col, cost_col, base_life, budget, scale,
+                                      top_n=1, allow_empty=True)
+            work = reduced.df
+        st.count("variants_removed", reduced.summary["variants_before"] - reduced.summary["variants_after"])
+
+    if engine == "legacy":
+        # — Agrupar por nombre de proyecto —
+        # Store original indices for each group
+        groups_with_indices = {name: g.index.tolist() for name, g in work.groupby(group_col, sort=False)}
+        group_names = list(groups_with_indices.keys()) # Keep order of groups as they appear in df
+        groups = [groups_with_indices[name] for name in group_names]
+
+        # Escalar costes a enteros
+        cost_int = (work[cost_col] * scale).round().astype(int).tolist()
+        delta_vals = work["delta_vida"].tolist()
+
+        with st.phase("dp"):
+            best_delta_val, best_sel_indices = _mckp_dp_legacy(groups, cost_int, delta_vals, budget_int)
+        st.count("dp_cells", _dp_cells(cost_int, budget_int, len(groups)))
+    elif engine == "array":
+        groups = _group_positions(work, group_col)
+        cost_int = (work[cost_col] * scale).round().astype(int).to_numpy()
+        delta_vals = work["delta_vida"].to_numpy(dtype=float)
+
+        with st.phase("dp"):
+            dp, choice = _mckp_dp_array(groups, cost_int, delta_vals, budget_int)
+        st.count("dp_cells", _dp_cells(cost_int, budget_int, len(groups)))
+        with st.phase("backtrack"):
+            best_b = _best_budget_cell(dp)
+            best_delta_val = float(dp[best_b])
+            best_sel_indices = work.index[_mckp_backtrack(choice, groups, cost_int, best_b)].tolist()
+    elif engine in ("sparse", "auto"):
+        groups = _group_positions(work, group_col)
+        with st.phase("dp"):
+            solved = _mckp_sparse(
+                groups,
+                work[cost_col].to_numpy(dtype=float),
+                work["delta_vida"].to_numpy(dtype=float),
+                budget,
+                max_states=budget_int + 1 if engine == "auto" else None,
+                stats=st,
+            )
+        if solved is None:
+            st.count("sparse_fallbacks")
+            cost_int = (work[cost_col] * scale).round().astype(int).to_numpy()
+            with st.phase("dp"):
+                dp, choice = _mckp_dp_array(groups, cost_int, work["delta_vida"].to_numpy(dtype=float), budget_int)
+            st.count("dp_cells", _dp_cells(cost_int, budget_int, len(groups)))
+            with st.phase("backtrack"):
+                best_b = _best_budget_cell(dp)
+                solved = float(dp[best_b]), _mckp_backtrack(choice, groups, cost_int, best_b)
+        best_delta_val, best_pos = solved
+        best_sel_indices = work.index[best_pos].tolist()
+    elif engine == "approx":
+        if not 0 < eps < 1:
+            raise ValueError(f"eps debe estar en (0, 1): {eps!r}")
+        costs = work[cost_col].to_numpy(dtype=float)
+        if (costs < 0).any():
+            raise ValueError("engine='approx' requiere costes ≥ 0")
+        groups = _group_positions(work, group_col)
+        with st.phase("dp"):
+            best_delta_val, best_pos, approx_info = _mckp_approx(
+                groups, costs, work["delta_vida"].to_numpy(dtype=float), budget, eps, stats=st)
+        best_sel_indices = work.index[best_pos].tolist()
+    else:
+        raise ValueError(f"engine desconocido: {engine!r} "
+                         f"(use 'array', 'sparse', 'auto', 'approx' o 'legacy')")
+
+    with st.phase("frame"):
+        if reduced is not None:
+            best_sel_indices = reduced.index_map[best_sel_indices].tolist()
+
+        opt_df, total_cost = _selection_frame(df, best_sel_indices, cost_col, id_col)
+        if reduced is not None:
+            opt_df.attrs["reduction"] = reduced.summary
+        if engine == "approx":
+            opt_df.attrs["approx"] = approx_info
+    return opt_df, best_delta_val, total_cost
 
 
 # ------------------------------------------------------------------ #
-# 2. TOP‑N COMBINACIONES (Únicas por nombre)                         #
+# 1b. FRONTERA PRESUPUESTO – Δ VIDA                                  #
 # ------------------------------------------------------------------ #
 
-def top_n_combinations(
+class MCKPFrontier:
+    """Curva escalonada presupuesto → mejor Δ vida, de una sola DP.
+
+    La DP de ``mckp_max_delta`` ya guarda el mejor Δ para cada coste
+    exacto b ≤ presupuesto máximo; el óptimo para un presupuesto B' es la
+    mejor celda en [0, B'] (a igualdad de Δ, la de mayor gasto), así que
+    coincide con llamar a ``mckp_max_delta`` con B'.  Las selecciones se
+    reconstruyen solo cuando se piden.
+
+    ``df`` es la tabla sobre la que corrió la DP (la reducida si hubo
+    ``reduce``) e ``index_map`` lleva sus filas a las etiquetas de
+    ``source``, la tabla original.
+    """
+
+    def __init__(
+        self,
+        df: pd.DataFrame,
+        groups: List[np.ndarray],
+        cost_int: np.ndarray,
+        dp: np.ndarray,
+        choice: np.ndarray,
+        scale: int,
+        cost_col: str,
+        id_col: Optional[str] = None,
+        index_map: Optional[np.ndarray] = None,
+        source: Optional[pd.DataFrame] = None,
+    ):
+        self.df = df
+        self.source = df if source is None else source
+        self.groups = groups
+        self.cost_int = cost_int
+        self.dp = dp
+        self.choice = choice
+        self.scale = scale
+        self.cost_col = cost_col
+        self.id_col = id_col
+        self.index_map = index_map
+        # Mejor Δ hasta b y celda que lo alcanza (la última en caso de empate)
+        self._best_delta = np.maximum.accumulate(dp)
+        is_step = dp == self._best_delta
+        self._best_cell = np.maximum.accumulate(np.where(is_step, np.arange(len(dp)), 0))
+        self._steps = np.flatnonzero(is_step)
+
+    @property
+    def max_budget(self) -> float:
+        return (len(self.dp) - 1) / self.scale
+
+    def _cell(self, budget: float) -> int:
+        b = int(round(budget * self.scale))
+        if b < 0:
+            raise ValueError(f"presupuesto negativo: {budget}")
+        if b >= len(self.dp):
+            raise ValueError(f"presupuesto {budget} mayor que el máximo de la frontera "
+                             f"({self.max_budget})")
+        return int(self._best_cell[b])
+
+    def _labels(self, pos: List[int]) -> np.ndarray:
+        """Posiciones de la DP → etiquetas de la tabla original."""
+        labels = self.df.index[pos].to_numpy()
+        if self.index_map is not None:
+            labels = self.index_map[labels]
+        return labels
+
+    def steps(self) -> pd.DataFrame:
+        """Todos los escalones (sin reconstruir selecciones).
+
+        ``costo_total`` es el coste escalado de la celda (b / scale).
+        """
+        cells = self._steps
+        return pd.DataFrame({
+            "presupuesto": cells / self.scale,
+            "delta_total": self.dp[cells],
+            "costo_total": cells / self.scale,
+        })
+
+    def selection(self, budget: float) -> pd.DataFrame:
+        """Filas elegidas para ``budget`` (mismo formato que ``opt_df``)."""
+        pos = _mckp_backtrack(self.choice, self.groups, self.cost_int, self._cell(budget))
+        return _selection_frame(self.source, self._labels(pos).tolist(), self.cost_col, self.id_col)[0]
+
+    def to_frame(self, budgets: Optional[List[float]] = None) -> pd.DataFrame:
+        """Óptimo en cada presupuesto pedido (por defecto, cada escalón)."""
+        if budgets is None:
+            budgets = (self._steps / self.scale).tolist()
+        rows = []
+        for budget in budgets:
+            cell = self._cell(budget)
+            pos = _mckp_backtrack(self.choice, self.groups, self.cost_int, cell)
+            labels = self._labels(pos)
+            if self.id_col and self.id_col in self.df.columns:
+                ids = self.df[self.id_col].to_numpy()[pos].tolist()
+            else:
+                ids = labels.tolist()
+            rows.append({
+                "presupuesto": budget,
+                "delta_total": float(self.dp[cell]),
+                "costo_total": float(self.df[self.cost_col].to_numpy()[pos].sum()),
+                "IDs": ids,
+                "_indices": tuple(sorted(labels.tolist())),
+            })
+        return pd.DataFrame(rows)
+
+
+def frontier(
     df: pd.DataFrame,
     group_col: str,
     life_col: str,
@@ -145,21 +732,57 @@ def top_n_combinations(
     budget: float,
     id_col: Optional[str] = None,
     scale: int = 100,
-    top_n: int = 100,
-) -> pd.DataFrame:
-    df = df.copy()
-    df["delta_vida"] = df[life_col] - base_life
+    reduce: bool = False,
+    stats: Optional[SolverStats] = None,
+) -> MCKPFrontier:
+    """Una DP al presupuesto máximo ``budget`` → ``MCKPFrontier``."""
+    with _instrument("frontier", stats, reduce=reduce, budget=budget, scale=scale,
+                     variants=len(df)) as st:
+        with st.phase("prepare"):
+            df = df.copy()
+            df["delta_vida"] = df[life_col] - base_life
+
+        work, index_map = df, None
+        if reduce:
+            # La dominancia no depende del presupuesto y lo que no cabe en el
+            # máximo tampoco cabe en uno menor: la reducción vale para todos.
+            with st.phase("reduce"):
+                reduced = reduce_variants(df, group_col, life_col, cost_col, base_life, budget, scale,
+                                          top_n=1, allow_empty=True)
+                work, index_map = reduced.df, reduced.index_map
+
+        groups = _group_positions(work, group_col)
+        cost_int = (work[cost_col] * scale).round().astype(int).to_numpy()
+        budget_int = int(round(budget * scale))
+        with st.phase("dp"):
+            dp, choice = _mckp_dp_array(groups, cost_int, work["delta_vida"].to_numpy(dtype=float),
+                                        budget_int)
+        st.count("dp_cells", _dp_cells(cost_int, budget_int, len(groups)))
+        return MCKPFrontier(work, groups, cost_int, dp, choice, scale, cost_col, id_col, index_map, df)
 
-    groups_with_indices = {name: g.index.tolist() for name, g in df.groupby(group_col, sort=False)}
-    group_names_ordered = list(groups_with_indices.keys())
-    groups = [groups_with_indices[name] for name in group_names_ordered]
 
-    cost_int = (df[cost_col] * scale).round().astype(int).tolist()
-    delta_vals = df["delta_vida"].tolist()
-    vida_vals = df[life_col].tolist() 
-    budget_int = int(round(budget * scale))
+# ------------------------------------------------------------------ #
+# 2. TOP‑N COMBINACIONES (Únicas por nombre)                         #
+# ------------------------------------------------------------------ #
 
+# Tope de parciales de "kbest" (≈ 0.5–1 M por segundo en Python puro;
+# G=50 del bench ≈ 3.7 M en 7 s).  Por encima, top_n_combinations pide
+# elegir "anytime"/"bnb" explícitamente.
+KBEST_MAX_PARTIALS = 5_000_000
+
+def _top_n_backtrack(
+    groups: List[List[int]],
+    cost_int: List[int],
+    delta_vals: List[float],
+    vida_vals: List[float],
+    budget_int: int,
+    top_n: int,
+    stats: Optional[SolverStats] = None,
+) -> List[Tuple[float, int, float, Tuple[int, ...]]]:
+    """Enumeración exhaustiva 0‑o‑1 por grupo con un heap de tamaño N."""
     heap: List[Tuple[float, float, float, Tuple[int, ...]]] = []
+    counts = {"nodes_visited": 0, "nodes_pruned": 0, "heap_pushes": 0,
+              "heap_replacements": 0, "heap_rebuilds": 0}
 
     def consider(sel: List[int], d_sum: float, c_sum_int: int, v_sum: float):
         nonlocal heap # ****** ADDED nonlocal DECLARATION HERE ******
@@ -172,6 +795,7 @@ def top_n_combinations(
             # For safety, explicitly check if the set of indices is already in one of the heap's tuples.
             if not any(h_item[3] == item[3] for h_item in heap):
                  heapq.heappush(heap, item)
+                 counts["heap_pushes"] += 1
         else:
             if item > heap[0]: 
                 # If item is better than the worst in the heap, try to replace/add.
@@ -185,16 +809,21 @@ def top_n_combinations(
                 temp_heap = [h for h in heap if h[3] != item[3]]
                 heapq.heapify(temp_heap) # Not strictly necessary if just rebuilding, but good practice
                 heap = temp_heap # This assignment makes 'heap' local if not for 'nonlocal'
+                counts["heap_rebuilds"] += 1
 
                 if len(heap) < top_n: # If space opened up or it was already smaller
                     heapq.heappush(heap, item)
+                    counts["heap_pushes"] += 1
                 elif item > heap[0]: # Re-check, should still be true if logic is sound
                     heapq.heapreplace(heap, item) # Replace the smallest (worst)
+                    counts["heap_replacements"] += 1
                 # If after removing, heap is full and item is not better than new heap[0], it's not added.
 
 
     def backtrack(g_idx: int, current_d_sum: float, current_c_sum_int: int, current_v_sum: float, current_sel_indices: List[int]):
+        counts["nodes_visited"] += 1
         if current_c_sum_int > budget_int:
+            counts["nodes_pruned"] += 1
             return
 
         if g_idx == len(groups):
@@ -219,8 +848,436 @@ def top_n_combinations(
             )
 
     backtrack(0, 0.0, 0, 0.0, [])
-    combos = sorted(heap, reverse=True)
+    if stats is not None:
+        for name, n in counts.items():
+            stats.count(name, n)
+    return sorted(heap, reverse=True)
+
+
+
+def _kbest_partials(groups: List[np.ndarray], cost_int: np.ndarray, budget_int: int,
+                    top_n: int) -> int:
+    """Cota de los parciales que genera ``_top_n_kbest``: por grupo y
+    variante, estados de coste alcanzables × N (alcanzables con una DP
+    booleana, O(variantes × presupuesto) vectorizada)."""
+    reach = np.zeros(budget_int + 1, dtype=bool)
+    reach[0] = True
+    total = 0
+    for pos in groups:
+        n_states = int(reach.sum())
+        new = reach.copy()
+        for c in cost_int[pos].tolist():
+            if 0 <= c <= budget_int:
+                total += n_states
+                new[c:] |= reach[: budget_int + 1 - c]
+        reach = new
+    return total * top_n
+
+
+def _top_n_kbest(
+    groups: List[np.ndarray],
+    cost_int: np.ndarray,
+    delta_vals: np.ndarray,
+    vida_vals: np.ndarray,
+    budget_int: int,
+    top_n: int,
+    stats: Optional[SolverStats] = None,
+) -> List[Tuple[float, int, float, Tuple[int, ...]]]:
+    """DP k‑mejores: por cada coste alcanzable guarda sus N mejores parciales.
+
+    Recorre los grupos en orden; en cada paso, el estado de coste b se
+    forma con sus propios parciales (omitir el grupo) y con los de
+    b − c_j extendidos con cada variante j, y se recorta a N por
+    (Δ, −vida), sin contar el parcial vacío.  Se conservan los empates con
+    el N‑ésimo para no perder soluciones que el desempate final (por
+    índices) prefiera.  Cada
+    parcial es (Δ, vida, nodo) con ``nodo = (posición, nodo_padre)``, así
+    extender una selección es O(1).  Coste ~ O(grupos × estados × N).
+
+    Devuelve posiciones (no etiquetas) en ``idx_tuple``.  ``stats`` cuenta
+    parciales generados/conservados y estados de coste.
+    """
+    generated = kept = 0
+
+    def _truncate(entries: list) -> list:
+        entries.sort(key=lambda e: (e[0], -e[1]), reverse=True)
+        # El parcial vacío (solo en el coste 0) no es candidato final: no
+        # ocupa una de las N plazas de los que sí lo son.
+        limit = top_n + any(node is None for _, _, node in entries)
+        if len(entries) > limit:
+            cut_d, cut_v = entries[limit - 1][0], entries[limit - 1][1]
+            k = limit
+            while k < len(entries) and entries[k][0] == cut_d and entries[k][1] == cut_v:
+                k += 1
+            del entries[k:]
+        return entries
+
+    # estados: coste entero exacto -> [(Δ, vida, nodo), ...] ordenados
+    states = {0: [(0.0, 0.0, None)]}
+    for pos in groups:
+        new_states = {b: list(entries) for b, entries in states.items()}
+        for p in pos:
+            p = int(p)
+            c, d, v = int(cost_int[p]), delta_vals[p], vida_vals[p]
+            if c < 0 or c > budget_int:
+                continue
+            for b, entries in states.items():
+                nb = b + c
+                if nb > budget_int:
+                    continue
+                new_states.setdefault(nb, []).extend(
+                    (e_d + d, e_v + v, (p, node)) for e_d, e_v, node in entries
+                )
+                generated += len(entries)
+        states = {b: _truncate(entries) for b, entries in new_states.items()}
+        kept += sum(len(entries) for entries in states.values())
+
+    if stats is not None:
+        stats.count("partials_generated", generated)
+        stats.count("partials_kept", kept)
+        stats.count("cost_states", len(states))
+
+    # Candidatos finales (sin la selección vacía), ordenados por (Δ, −coste, −vida).
+    finals = [
+        (e_d, -b, -e_v, node)
+        for b, entries in states.items()
+        for e_d, e_v, node in entries
+        if node is not None
+    ]
+    finals.sort(key=lambda e: e[:3], reverse=True)
+    if len(finals) > top_n:
+        k = top_n
+        while k < len(finals) and finals[k][:3] == finals[top_n - 1][:3]:
+            k += 1
+        del finals[k:]
+
+    combos = []
+    for d_sum, neg_c, neg_v, node in finals:
+        sel = []
+        while node is not None:
+            sel.append(node[0])
+            node = node[1]
+        combos.append((d_sum, neg_c, neg_v, tuple(sorted(sel))))
+    return combos
+
+
+def _group_hull_points(costs: np.ndarray, deltas: np.ndarray) -> List[Tuple[float, float, int]]:
+    """Vértices (coste, Δ, k) de la envolvente convexa superior de un grupo.
+
+    Parte de (0, 0, -1) (omitir el grupo), que nunca se quita: si la mejor
+    variante de coste 0 tiene Δ > 0 entra como segundo vértice (0, Δ, k),
+    un segmento de coste nulo.  ``k`` es la posición de la variante dentro
+    de ``costs``.  Solo sobreviven variantes con Δ > 0 no dominadas y las
+    eficiencias entre vértices quedan decrecientes.
+    """
+    pts = [(0.0, 0.0, -1)]
+    items = sorted(zip(costs.tolist(), deltas.tolist(), range(len(costs))), key=lambda t: (t[0], -t[1]))
+    for c, d, k in items:
+        if d <= pts[-1][1]:
+            continue
+        if c == pts[-1][0] and len(pts) > 1:
+            pts.pop()
+        # Quitar puntos que quedan bajo la cuerda (no cóncavos)
+        while len(pts) >= 2:
+            (c0, d0, _), (c1, d1, _) = pts[-2], pts[-1]
+            if (d1 - d0) * (c - c0) <= (d - d0) * (c1 - c0):
+                pts.pop()
+            else:
+                break
+        pts.append((c, d, k))
+    return pts
+
+
+def _group_hull(costs: np.ndarray, deltas: np.ndarray) -> List[Tuple[float, float]]:
+    """Segmentos (Δcoste, ΔΔ) de la envolvente convexa superior de un grupo."""
+    pts = _group_hull_points(costs, deltas)
+    return [(c1 - c0, d1 - d0) for (c0, d0, _), (c1, d1, _) in zip(pts, pts[1:])]
+
+
+class _LPBound:
+    """Cota superior LP (MCKP relajado) de los grupos desde la profundidad t.
+
+    Para cada sufijo del orden de ramificación se ordenan los segmentos de
+    las envolventes por eficiencia y se acumulan coste y Δ; la cota para
+    una capacidad residual es el llenado greedy con el último segmento
+    fraccionado (búsqueda binaria, O(log S)).
+    """
+
+    def __init__(self, hulls: List[List[Tuple[float, float]]]):
+        self._cum_c: List[np.ndarray] = []
+        self._cum_d: List[np.ndarray] = []
+        self._eff: List[np.ndarray] = []
+        for t in range(len(hulls) + 1):
+            segs = [seg for hull in hulls[t:] for seg in hull]
+            eff = np.array([dd / dc if dc > 0 else np.inf for dc, dd in segs])
+            order = np.argsort(-eff, kind="stable")
+            dc = np.array([segs[i][0] for i in order], dtype=float)
+            dd = np.array([segs[i][1] for i in order], dtype=float)
+            self._cum_c.append(np.concatenate(([0.0], np.cumsum(dc))))
+            self._cum_d.append(np.concatenate(([0.0], np.cumsum(dd))))
+            self._eff.append(eff[order])
+
+    def __call__(self, t: int, cap: float) -> float:
+        cum_c, cum_d, eff = self._cum_c[t], self._cum_d[t], self._eff[t]
+        k = int(np.searchsorted(cum_c, cap, side="right")) - 1
+        if k >= len(eff):
+            return float(cum_d[-1])
+        return float(cum_d[k] + (cap - cum_c[k]) * eff[k])
+
+    def many(self, t: int, caps: np.ndarray) -> np.ndarray:
+        """Igual que la llamada, vectorizada sobre un arreglo de capacidades."""
+        cum_c, cum_d, eff = self._cum_c[t], self._cum_d[t], self._eff[t]
+        k = np.searchsorted(cum_c, caps, side="right") - 1
+        full = k >= len(eff)
+        k = np.clip(k, 0, max(len(eff) - 1, 0))
+        if not len(eff):
+            return np.zeros(len(caps))
+        with np.errstate(invalid="ignore"):
+            partial = cum_d[k] + (caps - cum_c[k]) * eff[k]
+        return np.where(full, cum_d[-1], partial)
+
+
+def _greedy_complete(
+    sel: List[int],
+    group_of: Dict[int, int],
+    cost_int: np.ndarray,
+    delta_vals: List[float],
+    budget_int: int,
+) -> List[int]:
+    """Completa ``sel`` con variantes de grupos libres (Δ > 0, mejor Δ/coste primero)."""
+    used = {group_of[p] for p in sel}
+    cap = budget_int - sum(int(cost_int[p]) for p in sel)
+    cand = sorted(
+        (p for p, g in group_of.items() if g not in used and delta_vals[p] > 0 and cost_int[p] >= 0),
+        key=lambda p: (-delta_vals[p] / cost_int[p] if cost_int[p] > 0 else -np.inf, p),
+    )
+    out = list(sel)
+    for p in cand:
+        g, c = group_of[p], int(cost_int[p])
+        if g not in used and c <= cap:
+            out.append(p)
+            used.add(g)
+            cap -= c
+    return out
+
+
+def _dp_seeds(
+    groups: List[np.ndarray],
+    cost_int: np.ndarray,
+    delta_vals: List[float],
+    budget_int: int,
+    top_n: int,
+) -> List[List[int]]:
+    """Selecciones iniciales: óptimos por coste exacto de las N mejores
+    celdas de la DP densa, cada una también completada con ``_greedy_complete``."""
+    dp, choice = _mckp_dp_array(groups, cost_int, np.asarray(delta_vals, dtype=float), budget_int)
+    group_of = {int(p): g for g, pos in enumerate(groups) for p in pos}
+    cells = np.flatnonzero(np.isfinite(dp))
+    cells = cells[np.lexsort((-cells, -dp[cells]))][: top_n + 1]
+    seeds = []
+    for b in cells.tolist():
+        sel = _mckp_backtrack(choice, groups, cost_int, b)
+        if sel:
+            seeds.append(sel)
+            seeds.append(_greedy_complete(sel, group_of, cost_int, delta_vals, budget_int))
+    return seeds
+
+
+def _top_n_branch_and_bound(
+    groups: List[np.ndarray],
+    cost_int: np.ndarray,
+    delta_vals: List[float],
+    vida_vals: List[float],
+    budget_int: int,
+    top_n: int,
+    deadline: Optional[float] = None,
+    seeds: Optional[List[List[int]]] = None,
+    on_progress: Optional[Callable[[list, dict], None]] = None,
+    progress_interval: float = 0.5,
+    tie_rank: Optional[Sequence[int]] = None,
+) -> Tuple[List[Tuple[float, int, float, Tuple[int, ...]]], dict]:
+    """Enumeración exacta con poda por cota LP.
+
+    Los grupos se ramifican de mayor a menor Δ alcanzable (cotas más
+    ajustadas primero) y, dentro de cada uno, las variantes de mayor Δ
+    primero.  Con el heap lleno, un subárbol se poda si Δ actual + cota LP
+    del resto no alcanza el Δ del peor elemento del heap.  Las sumas de
+    cada hoja se recalculan en el orden original de grupos, de modo que
+    los totales coinciden bit a bit con ``backtrack``.
+
+    Modo *anytime* (para ``method="anytime"``): ``seeds`` entran al heap
+    antes de buscar (umbral de poda alto desde el inicio); al pasar
+    ``deadline`` (``time.perf_counter()``) la búsqueda se corta y cada
+    nodo sin explorar solo aporta su cota.  ``on_progress(heap, info)`` se
+    llama como mucho cada ``progress_interval`` s si el heap cambió.
+
+    ``tie_rank[p]`` es el rango de la etiqueta final (original) de la
+    posición p: el último desempate del heap compara esos rangos, así que
+    coincide con el que hace ``backtrack`` sobre las etiquetas aunque
+    ``reduce_variants`` o un índice no ordenado las desordenen.  Por
+    defecto, la propia posición.
+
+    Devuelve posiciones (no etiquetas) y un dict con los contadores; con
+    corte, además ``exact=False`` y ``upper_bound`` (ninguna combinación
+    ausente supera ese Δ).
+    """
+    tie = list(range(len(cost_int))) if tie_rank is None else [int(r) for r in tie_rank]
+    pos_of = {r: p for p, r in enumerate(tie)}
+    group_of = {int(p): g for g, pos in enumerate(groups) for p in pos}
+    order = sorted(
+        range(len(groups)),
+        key=lambda g: -max((delta_vals[int(p)] for p in groups[g]), default=0.0),
+    )
+    branch = [
+        sorted((int(p) for p in groups[g] if 0 <= cost_int[p] <= budget_int),
+               key=lambda p: -delta_vals[p])
+        for g in order
+    ]
+    bound = _LPBound([
+        _group_hull(cost_int[pos].astype(float), np.asarray([delta_vals[p] for p in pos], dtype=float))
+        for pos in branch
+    ])
+
+    heap: List[Tuple[float, int, float, Tuple[int, ...]]] = []
+    in_heap = set()
+    stats = {"nodes_visited": 0, "nodes_pruned": 0, "heap_pushes": 0, "heap_replacements": 0}
+    n_groups = len(branch)
+    cut = {"off": False, "upper_bound": -np.inf, "changed": False,
+           "last_report": time.perf_counter()}
+
+    def consider(sel: List[int], c_sum: int):
+        sel = sorted(sel, key=group_of.__getitem__)
+        key = tuple(sorted(tie[p] for p in sel))
+        if key in in_heap:
+            return
+        d_sum, v_sum = 0.0, 0.0
+        for p in sel:
+            d_sum += delta_vals[p]
+            v_sum += vida_vals[p]
+        item = (d_sum, -c_sum, -v_sum, key)
+        if len(heap) < top_n:
+            heapq.heappush(heap, item)
+            stats["heap_pushes"] += 1
+        elif item > heap[0]:
+            in_heap.discard(heapq.heapreplace(heap, item)[3])
+            stats["heap_replacements"] += 1
+        else:
+            return
+        in_heap.add(key)
+        cut["changed"] = True
+
+    def positions():
+        """Heap ordenado con los rangos de desempate vueltos a posiciones."""
+        return [(d, neg_c, neg_v, tuple(pos_of[r] for r in key))
+                for d, neg_c, neg_v, key in sorted(heap, reverse=True)]
+
+    def report():
+        now = time.perf_counter()
+        if on_progress is not None and cut["changed"] and now - cut["last_report"] >= progress_interval:
+            cut["changed"] = False
+            cut["last_report"] = now
+            on_progress(positions(), dict(stats))
+
+    def search(t: int, d_sum: float, c_sum: int, sel: List[int]):
+        if cut["off"]:
+            cut["upper_bound"] = max(cut["upper_bound"], d_sum + bound(t, budget_int - c_sum))
+            return
+        stats["nodes_visited"] += 1
+        if (deadline is not None or on_progress is not None) and (stats["nodes_visited"] & 255) == 1:
+            report()
+            if deadline is not None and time.perf_counter() > deadline:
+                cut["off"] = True
+                cut["upper_bound"] = max(cut["upper_bound"], d_sum + bound(t, budget_int - c_sum))
+                return
+        if t == n_groups:
+            if sel:
+                consider(sel, c_sum)
+            return
+        if len(heap) >= top_n:
+            threshold = heap[0][0]
+            slack = 1e-9 * max(1.0, abs(threshold))
+            if d_sum + bound(t, budget_int - c_sum) < threshold - slack:
+                stats["nodes_pruned"] += 1
+                return
+
+        for p in branch[t]:
+            c = int(cost_int[p])
+            if c_sum + c > budget_int:
+                continue
+            sel.append(p)
+            search(t + 1, d_sum + delta_vals[p], c_sum + c, sel)
+            sel.pop()
+        search(t + 1, d_sum, c_sum, sel)
+
+    for sel in seeds or []:
+        c_sum = sum(int(cost_int[p]) for p in sel)
+        if c_sum <= budget_int:
+            consider(list(sel), c_sum)
+    if seeds:
+        cut["last_report"] = -np.inf  # primer aviso en cuanto haya semillas
+        report()
+
+    search(0, 0.0, 0, [])
+    if deadline is not None:
+        stats["exact"] = not cut["off"]
+        stats["upper_bound"] = float(cut["upper_bound"]) if cut["off"] else None
+    return positions(), stats
 
+
+def top_n_combinations(
+    df: pd.DataFrame,
+    group_col: str,
+    life_col: str,
+    cost_col: str,
+    base_life: float,
+    budget: float,
+    id_col: Optional[str] = None,
+    scale: int = 100,
+    top_n: int = 100,
+    method: str = "kbest",
+    reduce: bool = False,
+    deadline: Optional[float] = None,
+    callback: Optional[Callable[[pd.DataFrame], None]] = None,
+    progress_interval: float = 0.5,
+    stats: Optional[SolverStats] = None,
+) -> pd.DataFrame:
+    """Las N mejores combinaciones 0‑1 por grupo.
+
+    ``method`` (todos con el mismo resultado y desempate, salvo
+    ``"anytime"`` cortado por ``deadline``):
+    • ``"kbest"``     – DP de k‑mejores por estado de presupuesto.  Es el
+      valor por defecto (antes ``"backtrack"``).  Si la cota de parciales
+      (``_kbest_partials``) supera ``KBEST_MAX_PARTIALS`` lanza
+      ``ValueError`` antes de buscar: use ``"anytime"`` con ``deadline``
+      o ``"bnb"``.
+    • ``"bnb"``       – enumeración exacta con ramificación y poda por la
+      relajación LP de los grupos restantes.  Los contadores de nodos
+      quedan en ``resultado.attrs`` (``nodes_visited``, ``nodes_pruned``).
+    • ``"backtrack"`` – enumeración exhaustiva original (exponencial en el
+      número de grupos).
+    • ``"anytime"``   – B&B sembrado con los óptimos de la DP por coste
+      exacto (y su completado greedy) que se corta a los ``deadline``
+      segundos de la llamada.  ``callback(parcial)`` recibe el top‑N
+      vigente (cada ``progress_interval`` s si mejora, y al final).  En
+      ``resultado.attrs``: ``exact`` (búsqueda completa = mismo resultado
+      que ``"bnb"``), ``upper_bound`` (ninguna combinación ausente tiene
+      Δ mayor) y ``gap`` = ``upper_bound`` − Δ de la última fila.
+
+    ``reduce=True`` aplica antes ``reduce_variants`` con este ``top_n``
+    (resumen en ``resultado.attrs["reduction"]``).  ``stats``
+    (``SolverStats``) recibe tiempos por fase (prepare, reduce, search,
+    postprocess), nodos, pushes/reemplazos del heap y parciales k‑best.
+    """
+    with _instrument("top_n_combinations", stats, method=method, reduce=reduce, budget=budget,
+                     scale=scale, top_n=top_n, variants=len(df)) as st:
+        t_end = None if deadline is None else time.perf_counter() + deadline
+        return _top_n_combinations(df, group_col, life_col, cost_col, base_life, budget,
+                                   id_col, scale, top_n, method, reduce, st,
+                                   t_end, callback, progress_interval)
+
+
+def _combos_frame(combos, table: "ProjectTable", scale: int, top_n: int, id_col: Optional[str]) -> pd.DataFrame:
+    """Filas del resultado a partir de (Δ, −coste, −vida, etiquetas) ordenados."""
     rows = []
     # Using a set for processed_sels_indices ensures that we only add unique *sets of projects*
     # to the final list, even if they were generated multiple times by backtrack (which shouldn't happen with MCKP).
@@ -234,26 +1291,13 @@ def top_n_combinations(
         cost_total = -neg_c_int / scale
         vida_total = -neg_v_sum 
 
-        # Get actual IDs for the selected projects
-        ids_list = []
+        # IDs de los proyectos elegidos (etiquetas si no hay id_col)
         if id_col:
-            # Ensure indices in idx_tuple are valid for df.loc
-            valid_indices = [idx for idx in idx_tuple if idx in df.index]
-            if not valid_indices: # Should not happen if indices come from df
+            pos = table.positions(idx_tuple)
+            if not len(pos): # Should not happen if indices come from df
                 print(f"Warning: No valid indices in idx_tuple: {idx_tuple} for combination.")
                 continue
-
-            selected_items_df = df.loc[list(valid_indices)] # Use list of valid_indices
-            
-            if id_col in selected_items_df.columns:
-                ids_list = selected_items_df[id_col].tolist()
-            elif df.index.name == id_col: 
-                 ids_list = selected_items_df.index.tolist()
-            # Fallback if id_col is not directly in columns of selected_items_df (e.g. if it was only in original df)
-            elif id_col in df.columns:
-                ids_list = df.loc[list(valid_indices), id_col].tolist()
-            else: # Fallback to original indices if id_col cannot be resolved
-                ids_list = list(valid_indices)
+            ids_list = table.ids(pos)
         else:
             ids_list = list(idx_tuple) 
 
@@ -267,76 +1311,241 @@ def top_n_combinations(
         })
         if len(rows) >= top_n: 
             break
-            
     return pd.DataFrame(rows)
 
 
+def _top_n_combinations(df, group_col, life_col, cost_col, base_life, budget, id_col, scale,
+                        top_n, method, reduce, st: SolverStats,
+                        t_end=None, callback=None, progress_interval=0.5) -> pd.DataFrame:
+    with st.phase("prepare"):
+        df = df.copy()
+        df["delta_vida"] = df[life_col] - base_life
+        table = ProjectTable(df, life_col, base_life, cost_col, id_col)
+
+    budget_int = int(round(budget * scale))
+    search_stats = {}
+
+    work, reduced = df, None
+    if reduce:
+        with st.phase("reduce"):
+            reduced = reduce_variants(df, group_col, life_col, cost_col, base_life, budget, scale,
+                                      top_n=top_n, allow_empty=False)
+            work = reduced.df
+        search_stats["reduction"] = reduced.summary
+        st.count("variants_removed", reduced.summary["variants_before"] - reduced.summary["variants_after"])
+
+    if method == "backtrack":
+        groups_with_indices = {name: g.index.tolist() for name, g in work.groupby(group_col, sort=False)}
+        group_names_ordered = list(groups_with_indices.keys())
+        groups = [groups_with_indices[name] for name in group_names_ordered]
+
+        cost_int = (work[cost_col] * scale).round().astype(int).tolist()
+        delta_vals = work["delta_vida"].tolist()
+        vida_vals = work[life_col].tolist() 
+
+        with st.phase("search"):
+            combos = _top_n_backtrack(groups, cost_int, delta_vals, vida_vals, budget_int, top_n, st)
+    elif method in ("kbest", "bnb", "anytime"):
+        groups = _group_positions(work, group_col)
+        cost_int = (work[cost_col] * scale).round().astype(int).to_numpy()
+        delta_vals = work["delta_vida"].tolist()
+        vida_vals = work[life_col].tolist()
+
+        def relabel(pos_combos):
+            """Posiciones de ``work`` → etiquetas de ``work``, ordenado."""
+            labels = work.index
+            out = [
+                (d, neg_c, neg_v, tuple(sorted(labels[list(pos)].tolist())))
+                for d, neg_c, neg_v, pos in pos_combos
+            ]
+            out.sort(reverse=True)
+            return out
+
+        if method == "kbest":
+            partials = _kbest_partials(groups, cost_int, budget_int, top_n)
+            if partials > KBEST_MAX_PARTIALS:
+                raise ValueError(
+                    f"method='kbest' generaría hasta {partials:,} parciales "
+                    f"(tope KBEST_MAX_PARTIALS = {KBEST_MAX_PARTIALS:,}); "
+                    f"use method='anytime' con deadline, 'bnb', o reduzca top_n / scale")
+            with st.phase("search"):
+                combos = _top_n_kbest(groups, cost_int, delta_vals, vida_vals, budget_int, top_n, st)
+        else:
+            seeds, on_progress = None, None
+            if method == "anytime":
+                with st.phase("seed"):
+                    seeds = _dp_seeds(groups, cost_int, delta_vals, budget_int, top_n)
+                st.count("seeds", len(seeds))
+                if callback is not None:
+                    def on_progress(pos_combos, info):
+                        combos_now = relabel(pos_combos)
+                        if reduced is not None:
+                            combos_now = [(d, c, v, tuple(sorted(reduced.index_map[list(idx)].tolist())))
+                                          for d, c, v, idx in combos_now]
+                            combos_now.sort(reverse=True)
+                        partial = _combos_frame(combos_now, table, scale, top_n, id_col)
+                        partial.attrs.update(info, exact=False)
+                        callback(partial)
+            # El heap recorta empates por etiqueta original, como backtrack
+            final_labels = work.index.to_numpy() if reduced is None else reduced.index_map
+            tie_rank = np.argsort(np.argsort(final_labels, kind="stable"), kind="stable")
+            with st.phase("search"):
+                combos, node_stats = _top_n_branch_and_bound(
+                    groups, cost_int, delta_vals, vida_vals, budget_int, top_n,
+                    deadline=t_end if method == "anytime" else None,
+                    seeds=seeds, on_progress=on_progress, progress_interval=progress_interval,
+                    tie_rank=tie_rank,
+                )
+            if method == "anytime" and t_end is None:
+                node_stats.update(exact=True, upper_bound=None)
+            search_stats.update(node_stats)
+            for name, n in node_stats.items():
+                if isinstance(n, int) and not isinstance(n, bool):
+                    st.count(name, n)
+        combos = relabel(combos)
+    else:
+        raise ValueError(f"method desconocido: {method!r} (use 'kbest', 'bnb', 'anytime' o 'backtrack')")
+
+    with st.phase("postprocess"):
+        if reduced is not None:
+            combos = [
+                (d, neg_c, neg_v, tuple(sorted(reduced.index_map[list(idx)].tolist())))
+                for d, neg_c, neg_v, idx in combos
+            ]
+            combos.sort(reverse=True)
+
+        result = _combos_frame(combos, table, scale, top_n, id_col)
+        if method == "anytime":
+            worst = float(result["delta_total"].min()) if len(result) else np.inf
+            bound = search_stats["upper_bound"]
+            search_stats["gap"] = 0.0 if search_stats["exact"] else (
+                max(0.0, bound - worst) if len(result) else np.inf)
+        result.attrs.update(search_stats)
+    if callback is not None and method == "anytime":
+        callback(result)
+    return result
+
+
 # ------------------------------------------------------------------ #
 # 3. DETALLE DE COMBINACIÓN                                          #
 # ------------------------------------------------------------------ #
 
-def detalle(df_original: pd.DataFrame, ids_or_indices: List, life_col: str, base_life_val: float, cost_col: str, id_col_name: Optional[str], is_indices: bool = False):
-    sub_df = df_original.copy() 
-
-    selected_rows = pd.DataFrame() # Initialize an empty DataFrame
+class ProjectTable:
+    """Columnas de presentación como arreglos, armadas una sola vez.
+
+    Guarda ``delta_vida`` ya calculado, los ids y dos índices (id →
+    posición y etiqueta → posición).  Resolver una combinación es un
+    ``get_indexer`` y un ``take`` por columna, sin copiar el DataFrame.
+    """
+
+    def __init__(
+        self,
+        df: pd.DataFrame,
+        life_col: str,
+        base_life: float,
+        cost_col: str,
+        id_col: Optional[str] = None,
+    ):
+        self.id_col = id_col
+        self.delta = (df[life_col] - base_life).to_numpy(dtype=float)
+        self._labels = df.index
+        if id_col and id_col in df.columns:
+            ids = df[id_col].to_numpy()
+        elif id_col and df.index.name == id_col:
+            ids = df.index.to_numpy()
+        else:
+            ids = None
+        self._ids = ids
+        self._id_index = pd.Index(ids) if ids is not None else None
+
+        # Mismas columnas (y orden) que mostraba `detalle`
+        wanted = ([id_col] if ids is not None else []) + [
+            "Nombre del Proyecto", life_col, "delta_vida",
+            "Seguridad", "Desarrollo", "Gobernabilidad", cost_col,
+        ]
+        self.columns: List[str] = []
+        self._arrays: List[np.ndarray] = []
+        for col in wanted:
+            if col in self.columns:
+                continue
+            if col == "delta_vida":
+                arr = self.delta
+            elif col == id_col and ids is not None:
+                arr = ids
+            elif col in df.columns:
+                arr = df[col].to_numpy()
+            else:
+                continue
+            self.columns.append(col)
+            self._arrays.append(arr)
+
+    def __len__(self) -> int:
+        return len(self.delta)
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """Columnas completas por nombre (p. ej. para fijar tipos al exportar)."""
+        return dict(zip(self.columns, self._arrays))
+
+    def positions(self, labels) -> np.ndarray:
+        """Posiciones de etiquetas del índice original (omite las ausentes)."""
+        pos = self._labels.get_indexer(list(labels))
+        return pos[pos >= 0]
+
+    def positions_by_id(self, ids) -> np.ndarray:
+        """Posiciones (en orden de la tabla) de las filas con esos ids."""
+        if self._id_index is None:
+            return np.empty(0, dtype=np.intp)
+        pos = self._id_index.get_indexer_for(list(ids))
+        return np.unique(pos[pos >= 0])
+
+    def ids(self, pos: np.ndarray) -> List:
+        """Ids de las filas en ``pos`` (etiquetas si no hay columna id)."""
+        if self._ids is None:
+            return self._labels[pos].tolist()
+        return self._ids[pos].tolist()
+
+    def _order(self, pos: np.ndarray) -> np.ndarray:
+        return pos[np.argsort(-self.delta[pos], kind="stable")]
+
+    def frame(self, pos: np.ndarray) -> pd.DataFrame:
+        """Detalle de las filas ``pos`` ordenado por Δ vida descendente."""
+        order = self._order(np.asarray(pos, dtype=np.intp))
+        return pd.DataFrame({col: arr.take(order) for col, arr in zip(self.columns, self._arrays)},
+                            columns=self.columns)
+
+    def rows(self, labels) -> List[tuple]:
+        """Como ``frame`` pero en tuplas (para escritores en streaming)."""
+        order = self._order(self.positions(labels))
+        return list(zip(*(arr.take(order).tolist() for arr in self._arrays)))
+
+
+def detalle(df_original, ids_or_indices: List, life_col: str, base_life_val: float, cost_col: str, id_col_name: Optional[str], is_indices: bool = False):
+    """Filas de una combinación (por ids o por etiquetas del índice).
+
+    ``df_original`` puede ser un DataFrame o un ``ProjectTable`` ya armado;
+    con muchas combinaciones conviene pasar la tabla (se arma una vez).
+    """
+    table = df_original if isinstance(df_original, ProjectTable) else ProjectTable(
+        df_original, life_col, base_life_val, cost_col, id_col_name)
 
     if not ids_or_indices: # Handle empty list of ids/indices
         print(f"Warning (detalle): Received empty list for ids_or_indices.")
-        return selected_rows
+        return pd.DataFrame()
 
     if is_indices:
-        # Filter out any indices not present in the DataFrame to prevent .loc errors
-        valid_indices = [idx for idx in ids_or_indices if idx in sub_df.index]
-        if valid_indices:
-            selected_rows = sub_df.loc[valid_indices].copy()
-        else:
+        pos = table.positions(ids_or_indices)
+        if not len(pos):
             print(f"Warning (detalle): No valid indices found in df_original for {ids_or_indices}")
-    elif id_col_name and id_col_name in sub_df.columns:
-        selected_rows = sub_df[sub_df[id_col_name].isin(ids_or_indices)].copy()
-    elif id_col_name and sub_df.index.name == id_col_name:
-        selected_rows = sub_df[sub_df.index.isin(ids_or_indices)].copy()
+    elif table._id_index is not None:
+        pos = table.positions_by_id(ids_or_indices)
     else:
         print(f"Warning (detalle): Cannot identify projects. id_col_name: {id_col_name}, is_indices: {is_indices}. IDs/Indices provided: {ids_or_indices}")
-        return selected_rows # Return empty DataFrame
+        return pd.DataFrame()
 
-    if selected_rows.empty:
+    if not len(pos):
         print(f"Warning (detalle): No rows selected for IDs/Indices: {ids_or_indices}")
-        return selected_rows
-
-    selected_rows["delta_vida"] = selected_rows[life_col] - base_life_val
-    
-    display_cols = []
-    # Add id_col_name first if it's valid and exists
-    if id_col_name:
-        if id_col_name in selected_rows.columns:
-            display_cols.append(id_col_name)
-        elif selected_rows.index.name == id_col_name and id_col_name not in display_cols : # if id_col is index
-            # If id_col is the index, it won't be in columns unless reset.
-            # For display, we might need to reset_index or handle it.
-            # For now, assume if it's index, it will be handled by to_string or to_excel.
-            # Or, ensure it's a column:
-            # temp_selected_rows = selected_rows.reset_index()
-            # if id_col_name in temp_selected_rows.columns:
-            # display_cols.append(id_col_name)
-            pass # Handled by pandas if index is named and shown
-
-    
-    standard_cols = ["Nombre del Proyecto", life_col, "delta_vida", "Seguridad", "Desarrollo", "Gobernabilidad", cost_col]
-    for col in standard_cols:
-        if col in selected_rows.columns and col not in display_cols: # Add if exists and not already added
-            display_cols.append(col)
-    
-    # Ensure all display_cols actually exist in selected_rows to prevent KeyErrors
-    final_display_cols = [col for col in display_cols if col in selected_rows.columns or selected_rows.index.name == col]
-    # If id_col_name was the index, and we want it as a column in the output:
-    if id_col_name and selected_rows.index.name == id_col_name and id_col_name not in final_display_cols:
-        selected_rows_processed = selected_rows.reset_index()
-        if id_col_name in selected_rows_processed.columns:
-             final_display_cols.insert(0, id_col_name) # Add to beginning
-        return selected_rows_processed[final_display_cols].sort_values("delta_vida", ascending=False).reset_index(drop=True)
-
-
-    return selected_rows[final_display_cols].sort_values("delta_vida", ascending=False).reset_index(drop=True)
+        return pd.DataFrame()
+    return table.frame(pos)
 
 
 # ------------------------------------------------------------------ #
@@ -346,20 +1555,6 @@ def detalle(df_original: pd.DataFrame, ids_or_indices: List, life_col: str, base
 if __name__ == "__main__":
     # --- Configuration ---
     ruta_csv    = r"Libro1.csv"
-    try:
-        proyectos_df = pd.read_csv(ruta_csv, delimiter=";")
-    except FileNotFoundError:
-        print(f"Error: El archivo CSV no se encontró en la ruta: {ruta_csv}")
-        exit(1) # Exit with an error code
-    except Exception as e:
-        print(f"Error al leer el archivo CSV: {e}")
-        print("Intentando con encoding 'latin1'...")
-        try:
-            proyectos_df = pd.read_csv(ruta_csv, delimiter=";", encoding='latin1')
-        except Exception as e_latin1:
-            print(f"Error al leer con 'latin1': {e_latin1}")
-            print("Asegúrese de que la ruta del archivo CSV es correcta y el archivo no está corrupto.")
-            exit(1)
 
     life_col    = "vida"
     cost_col    = "valorinversion" 
@@ -370,68 +1565,24 @@ if __name__ == "__main__":
     presupuesto = 10_000    
     top_n_count = 20        
     scale_factor= 20       
+    presupuestos_frontera = [6_000, 8_000, 10_000, 12_000]
 
-    output_excel_path = "project_selection_results.xlsx"
-
-    # --- Data Sanity Checks and Preparation ---
-    # Check for id_col first as it's crucial for indexing/joining later
-    if id_col not in proyectos_df.columns and proyectos_df.index.name != id_col:
-        print(f"Error: La columna ID especificada '{id_col}' no existe en el CSV ni como índice.")
-        # Try to set index if 'objectid' (common default) exists and id_col is 'objectid'
-        if id_col == "objectid" and "objectid" in proyectos_df.columns:
-            print(f"Intentando usar la columna 'objectid' como índice.")
-            # proyectos_df.set_index("objectid", inplace=True) # This changes df structure, be careful
-            # For this script, it's better to ensure id_col is a regular column or handled if it's index.
-            # The functions are designed to handle id_col as a column name primarily.
-        else:
-            print("Por favor, verifique el nombre de la columna ID.")
-            exit(1)
-    
-    # Ensure original DataFrame index is unique if it's going to be used by .loc implicitly
-    # or if id_col is not set. For this script, we mostly use .loc with lists of original indices
-    # derived from df.index.tolist() within groups, so original index should be fine.
-    # If not using a specific id_col and relying on original index, ensure it's clean.
-    # For this script, we assume df.index are unique default integer indices if no id_col is used for joining.
-
-    # Check other required columns
-    required_cols_data = [life_col, cost_col, name_col] # id_col checked above
-    missing_cols = [col for col in required_cols_data if col not in proyectos_df.columns]
-    if missing_cols:
-        print(f"Error: Faltan las siguientes columnas de datos requeridas en el CSV: {', '.join(missing_cols)}")
-        # Attempt to correct common encoding issue for cost_col
-        if cost_col not in proyectos_df.columns:
-            corrected_cost_col_name = None
-            if "Valor InversiÃ³n (mill)" in proyectos_df.columns:
-                corrected_cost_col_name = "Valor InversiÃ³n (mill)"
-            elif "Valor Inversion (mill)" in proyectos_df.columns:
-                corrected_cost_col_name = "Valor Inversion (mill)"
-            
-            if corrected_cost_col_name:
-                print(f"Se encontró '{corrected_cost_col_name}', se renombrará a '{cost_col}'.")
-                proyectos_df.rename(columns={corrected_cost_col_name: cost_col}, inplace=True)
-            else:
-                print(f"La columna de costo '{cost_col}' no se encontró con variaciones comunes.")
-        
-        # Re-check after potential rename
-        missing_cols = [col for col in required_cols_data if col not in proyectos_df.columns]
-        if missing_cols:
-            print(f"Columnas aún faltantes: {', '.join(missing_cols)}. Por favor, verifique los nombres.")
-            exit(1)
-    
-    # Convert relevant columns to numeric, coercing errors
-    for col_to_convert in [life_col, cost_col]:
-        if col_to_convert in proyectos_df.columns:
-            proyectos_df[col_to_convert] = proyectos_df[col_to_convert].astype(str).str.replace(",", ".")
-            proyectos_df[col_to_convert] = pd.to_numeric(proyectos_df[col_to_convert], errors='coerce')
-            if proyectos_df[col_to_convert].isnull().any():
-                print(f"Advertencia: La columna '{col_to_convert}' contenía valores no numéricos. Se convirtieron a NaN y se rellenaron con 0.")
-                proyectos_df[col_to_convert].fillna(0, inplace=True)
-        else: # Should have been caught by missing_cols check
-            print(f"Error crítico: La columna '{col_to_convert}' no existe para la conversión numérica.")
-            exit(1)
-    
-    # Ensure 'delta_vida' is calculated on a clean 'life_col'
-    # This is done inside functions, but pre-check here is also good.
+    output_excel_path = "project_selection_results.xlsx"   # también .csv o .parquet
+    export_layout = "sheets"   # "sheets": una hoja por combinación · "long": una sola hoja
+
+    # --- Carga tipada (ver mochila_carga.py) ---
+    from mochila_carga import read_projects
+
+    try:
+        proyectos_df = read_projects(ruta_csv, required=(name_col, life_col, cost_col, id_col))
+    except FileNotFoundError:
+        print(f"Error: El archivo CSV no se encontró en la ruta: {ruta_csv}")
+        exit(1) # Exit with an error code
+    except (KeyError, ValueError) as e:
+        print(f"Error al leer el archivo CSV: {e}")
+        exit(1)
+    for aviso in proyectos_df.attrs["carga"]["advertencias"]:
+        print(f"Advertencia: {aviso}")
 
     print("--- Procesando Combinación Óptima (MCKP) ---")
     opt_df, delta_opt, costo_opt = mckp_max_delta(
@@ -466,6 +1617,20 @@ if __name__ == "__main__":
     print(f"\nSuma de Δ vida : {delta_opt:.2f}")
     print(f"Costo total    : {costo_opt:.2f} (de {presupuesto})")
 
+    print("\n=== FRONTERA PRESUPUESTO – Δ VIDA ===")
+    frontera = frontier(
+        proyectos_df,
+        group_col=name_col,
+        life_col=life_col,
+        cost_col=cost_col,
+        base_life=base_life,
+        budget=max(presupuestos_frontera),
+        id_col=id_col,
+        scale=scale_factor
+    ).to_frame(presupuestos_frontera)
+    frontera["IDs"] = frontera["IDs"].apply(lambda x: ', '.join(map(str, x)))
+    print(frontera[["presupuesto", "delta_total", "costo_total", "IDs"]].to_string(index=False))
+
     print(f"\n--- Procesando Top {top_n_count} Combinaciones (MCKP) ---")
     top_df = top_n_combinations(
         proyectos_df,
@@ -491,75 +1656,34 @@ if __name__ == "__main__":
         print(top_df_to_print.to_string(index=False))
 
 
-    # --- Export Results to Excel ---
-    print(f"\n--- Exportando resultados a Excel: {output_excel_path} ---")
+    # --- Export Results (streaming, ver mochila_export.py) ---
+    from mochila_export import export_top_n
+
+    print(f"\n--- Exportando resultados: {output_excel_path} ---")
     try:
-        with pd.ExcelWriter(output_excel_path, engine='openpyxl') as writer:
-            # Sheet 1: Optimal Combination Details
-            if not opt_df.empty:
-                opt_df_excel = opt_df_displayable[[col for col in display_cols_opt if col in opt_df_displayable.columns]].copy()
-                opt_df_excel.to_excel(writer, sheet_name="Optimal_Combination_Details", index=False)
-            
-            # Sheet 2: Top N Combinations Summary
-            if not top_df.empty:
-                top_df_excel_summary = top_df[[col for col in top_df_summary_cols if col in top_df.columns]].copy()
-                if 'IDs' in top_df_excel_summary.columns:
-                     top_df_excel_summary['IDs'] = top_df_excel_summary['IDs'].apply(lambda x: ', '.join(map(str, x)) if isinstance(x, (list,tuple)) else str(x))
-                top_df_excel_summary.to_excel(writer, sheet_name=f"Top_{top_n_count}_Summary", index=False)
-
-            # Sheets 3 to N+2: Details for each of the Top N combinations
-            if not top_df.empty:
-                print("\n--- Generando detalles para Top N Combinaciones para Excel ---")
-                for i, row_data in top_df.iterrows(): # Use row_data to avoid conflict with outer 'row' if any
-                    if i >= top_n_count : break 
-                    
-                    # 'IDs' from top_df should be the list of actual project identifiers (e.g., objectid values)
-                    # '_indices' from top_df are the original DataFrame row indices.
-                    ids_for_detail_lookup = row_data.get("IDs") 
-                    
-                    detail_df_for_excel = pd.DataFrame() # Initialize
-
-                    if isinstance(ids_for_detail_lookup, (list, tuple)) and ids_for_detail_lookup:
-                        # Use is_indices=False because ids_for_detail_lookup are actual IDs from id_col
-                        detail_df_for_excel = detalle(proyectos_df, ids_for_detail_lookup, life_col, base_life, cost_col, id_col, is_indices=False)
-                    else:
-                        # Fallback or if IDs were not properly populated, try with _indices
-                        indices_for_detail_lookup = row_data.get("_indices")
-                        if isinstance(indices_for_detail_lookup, (list, tuple)) and indices_for_detail_lookup:
-                            print(f"Advertencia para Combinación {i+1}: IDs no disponibles o no lista, usando _indices para detalle.")
-                            detail_df_for_excel = detalle(proyectos_df, list(indices_for_detail_lookup), life_col, base_life, cost_col, id_col, is_indices=True)
-                        else:
-                            print(f"Error: No se pueden obtener detalles para la Combinación {i+1} (Excel), IDs e índices no válidos/faltantes en top_df.")
-                            # Create a placeholder sheet
-                            pd.DataFrame([{"message": f"No details found for Combination {i+1} due to missing ID/index data."}]).to_excel(writer, sheet_name=f"Combination_{i+1}_Details", index=False)
-                            continue
-
-                    sheet_name = f"Combination_{i+1}_Details"
-                    if not detail_df_for_excel.empty:
-                        # Ensure columns in detail_df_for_excel are suitable for Excel (e.g. id_col is present)
-                        # The 'detalle' function should already prepare display_cols.
-                        detail_df_for_excel.to_excel(writer, sheet_name=sheet_name, index=False)
-                    else:
-                        print(f"    Advertencia: El DataFrame de detalle para la Combinación {i+1} (Excel) está vacío.")
-                        pd.DataFrame([{"message": f"Details for Combination {i+1} are empty."}]).to_excel(writer, sheet_name=sheet_name, index=False)
-                    
-                    # Console output for details (already done if you keep the previous loop)
-                    # This part is just for Excel generation. The console print is separate.
-                    if i < 5: # Only print first few details to console during Excel export part to avoid clutter
-                        print(f"\n--- (Para Consola) COMBINACIÓN {i+1} | Δ={row_data['delta_total']:.2f} | Costo={row_data['costo_total']:.2f} | VidaTotal={row_data['vida_total']:.2f}")
-                        if not detail_df_for_excel.empty:
-                            print(detail_df_for_excel.to_string(index=False))
-                        else:
-                            print("    (Detalles no disponibles o vacíos para consola)")
-
-
-        print(f"\nResultados exportados exitosamente a: {output_excel_path}")
-
-    except ImportError:
-        print("\nError: La librería 'openpyxl' es necesaria para exportar a Excel. Por favor, instálala con 'pip install openpyxl'.")
+        tabla_proyectos = ProjectTable(proyectos_df, life_col, base_life, cost_col, id_col)
+        opt_df_excel = None
+        if not opt_df.empty:
+            opt_df_excel = opt_df_displayable[[col for col in display_cols_opt if col in opt_df_displayable.columns]]
+
+        # Consola: detalle de las primeras combinaciones
+        for i, row_data in enumerate(top_df.head(5).to_dict("records")):
+            print(f"\n--- (Para Consola) COMBINACIÓN {i+1} | Δ={row_data['delta_total']:.2f} | Costo={row_data['costo_total']:.2f} | VidaTotal={row_data['vida_total']:.2f}")
+            print(tabla_proyectos.frame(tabla_proyectos.positions(row_data["_indices"])).to_string(index=False))
+
+        archivos = export_top_n(
+            output_excel_path, top_df, tabla_proyectos,
+            optimal=opt_df_excel,
+            layout=export_layout,
+            summary_sheet=f"Top_{top_n_count}_Summary",
+        )
+        print(f"\nResultados exportados exitosamente a: {', '.join(archivos)}")
+
+    except ImportError as e:
+        print(f"\nError: falta una librería para exportar {output_excel_path} (openpyxl para .xlsx, pyarrow para .parquet): {e}")
         exit(1)
     except Exception as e:
-        print(f"\nOcurrió un error al procesar o exportar a Excel: {e}")
+        print(f"\nOcurrió un error al procesar o exportar los resultados: {e}")
         import traceback
         traceback.print_exc() # Print full traceback for debugging
         exit(1)
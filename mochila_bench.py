@@ -0,0 +1,343 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+mochila_bench.py  –  benchmarks de los solvers de mochila.py
+
+• `synthetic_portfolio` genera carteras con la forma de `Libro1.csv`:
+  G nombres de proyecto con 1–V variantes (Óptima / Buena / Deficiente),
+  costes múltiplos de 100 y deltas por dimensión con la misma relación
+  que la GP (Δ vida = 0.22 · (0.45 seg + 0.30 gob + 0.25 des)).
+• Cada solver se cronometra (`repeat` corridas, mínimo y mediana) y se
+  mide su pico de memoria con `tracemalloc` en una corrida aparte.
+• Verificación cruzada: todos los motores exactos de `mckp_max_delta`
+  (y la frontera) deben dar el mismo Δ y coste; todos los métodos top‑N
+  las mismas (Δ, coste) en el mismo orden.  El motor ``approx`` debe
+  cumplir Δ ≥ (1 − `APPROX_EPS`)·óptimo y cota ≥ óptimo.
+• Reporte JSON y comparación contra una línea base: un caso es regresión
+  si su tiempo mínimo supera ``tolerance`` × el de la base (se ignoran
+  casos de menos de ``MIN_SECONDS``).
+
+Los solvers exponenciales o en Python puro solo corren hasta `LIMITS`.
+
+Uso:
+    python mochila_bench.py --grid quick -o reporte.json
+    python mochila_bench.py --grid full --baseline base.json
+    python mochila_bench.py --save-baseline base.json
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from mochila import (KBEST_MAX_PARTIALS, _group_positions, _kbest_partials, frontier,
+                     mckp_max_delta, top_n_combinations)
+
+GRIDS = {
+    "quick": {"groups": [10, 30], "scale": [1, 20], "top_n": [1, 20]},
+    "full": {"groups": [10, 50, 100, 200, 500], "scale": [1, 10, 20, 100],
+             "top_n": [1, 20, 100, 1000]},
+}
+
+# Tamaños máximos para los solvers lentos (lo que excede queda en
+# "skipped" del reporte).  Referencia: k‑best con G=50, N=20 y 54 000
+# celdas ≈ 7 s; B&B con G=200, N=20 ≈ 90 s.
+LIMITS = {
+    "legacy_cells": 2_000_000,   # grupos × celdas de presupuesto
+    "kbest_work": 20_000_000,    # grupos × celdas × top_n
+    "bnb_work": 2_000,           # grupos × top_n
+    "backtrack_groups": 12,
+}
+
+MIN_SECONDS = 0.005
+APPROX_EPS = 0.01
+BASE_LIFE = 72.68
+_COLS = dict(group_col="proyecto", life_col="vida", cost_col="valorinversion",
+             base_life=BASE_LIFE, id_col="id_proyecto")
+
+
+# ------------------------------------------------------------------ #
+# 1. GENERADOR                                                       #
+# ------------------------------------------------------------------ #
+
+def synthetic_portfolio(
+    groups: int,
+    max_variants: int = 3,
+    seed: int = 0,
+    cost_range: Tuple[int, int] = (1_200, 3_800),
+    negative_share: float = 0.05,
+) -> pd.DataFrame:
+    """Cartera sintética con las columnas de ``Libro1.csv`` que usan los solvers."""
+    rng = np.random.default_rng(seed)
+    n_var = rng.integers(1, max_variants + 1, size=groups)
+    group = np.repeat(np.arange(groups), n_var)
+    variant = np.concatenate([np.arange(k) for k in n_var])
+    n = len(group)
+
+    # Nivel por proyecto + efecto de la ubicación (Óptima rinde más y cuesta más)
+    level = rng.lognormal(-0.8, 0.6, size=(groups, 3))[group]
+    quality = np.array([1.0, 0.8, 0.6])[variant % 3]
+    dims = level * quality[:, None] * rng.uniform(0.7, 1.3, size=(n, 3))
+    flip = rng.random(n) < negative_share
+    dims[flip] *= -0.3
+    delta_indice = dims @ np.array([0.45, 0.30, 0.25])
+    delta_vida = 0.22 * delta_indice
+
+    lo, hi = cost_range
+    base_cost = rng.integers(lo // 100, hi // 100 + 1, size=groups)[group]
+    cost = np.clip(np.rint(base_cost * quality) + rng.integers(-2, 3, size=n),
+                   lo // 100, hi // 100) * 100
+
+    return pd.DataFrame({
+        "proyecto": np.char.add("Proyecto ", group.astype(str)),
+        "ubicacion": np.array(["Óptima", "Buena", "Deficiente"])[variant % 3],
+        "valorinversion": cost.astype(float),
+        "id_proyecto": np.arange(1, n + 1),
+        "delta_seg": dims[:, 0],
+        "delta_gob": dims[:, 1],
+        "delta_des": dims[:, 2],
+        "delta_indice": delta_indice,
+        "delta_vida": delta_vida,
+        "vida": BASE_LIFE + delta_vida,
+    })
+
+
+def default_budget(df: pd.DataFrame, share: float = 0.45) -> float:
+    """``share`` del coste medio por grupo sumado (Libro1: 10 000 ≈ 0.45)."""
+    per_group = df.groupby("proyecto")["valorinversion"].mean().sum()
+    return float(round(share * per_group, -2))
+
+
+# ------------------------------------------------------------------ #
+# 2. MEDICIÓN                                                        #
+# ------------------------------------------------------------------ #
+
+def _measure(fn: Callable, repeat: int, memory: bool) -> Tuple[Dict, object]:
+    times = []
+    result = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - t0)
+    stats = {"time_min": min(times), "time_median": statistics.median(times)}
+    if memory:
+        tracemalloc.start()
+        try:
+            fn()
+            stats["peak_bytes"] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return stats, result
+
+
+def _mckp_solvers(groups: int, budget_int: int) -> Dict[str, Optional[Callable]]:
+    """Solvers del óptimo; ``None`` = omitido por ``LIMITS``."""
+    solvers = {
+        "mckp:array": lambda df, b, s: mckp_max_delta(df, budget=b, scale=s, **_COLS),
+        "mckp:sparse": lambda df, b, s: mckp_max_delta(df, budget=b, scale=s, engine="sparse", **_COLS),
+        "mckp:auto": lambda df, b, s: mckp_max_delta(df, budget=b, scale=s, engine="auto", **_COLS),
+        "mckp:array+reduce": lambda df, b, s: mckp_max_delta(df, budget=b, scale=s, reduce=True, **_COLS),
+        "frontier": lambda df, b, s: frontier(df, budget=b, scale=s, **_COLS),
+        "mckp:approx": lambda df, b, s: mckp_max_delta(df, budget=b, scale=s, engine="approx",
+                                                       eps=APPROX_EPS, **_COLS),
+    }
+    solvers["mckp:legacy"] = (
+        (lambda df, b, s: mckp_max_delta(df, budget=b, scale=s, engine="legacy", **_COLS))
+        if groups * budget_int <= LIMITS["legacy_cells"] else None
+    )
+    return solvers
+
+
+def _top_n_solvers(groups: int, budget_int: int, top_n: int,
+                   kbest_partials: int = 0) -> Dict[str, Optional[Callable]]:
+    """Solvers top‑N; ``None`` = omitido por ``LIMITS`` (o, para k‑best,
+    por ``KBEST_MAX_PARTIALS``: ``kbest_partials`` es su cota con N=1)."""
+    kbest_ok = (groups * budget_int * top_n <= LIMITS["kbest_work"]
+                and kbest_partials * top_n <= KBEST_MAX_PARTIALS)
+    return {
+        "top_n:kbest": (lambda df, b, s, n: top_n_combinations(
+            df, budget=b, scale=s, top_n=n, **_COLS)) if kbest_ok else None,
+        "top_n:kbest+reduce": (lambda df, b, s, n: top_n_combinations(
+            df, budget=b, scale=s, top_n=n, reduce=True, **_COLS)) if kbest_ok else None,
+        "top_n:bnb": (lambda df, b, s, n: top_n_combinations(
+            df, budget=b, scale=s, top_n=n, method="bnb", **_COLS))
+        if groups * top_n <= LIMITS["bnb_work"] else None,
+        "top_n:anytime": (lambda df, b, s, n: top_n_combinations(
+            df, budget=b, scale=s, top_n=n, method="anytime", **_COLS))
+        if groups * top_n <= LIMITS["bnb_work"] else None,
+        "top_n:backtrack": (lambda df, b, s, n: top_n_combinations(
+            df, budget=b, scale=s, top_n=n, method="backtrack", **_COLS))
+        if groups <= LIMITS["backtrack_groups"] else None,
+    }
+
+
+def _mckp_key(name: str, result, budget: float) -> Tuple[float, float]:
+    if name == "frontier":
+        row = result.to_frame([budget]).iloc[0]
+        return round(float(row["delta_total"]), 9), round(float(row["costo_total"]), 6)
+    _, delta, cost = result
+    return round(float(delta), 9), round(float(cost), 6)
+
+
+def _top_key(result: pd.DataFrame) -> List[Tuple[float, float]]:
+    if result.empty:
+        return []
+    return [(round(float(d), 9), round(float(c), 6))
+            for d, c in zip(result["delta_total"], result["costo_total"])]
+
+
+def run_grid(
+    grid: Dict[str, List[int]],
+    max_variants: int = 3,
+    seed: int = 0,
+    repeat: int = 3,
+    memory: bool = True,
+    progress: bool = True,
+) -> Dict:
+    """Corre todos los solvers sobre la grilla; devuelve el reporte."""
+    results, mismatches, skipped = [], [], []
+
+    def log(msg: str):
+        if progress:
+            print(msg, file=sys.stderr)
+
+    for groups in grid["groups"]:
+        df = synthetic_portfolio(groups, max_variants, seed)
+        budget = default_budget(df)
+        for scale in grid["scale"]:
+            budget_int = int(round(budget * scale))
+            case = {"groups": groups, "variants": len(df), "scale": scale, "budget": budget}
+
+            keys = {}
+            for name, fn in _mckp_solvers(groups, budget_int).items():
+                if fn is None:
+                    skipped.append({"solver": name, **case, "top_n": None})
+                    continue
+                stats, res = _measure(lambda: fn(df, budget, scale), repeat, memory)
+                if name == "mckp:approx":
+                    approx = (float(res[1]), res[0].attrs["approx"]["upper_bound"])
+                else:
+                    keys[name] = _mckp_key(name, res, budget)
+                results.append({"solver": name, **case, "top_n": None, **stats})
+                log(f"{name:20s} G={groups:<4d} scale={scale:<4d} {stats['time_min']:.4f}s")
+            ref = next(iter(keys.values()))
+            for name, key in keys.items():
+                if key != ref:
+                    mismatches.append({"solver": name, **case, "top_n": None,
+                                       "expected": ref, "got": key})
+            # El aproximado usa costes reales: su referencia exacta es sparse
+            exact = keys.get("mckp:sparse", ref)[0]
+            if approx[0] < (1 - APPROX_EPS) * exact - 1e-9 or approx[1] < exact - 1e-9:
+                mismatches.append({"solver": "mckp:approx", **case, "top_n": None,
+                                   "expected": exact, "got": approx})
+
+            cost_int = (df[_COLS["cost_col"]] * scale).round().astype(int).to_numpy()
+            partials = _kbest_partials(_group_positions(df, _COLS["group_col"]), cost_int,
+                                       budget_int, 1)
+            for top_n in grid["top_n"]:
+                keys = {}
+                for name, fn in _top_n_solvers(groups, budget_int, top_n, partials).items():
+                    if fn is None:
+                        skipped.append({"solver": name, **case, "top_n": top_n})
+                        continue
+                    stats, res = _measure(lambda: fn(df, budget, scale, top_n), repeat, memory)
+                    keys[name] = _top_key(res)
+                    results.append({"solver": name, **case, "top_n": top_n, **stats})
+                    log(f"{name:20s} G={groups:<4d} scale={scale:<4d} N={top_n:<5d} "
+                        f"{stats['time_min']:.4f}s")
+                ref = next(iter(keys.values()), [])
+                for name, key in keys.items():
+                    if key != ref:
+                        mismatches.append({"solver": name, **case, "top_n": top_n,
+                                           "expected": ref[:5], "got": key[:5]})
+
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+            "grid": grid, "max_variants": max_variants, "seed": seed, "repeat": repeat,
+        },
+        "results": results,
+        "mismatches": mismatches,
+        "skipped": skipped,
+    }
+
+
+# ------------------------------------------------------------------ #
+# 3. LÍNEA BASE                                                      #
+# ------------------------------------------------------------------ #
+
+def _case_key(row: Dict) -> str:
+    return f"{row['solver']}|G={row['groups']}|V={row['variants']}|scale={row['scale']}|N={row['top_n']}"
+
+
+def compare_baseline(report: Dict, baseline: Dict, tolerance: float = 1.25) -> List[Dict]:
+    """Casos cuyo tiempo mínimo empeoró más de ``tolerance`` veces."""
+    base = {_case_key(row): row for row in baseline.get("results", [])}
+    regressions = []
+    for row in report["results"]:
+        ref = base.get(_case_key(row))
+        if ref is None or max(row["time_min"], ref["time_min"]) < MIN_SECONDS:
+            continue
+        ratio = row["time_min"] / max(ref["time_min"], 1e-12)
+        if ratio > tolerance:
+            regressions.append({"case": _case_key(row), "baseline": ref["time_min"],
+                                "now": row["time_min"], "ratio": ratio})
+    return regressions
+
+
+# ------------------------------------------------------------------ #
+# 4. MAIN                                                            #
+# ------------------------------------------------------------------ #
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks de los solvers de mochila.py.")
+    parser.add_argument("--grid", choices=sorted(GRIDS), default="quick")
+    parser.add_argument("--groups", type=int, nargs="*", help="Sustituye los grupos de la grilla")
+    parser.add_argument("--scale", type=int, nargs="*", help="Sustituye los scale de la grilla")
+    parser.add_argument("--top-n", type=int, nargs="*", help="Sustituye los top_n de la grilla")
+    parser.add_argument("--variants", type=int, default=3, help="Máximo de variantes por proyecto")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-memory", action="store_true", help="Omite la corrida con tracemalloc")
+    parser.add_argument("-o", "--salida", default="bench_report.json")
+    parser.add_argument("--baseline", help="Reporte previo contra el que comparar")
+    parser.add_argument("--tolerance", type=float, default=1.25)
+    parser.add_argument("--save-baseline", help="Guarda también el reporte como línea base")
+    args = parser.parse_args()
+
+    grid = dict(GRIDS[args.grid])
+    for key, value in (("groups", args.groups), ("scale", args.scale), ("top_n", args.top_n)):
+        if value:
+            grid[key] = value
+
+    report = run_grid(grid, args.variants, args.seed, args.repeat, memory=not args.no_memory)
+    status = 0
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as fh:
+            report["regressions"] = compare_baseline(report, json.load(fh), args.tolerance)
+        for reg in report["regressions"]:
+            print(f"REGRESIÓN {reg['case']}: {reg['baseline']:.4f}s → {reg['now']:.4f}s "
+                  f"(×{reg['ratio']:.2f})")
+        status |= bool(report["regressions"])
+    for bad in report["mismatches"]:
+        print(f"DISCREPANCIA {bad['solver']} G={bad['groups']} scale={bad['scale']} "
+              f"N={bad['top_n']}: {bad['got']} ≠ {bad['expected']}")
+    status |= bool(report["mismatches"])
+
+    for path in filter(None, (args.salida, args.save_baseline)):
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+    print(f"{len(report['results'])} mediciones, {len(report['skipped'])} omitidas, "
+          f"{len(report['mismatches'])} discrepancias → {args.salida}")
+    sys.exit(status)
@@ -0,0 +1,277 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+mochila_cache.py  –  caché por contenido para los solvers de mochila.py
+
+La clave es un hash de las columnas que usan los solvers (grupo, vida,
+coste, id e índice de filas) más `base_life`, `budget`, `scale` y los
+parámetros de motor.  Dos llamadas con la misma tabla y parámetros
+devuelven el resultado guardado sin resolver.
+
+• Memoria: LRU con `max_entries` entradas.
+• Disco (opcional): un pickle por clave en `directory`; cuando el total
+  supera `max_bytes` se borran los menos usados (por fecha de acceso).
+  Cada escritura va a un temporal propio (`mkstemp`) y se renombra, así
+  que varios procesos pueden compartir el directorio; un archivo que no
+  se puede escribir, leer o borrar simplemente se salta.
+• Top‑N: la clave no incluye N.  Un resultado guardado con N grande
+  responde cualquier N menor (es un prefijo del mismo orden total); si
+  el guardado ya tenía menos filas que su N, está completo para
+  cualquier N.
+• `deadline`, `callback`, `progress_interval` y `stats` no entran en la
+  clave; un resultado `anytime` cortado por el plazo (no exacto) no se
+  guarda.  Los parámetros numéricos se normalizan (10000, 10000.0 y
+  ``np.int64(10000)`` dan la misma clave).
+• Lo guardado no se comparte: `put` guarda una copia y `get` devuelve
+  otra (también de las listas de ``IDs``/``_indices``), así que modificar
+  un resultado no altera la caché.
+
+Uso:
+    cache = SolverCache(directory=".cache_mochila")
+    top = cached_top_n_combinations(df, "proyecto", "vida", "valorinversion",
+                                    72.68, 10_000, id_col="id_proyecto",
+                                    scale=20, top_n=20, cache=cache)
+"""
+
+import copy
+import hashlib
+import numbers
+import os
+import pickle
+import tempfile
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from mochila import mckp_max_delta, top_n_combinations
+
+
+# ------------------------------------------------------------------ #
+# 1. CLAVES                                                          #
+# ------------------------------------------------------------------ #
+
+def table_fingerprint(
+    df: pd.DataFrame,
+    group_col: str,
+    life_col: str,
+    cost_col: str,
+    id_col: Optional[str] = None,
+) -> str:
+    """Hash de las columnas relevantes (y del índice, que sale en ``_indices``)."""
+    cols = [group_col, life_col, cost_col] + ([id_col] if id_col and id_col in df.columns else [])
+    h = hashlib.blake2b(digest_size=20)
+    h.update(repr(cols).encode())
+    h.update(pd.util.hash_pandas_object(df[cols], index=True).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+# Argumentos que no cambian el resultado exacto (o son objetos de la llamada)
+_UNKEYED = ("stats", "deadline", "callback", "progress_interval")
+
+
+def _canonical(value: Any) -> Any:
+    """Valor con la misma ``repr`` para números iguales (int, float, NumPy)."""
+    if isinstance(value, (bool, np.bool_)):
+        return bool(value)
+    if isinstance(value, numbers.Real):
+        return float(value)
+    if isinstance(value, (list, tuple)):
+        return tuple(_canonical(v) for v in value)
+    return value
+
+
+def _key(kind: str, fingerprint: str, **params) -> str:
+    h = hashlib.blake2b(digest_size=20)
+    h.update(kind.encode())
+    h.update(fingerprint.encode())
+    h.update(repr(sorted((k, _canonical(v)) for k, v in params.items())).encode())
+    return h.hexdigest()
+
+
+def _detached(value: Any) -> Any:
+    """Copia independiente (``DataFrame.copy`` no copia las listas de las
+    columnas ``object``)."""
+    if isinstance(value, pd.DataFrame):
+        out = value.copy(deep=True)
+        for i, dtype in enumerate(out.dtypes):
+            if dtype == object:
+                out.isetitem(i, pd.Series([copy.deepcopy(v) for v in out.iloc[:, i]],
+                                          index=out.index, dtype=object))
+        out.attrs = copy.deepcopy(value.attrs)
+        return out
+    if isinstance(value, tuple):
+        return tuple(_detached(v) for v in value)
+    return copy.deepcopy(value)
+
+
+# ------------------------------------------------------------------ #
+# 2. ALMACÉN                                                         #
+# ------------------------------------------------------------------ #
+
+class SolverCache:
+    """LRU en memoria con almacén en disco opcional."""
+
+    def __init__(
+        self,
+        max_entries: int = 128,
+        directory: Optional[str] = None,
+        max_bytes: int = 256 * 1024 * 1024,
+    ):
+        self.max_entries = max_entries
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._mem: "OrderedDict[str, Any]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.pkl")
+
+    def get(self, key: str) -> Optional[Any]:
+        """Copia del valor guardado (None si no está)."""
+        if key in self._mem:
+            self._mem.move_to_end(key)
+            return _detached(self._mem[key])
+        if self.directory:
+            path = self._path(key)
+            try:
+                with open(path, "rb") as fh:
+                    value = pickle.load(fh)
+            except (OSError, pickle.UnpicklingError, EOFError):
+                return None
+            try:
+                os.utime(path)  # marca de uso para la expulsión LRU
+            except OSError:
+                pass
+            self._remember(key, value)
+            return _detached(value)
+        return None
+
+    def put(self, key: str, value: Any):
+        """Guarda una copia de ``value``."""
+        self._remember(key, _detached(value))
+        if self.directory:
+            tmp = None
+            try:
+                fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+                with os.fdopen(fd, "wb") as fh:
+                    pickle.dump(value, fh, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp, self._path(key))
+            except OSError:
+                if tmp is not None:
+                    try:
+                        os.remove(tmp)
+                    except OSError:
+                        pass
+            self._evict_disk()
+
+    def _remember(self, key: str, value: Any):
+        self._mem[key] = value
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.max_entries:
+            self._mem.popitem(last=False)
+
+    def _evict_disk(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".pkl"):
+                try:
+                    st = os.stat(os.path.join(self.directory, name))
+                except OSError:  # borrado por otro proceso
+                    continue
+                entries.append((st.st_mtime, st.st_size, name))
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            total -= size
+
+    def clear(self):
+        self._mem.clear()
+        if self.directory:
+            for name in os.listdir(self.directory):
+                if name.endswith(".pkl"):
+                    try:
+                        os.remove(os.path.join(self.directory, name))
+                    except OSError:
+                        pass
+
+
+default_cache = SolverCache()
+
+
+# ------------------------------------------------------------------ #
+# 3. SOLVERS CON CACHÉ                                               #
+# ------------------------------------------------------------------ #
+
+def cached_mckp_max_delta(
+    df: pd.DataFrame,
+    group_col: str,
+    life_col: str,
+    cost_col: str,
+    base_life: float,
+    budget: float,
+    id_col: Optional[str] = None,
+    scale: int = 100,
+    cache: Optional[SolverCache] = None,
+    **kwargs,
+) -> Tuple[pd.DataFrame, float, float]:
+    """``mckp_max_delta`` con caché (``kwargs`` pasa ``engine``/``reduce``;
+    ``stats`` no forma parte de la clave y solo se llena si se resuelve)."""
+    cache = cache or default_cache
+    params = {k: v for k, v in kwargs.items() if k not in _UNKEYED}
+    key = _key("mckp", table_fingerprint(df, group_col, life_col, cost_col, id_col),
+               base_life=base_life, budget=budget, scale=scale, id_col=id_col, **params)
+    hit = cache.get(key)
+    if hit is not None:
+        cache.hits += 1
+        return hit
+    cache.misses += 1
+    opt_df, delta, cost = mckp_max_delta(df, group_col, life_col, cost_col, base_life, budget,
+                                         id_col=id_col, scale=scale, **kwargs)
+    cache.put(key, (opt_df, delta, cost))
+    return opt_df, delta, cost
+
+
+def cached_top_n_combinations(
+    df: pd.DataFrame,
+    group_col: str,
+    life_col: str,
+    cost_col: str,
+    base_life: float,
+    budget: float,
+    id_col: Optional[str] = None,
+    scale: int = 100,
+    top_n: int = 100,
+    cache: Optional[SolverCache] = None,
+    **kwargs,
+) -> pd.DataFrame:
+    """``top_n_combinations`` con caché; un N mayor guardado sirve a uno menor.
+
+    Un resultado guardado es exacto, así que responde a cualquier
+    ``deadline`` (y no llama a ``callback``).
+    """
+    cache = cache or default_cache
+    params = {k: v for k, v in kwargs.items() if k not in _UNKEYED}
+    key = _key("top_n", table_fingerprint(df, group_col, life_col, cost_col, id_col),
+               base_life=base_life, budget=budget, scale=scale, id_col=id_col, **params)
+    hit = cache.get(key)
+    if hit is not None:
+        stored_n, result = hit
+        if stored_n >= top_n or len(result) < stored_n:
+            cache.hits += 1
+            return result.head(top_n)
+    cache.misses += 1
+    result = top_n_combinations(df, group_col, life_col, cost_col, base_life, budget,
+                                id_col=id_col, scale=scale, top_n=top_n, **kwargs)
+    if result.attrs.get("exact", True):
+        cache.put(key, (top_n, result))
+    return result
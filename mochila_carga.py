@@ -0,0 +1,254 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+mochila_carga.py  –  lector tipado de `Libro1.csv` con caché columnar
+
+El `__main__` de `mochila.py` leía el CSV con `;`, reintentaba con latin1
+si fallaba, corregía las comas decimales columna por columna y adivinaba
+encabezados mal decodificados.  Aquí todo va en una pasada:
+
+• Se lee el archivo en bytes una vez: de ahí salen la codificación
+  (BOM UTF‑8, UTF‑8 o cp1252/latin1) y el hash para la caché.
+• `pd.read_csv` con `sep=";"`, `decimal=","` y los tipos de `SCHEMA`.
+  Los encabezados se normalizan (BOM, espacios, `HEADER_ALIASES`) y se
+  validan las columnas obligatorias (`KeyError` si faltan).
+• Caché Feather sin comprimir en ``CACHE_DIR`` (``MOCHILA_CACHE_DIR`` o
+  ``~/.cache/mochila``; nunca junto al CSV), un archivo por ruta de CSV
+  (`<nombre>.<hash de la ruta>.feather`).  En su metadato van mtime, tamaño y hash blake2b del CSV: si mtime y
+  tamaño coinciden se usa directamente; si no, se compara el hash (un
+  `touch` no invalida).  Se abre con memory‑map.  Sin pyarrow no hay
+  caché y se parsea siempre.
+
+Uso:
+    df = read_projects("Libro1.csv")
+    df.attrs["carga"]   # {"fuente": "cache" | "csv", "encoding": ..., ...}
+"""
+
+import hashlib
+import io
+import json
+import os
+import tempfile
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+# Tipos de Libro1.csv ("str" = texto; el resto, dtype numérico)
+SCHEMA: Dict[str, str] = {
+    "proyecto": "str",
+    "seguridad": "float64",
+    "desarrollo": "float64",
+    "gobernabilidad": "float64",
+    "valorinversion": "float64",
+    "areaafectacion": "float64",
+    "ubicacion": "str",
+    "x": "float64",
+    "y": "float64",
+    "id_proyecto": "int64",
+    "descripcion": "str",
+    "mean_seguridad": "float64",
+    "mean_gobernabilidad": "float64",
+    "mean_desarrollo": "float64",
+    "indice": "float64",
+    "vida": "float64",
+    "delta_seg": "float64",
+    "delta_gob": "float64",
+    "delta_des": "float64",
+    "delta_indice": "float64",
+    "delta_vida": "float64",
+    "VIDA/VALOR": "float64",
+}
+
+# Columnas que usan los solvers
+REQUIRED: Tuple[str, ...] = ("proyecto", "vida", "valorinversion", "id_proyecto")
+
+# Encabezados de versiones anteriores del libro (o mal decodificados)
+HEADER_ALIASES: Dict[str, str] = {
+    "Valor Inversión (mill)": "valorinversion",
+    "Valor InversiÃ³n (mill)": "valorinversion",
+    "Valor Inversion (mill)": "valorinversion",
+}
+
+# Carpeta de la caché Feather
+CACHE_DIR = os.environ.get("MOCHILA_CACHE_DIR") or os.path.join(
+    os.path.expanduser("~"), ".cache", "mochila")
+
+_CACHE_VERSION = 1
+_META_KEY = b"mochila_carga"
+
+
+# ------------------------------------------------------------------ #
+# 1. PARSEO                                                          #
+# ------------------------------------------------------------------ #
+
+def detect_encoding(raw: bytes) -> str:
+    """``utf-8-sig`` con BOM, ``utf-8`` si decodifica, si no ``cp1252``."""
+    if raw.startswith(b"\xef\xbb\xbf"):
+        return "utf-8-sig"
+    try:
+        raw.decode("utf-8")
+        return "utf-8"
+    except UnicodeDecodeError:
+        pass
+    try:
+        raw.decode("cp1252")
+        return "cp1252"
+    except UnicodeDecodeError:
+        return "latin1"
+
+
+def _normalize_header(name: str) -> str:
+    name = name.replace("\ufeff", "").strip()
+    return HEADER_ALIASES.get(name, name)
+
+
+def parse_projects(
+    raw: bytes,
+    required: Sequence[str] = REQUIRED,
+    schema: Optional[Dict[str, str]] = None,
+    source: str = "<bytes>",
+) -> pd.DataFrame:
+    """Parsea el contenido de un CSV de proyectos ya leído en bytes."""
+    schema = SCHEMA if schema is None else schema
+    encoding = detect_encoding(raw)
+    text = raw.decode(encoding)
+
+    header = next(iter(io.StringIO(text)), "").rstrip("\r\n").split(";")
+    names = [_normalize_header(h) for h in header]
+    dtypes = {col: str for col, kind in schema.items() if kind == "str"}
+
+    df = pd.read_csv(io.StringIO(text), sep=";", decimal=",", header=0, names=names,
+                     dtype=dtypes, keep_default_na=True)
+
+    missing = [col for col in required if col not in df.columns]
+    if missing:
+        raise KeyError(f"Faltan columnas en {source}: {', '.join(missing)}")
+
+    warnings: List[str] = []
+    for col, kind in schema.items():
+        if kind == "str" or col not in df.columns:
+            continue
+        if not pd.api.types.is_numeric_dtype(df[col]):
+            # Celdas con texto: lo que no sea número queda NaN
+            df[col] = pd.to_numeric(df[col].astype(str).str.replace(",", ".", regex=False),
+                                    errors="coerce")
+        if df[col].isna().any():
+            if col in required:
+                warnings.append(f"'{col}' tenía valores vacíos o no numéricos; se rellenaron con 0")
+                df[col] = df[col].fillna(0)
+            elif kind != "float64":
+                raise ValueError(f"La columna '{col}' de {source} tiene valores vacíos o no numéricos")
+        df[col] = df[col].astype(kind)
+
+    df.attrs["carga"] = {"fuente": "csv", "encoding": encoding, "advertencias": warnings}
+    return df
+
+
+# ------------------------------------------------------------------ #
+# 2. CACHÉ FEATHER                                                   #
+# ------------------------------------------------------------------ #
+
+def cache_path(path: str, cache_dir: Optional[str] = None) -> str:
+    """Archivo de caché del CSV ``path`` dentro de ``cache_dir`` (o ``CACHE_DIR``)."""
+    full = os.path.abspath(path)
+    tag = hashlib.blake2b(full.encode(), digest_size=8).hexdigest()
+    return os.path.join(cache_dir or CACHE_DIR, f"{os.path.basename(full)}.{tag}.feather")
+
+
+def _load_cache(path: str, st: os.stat_result, schema_key: str,
+                cache_dir: Optional[str] = None) -> Optional[pd.DataFrame]:
+    """DataFrame de la caché si sigue vigente (``None`` si no)."""
+    try:
+        import pyarrow as pa
+        import pyarrow.feather as feather
+    except ImportError:
+        return None
+    target = cache_path(path, cache_dir)
+    try:
+        with pa.memory_map(target, "r") as source:
+            meta = pa.ipc.open_file(source).schema.metadata or {}
+        info = json.loads(meta.get(_META_KEY, b"{}"))
+    except (OSError, pa.ArrowInvalid, ValueError):
+        return None
+
+    if info.get("version") != _CACHE_VERSION or info.get("schema") != schema_key:
+        return None
+    if (info.get("mtime_ns"), info.get("size")) != (st.st_mtime_ns, st.st_size):
+        with open(path, "rb") as fh:
+            if hashlib.blake2b(fh.read(), digest_size=20).hexdigest() != info.get("hash"):
+                return None
+
+    table = feather.read_table(target, memory_map=True)
+    df = table.to_pandas(split_blocks=True)
+    df.attrs["carga"] = {"fuente": "cache", "encoding": info.get("encoding"),
+                         "advertencias": info.get("advertencias", [])}
+    return df
+
+
+def _write_cache(path: str, st: os.stat_result, raw: bytes, df: pd.DataFrame, schema_key: str,
+                 cache_dir: Optional[str] = None):
+    try:
+        import pyarrow as pa
+        import pyarrow.feather as feather
+    except ImportError:
+        return
+    info = {
+        "version": _CACHE_VERSION,
+        "schema": schema_key,
+        "mtime_ns": st.st_mtime_ns,
+        "size": st.st_size,
+        "hash": hashlib.blake2b(raw, digest_size=20).hexdigest(),
+        "encoding": df.attrs["carga"]["encoding"],
+        "advertencias": df.attrs["carga"]["advertencias"],
+    }
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}),
+                                           _META_KEY: json.dumps(info).encode()})
+    target = cache_path(path, cache_dir)
+    tmp = None
+    try:
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(target), suffix=".tmp")
+        os.close(fd)
+        feather.write_feather(table, tmp, compression="uncompressed")
+        os.replace(tmp, target)
+    except OSError:  # carpeta de solo lectura: se sigue sin caché
+        if tmp is not None:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+
+
+# ------------------------------------------------------------------ #
+# 3. API                                                             #
+# ------------------------------------------------------------------ #
+
+def read_projects(
+    path: str,
+    required: Sequence[str] = REQUIRED,
+    schema: Optional[Dict[str, str]] = None,
+    cache: bool = True,
+    cache_dir: Optional[str] = None,
+) -> pd.DataFrame:
+    """Lee el CSV de proyectos (o su caché vigente en ``cache_dir``).
+
+    Lanza ``FileNotFoundError`` si no existe, ``KeyError`` si faltan
+    columnas de ``required`` y ``ValueError`` si una columna entera del
+    esquema trae texto.
+    """
+    schema = SCHEMA if schema is None else schema
+    schema_key = hashlib.blake2b(repr((sorted(schema.items()), list(required))).encode(),
+                                 digest_size=8).hexdigest()
+    st = os.stat(path)
+    if cache:
+        df = _load_cache(path, st, schema_key, cache_dir)
+        if df is not None:
+            return df
+
+    with open(path, "rb") as fh:
+        raw = fh.read()
+    df = parse_projects(raw, required, schema, source=path)
+    if cache:
+        _write_cache(path, st, raw, df, schema_key, cache_dir)
+    return df
@@ -0,0 +1,202 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+mochila_export.py  –  exportación en streaming de resultados top‑N
+
+El export original llamaba a `detalle()` una vez por combinación (copia
+del DataFrame + `isin`) y escribía cada hoja con `pd.ExcelWriter`.  Aquí:
+
+• `mochila.ProjectTable` se arma **una vez** (columnas de `detalle` como
+  arreglos e índice etiqueta → posición); el detalle de una combinación
+  es solo tomar esas filas.
+• Los escritores van fila a fila con memoria constante:
+    – `.xlsx`: openpyxl en modo *write‑only*; detalle en una hoja por
+      combinación (`layout="sheets"`, como antes) o en una sola hoja
+      larga (`layout="long"`).
+    – `.csv`: `<base>_resumen.csv` y `<base>_detalle.csv` (formato largo),
+      más `<base>_optimo.csv` si se pasa ``optimal``.
+    – `.parquet`: los mismos archivos, por lotes (requiere pyarrow), con
+      un esquema fijo armado de antemano a partir de toda la tabla (un
+      lote sin valores en una columna no cambia su tipo).
+
+Requisitos: openpyxl para .xlsx, pyarrow para .parquet.
+"""
+
+import csv
+import os
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+from mochila import ProjectTable, SolverStats, _instrument
+
+SUMMARY_COLS = ["delta_total", "costo_total", "vida_total", "ratio", "IDs"]
+_PARQUET_BATCH = 10_000
+
+
+# ------------------------------------------------------------------ #
+# 1. FILAS                                                           #
+# ------------------------------------------------------------------ #
+
+def _summary_rows(top_df: pd.DataFrame) -> Iterator[tuple]:
+    cols = [c for c in SUMMARY_COLS if c in top_df.columns]
+    for rec in top_df[cols].itertuples(index=False, name=None):
+        yield tuple(", ".join(map(str, v)) if isinstance(v, (list, tuple)) else v for v in rec)
+
+
+def _detail_rows(top_df: pd.DataFrame, table: ProjectTable) -> Iterator[Tuple[int, List[tuple]]]:
+    for i, idx in enumerate(top_df["_indices"], start=1):
+        yield i, table.rows(idx)
+
+
+def _has_rows(optimal: Optional[pd.DataFrame]) -> bool:
+    return optimal is not None and not optimal.empty
+
+
+# ------------------------------------------------------------------ #
+# 2. ESCRITORES                                                      #
+# ------------------------------------------------------------------ #
+
+def _write_excel(
+    path: str,
+    top_df: pd.DataFrame,
+    table: ProjectTable,
+    optimal: Optional[pd.DataFrame],
+    layout: str,
+    summary_sheet: str,
+):
+    from openpyxl import Workbook  # opcional: solo para .xlsx
+
+    wb = Workbook(write_only=True)
+    if _has_rows(optimal):
+        ws = wb.create_sheet("Optimal_Combination_Details")
+        ws.append(list(optimal.columns))
+        for rec in optimal.itertuples(index=False, name=None):
+            ws.append(list(rec))
+
+    if not top_df.empty:
+        ws = wb.create_sheet(summary_sheet)
+        ws.append([c for c in SUMMARY_COLS if c in top_df.columns])
+        for rec in _summary_rows(top_df):
+            ws.append(list(rec))
+
+        if layout == "long":
+            ws = wb.create_sheet("Details")
+            ws.append(["combinacion"] + table.columns)
+            for i, rows in _detail_rows(top_df, table):
+                for rec in rows:
+                    ws.append([i, *rec])
+        else:
+            for i, rows in _detail_rows(top_df, table):
+                ws = wb.create_sheet(f"Combination_{i}_Details")
+                if rows:
+                    ws.append(table.columns)
+                    for rec in rows:
+                        ws.append(list(rec))
+                else:
+                    ws.append(["message"])
+                    ws.append([f"Details for Combination {i} are empty."])
+    wb.save(path)
+
+
+def _write_csv(base: str, top_df: pd.DataFrame, table: ProjectTable,
+               optimal: Optional[pd.DataFrame]) -> List[str]:
+    summary_path, detail_path = f"{base}_resumen.csv", f"{base}_detalle.csv"
+    with open(summary_path, "w", newline="", encoding="utf-8") as fh:
+        w = csv.writer(fh, delimiter=";")
+        w.writerow([c for c in SUMMARY_COLS if c in top_df.columns])
+        w.writerows(_summary_rows(top_df))
+    with open(detail_path, "w", newline="", encoding="utf-8") as fh:
+        w = csv.writer(fh, delimiter=";")
+        w.writerow(["combinacion"] + table.columns)
+        for i, rows in _detail_rows(top_df, table):
+            w.writerows((i, *rec) for rec in rows)
+    paths = [summary_path, detail_path]
+    if _has_rows(optimal):
+        paths.append(f"{base}_optimo.csv")
+        optimal.to_csv(paths[-1], sep=";", index=False, encoding="utf-8")
+    return paths
+
+
+def _arrow_field(pa, name: str, values) -> Tuple[object, bool]:
+    """Campo de Arrow para la columna completa y si hay que pasarla a texto
+    (columnas ``object`` con tipos mezclados)."""
+    try:
+        kind = pa.array(values, from_pandas=True).type
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        return pa.field(name, pa.string()), True
+    if pa.types.is_null(kind):   # columna sin valores
+        kind = pa.string()
+    return pa.field(name, kind), False
+
+
+def _write_parquet(base: str, top_df: pd.DataFrame, table: ProjectTable,
+                   optimal: Optional[pd.DataFrame]) -> List[str]:
+    import pyarrow as pa  # opcional: solo para .parquet
+    import pyarrow.parquet as pq
+
+    def write(path: str, fields: List[Tuple[object, bool]], rows: Iterable[tuple]):
+        schema = pa.schema([field for field, _ in fields])
+        as_text = [i for i, (_, text) in enumerate(fields) if text]
+        with pq.ParquetWriter(path, schema) as writer:
+            buf = []
+            for rec in rows:
+                if as_text:
+                    rec = list(rec)
+                    for i in as_text:
+                        rec[i] = None if rec[i] is None else str(rec[i])
+                buf.append(rec)
+                if len(buf) >= _PARQUET_BATCH:
+                    writer.write_table(pa.Table.from_pylist(
+                        [dict(zip(schema.names, r)) for r in buf], schema=schema))
+                    buf = []
+            if buf:
+                writer.write_table(pa.Table.from_pylist(
+                    [dict(zip(schema.names, r)) for r in buf], schema=schema))
+
+    summary_cols = [c for c in SUMMARY_COLS if c in top_df.columns]
+    summary_fields = [(pa.field(c, pa.string() if c == "IDs" else pa.float64()), False)
+                      for c in summary_cols]
+    detail_fields = [(pa.field("combinacion", pa.int64()), False)] + [
+        _arrow_field(pa, col, values) for col, values in table.arrays().items()]
+
+    summary_path, detail_path = f"{base}_resumen.parquet", f"{base}_detalle.parquet"
+    write(summary_path, summary_fields, _summary_rows(top_df))
+    write(detail_path, detail_fields,
+          ((i, *rec) for i, rows in _detail_rows(top_df, table) for rec in rows))
+    paths = [summary_path, detail_path]
+    if _has_rows(optimal):
+        paths.append(f"{base}_optimo.parquet")
+        pq.write_table(pa.Table.from_pandas(optimal, preserve_index=False), paths[-1])
+    return paths
+
+
+def export_top_n(
+    path: str,
+    top_df: pd.DataFrame,
+    table: ProjectTable,
+    optimal: Optional[pd.DataFrame] = None,
+    layout: str = "sheets",
+    summary_sheet: str = "Top_N_Summary",
+    stats: Optional[SolverStats] = None,
+) -> List[str]:
+    """Exporta resumen + detalle según la extensión de ``path``.
+
+    Devuelve la lista de archivos escritos.  ``stats`` recibe el tiempo de
+    escritura (y el registro sale por el hook de perfilado si está activo).
+    """
+    if layout not in ("sheets", "long"):
+        raise ValueError(f"layout desconocido: {layout!r} (use 'sheets' o 'long')")
+    base, ext = os.path.splitext(path)
+    ext = ext.lower()
+    with _instrument("export_top_n", stats, format=ext, layout=layout,
+                     combinations=len(top_df)) as st:
+        with st.phase("write"):
+            if ext == ".xlsx":
+                _write_excel(path, top_df, table, optimal, layout, summary_sheet)
+                return [path]
+            if ext == ".csv":
+                return _write_csv(base, top_df, table, optimal)
+            if ext == ".parquet":
+                return _write_parquet(base, top_df, table, optimal)
+        raise ValueError(f"Formato no soportado: {ext!r} (use .xlsx, .csv o .parquet)")
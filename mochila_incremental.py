@@ -0,0 +1,266 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+mochila_incremental.py  –  re‑solución incremental del MCKP
+
+Durante una sesión los equipos editan un `proyecto` a la vez.  En vez de
+rehacer toda la DP de `mochila.mckp_max_delta`, `IncrementalMCKP`
+mantiene tablas DP de prefijo y de sufijo sobre el orden de grupos:
+
+    pre[k]  = mejor Δ por coste exacto usando los grupos [0, k)
+    suf[k]  = mejor Δ por coste exacto usando los grupos [k, G)
+
+Editar, añadir o quitar el grupo g solo invalida los prefijos
+posteriores y los sufijos anteriores a g; las tablas se recalculan bajo
+demanda y nunca se rehace lo que sigue vigente.
+
+• `solve()` (``exact=True``) es idéntico a `mckp_max_delta` (motor
+  ``"array"``) sobre `self.table`, también en empates: extiende el
+  prefijo hasta G y retrocede igual que la DP nueva.  Cuesta los grupos
+  desde la primera edición hasta el final (un solo paso si se editó o
+  añadió el último grupo, ninguno si no hubo cambios).
+• `solve(exact=False)` pivota en un grupo g con pre[g] y suf[g+1]
+  válidos: añade g al prefijo (O(variantes × budget)) y lo combina con
+  el mejor sufijo acumulado en una pasada O(budget), para una edición
+  aislada en cualquier posición.  Da el mismo coste y el mismo Δ salvo
+  redondeo (el sufijo suma en otro orden), así que entre selecciones con
+  Δ empatado puede elegir otra.  Los sufijos se arman bajo demanda.
+• `top_n()` no es incremental: es `top_n_combinations` sobre
+  `self.table` (el mismo resultado que una llamada nueva).
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional, Tuple
+
+from mochila import (
+    _best_budget_cell,
+    _mckp_dp_step,
+    _selection_frame,
+    top_n_combinations,
+)
+
+
+class IncrementalMCKP:
+    """Solver MCKP con estado; ver la documentación del módulo."""
+
+    def __init__(
+        self,
+        df: pd.DataFrame,
+        group_col: str,
+        life_col: str,
+        cost_col: str,
+        base_life: float,
+        budget: float,
+        id_col: Optional[str] = None,
+        scale: int = 100,
+    ):
+        self.group_col = group_col
+        self.life_col = life_col
+        self.cost_col = cost_col
+        self.base_life = base_life
+        self.budget = budget
+        self.id_col = id_col
+        self.scale = scale
+        self.budget_int = int(round(budget * scale))
+
+        self._names: List = []
+        self._rows: Dict = {}
+        self._costs: Dict = {}
+        self._deltas: Dict = {}
+        for name, rows in df.groupby(group_col, sort=False):
+            self._names.append(name)
+            self._set_rows(name, rows)
+
+        base = np.full(self.budget_int + 1, -np.inf)
+        base[0] = 0.0
+        self._base = base
+        n = len(self._names)
+        self._pre: List[Optional[np.ndarray]] = [base] + [None] * n
+        self._pre_ch: List[Optional[np.ndarray]] = [None] * n
+        self._suf: List[Optional[np.ndarray]] = [None] * n + [base]
+        self._suf_ch: List[Optional[np.ndarray]] = [None] * n
+        self._pre_valid = 0      # pre[0..pre_valid] vigentes
+        self._suf_valid = n      # suf[suf_valid..n] vigentes
+        self._table: Optional[pd.DataFrame] = None
+        # El prefijo completo es la DP de `mckp_max_delta`; los sufijos se
+        # arman bajo demanda en solve(exact=False)
+        self._extend_prefix(n)
+
+    # -------------------------------------------------------------- #
+    # Edición                                                        #
+    # -------------------------------------------------------------- #
+
+    def _set_rows(self, name, rows: pd.DataFrame):
+        rows = rows.copy()
+        rows[self.group_col] = name
+        self._rows[name] = rows
+        self._costs[name] = (rows[self.cost_col] * self.scale).round().astype(int).to_numpy()
+        self._deltas[name] = (rows[self.life_col] - self.base_life).to_numpy(dtype=float)
+        self._table = None
+
+    @property
+    def groups(self) -> List:
+        return list(self._names)
+
+    @property
+    def table(self) -> pd.DataFrame:
+        """Tabla actual (grupos en orden, índice 0..n‑1)."""
+        if self._table is None:
+            frames = [self._rows[name] for name in self._names]
+            self._table = (pd.concat(frames, ignore_index=True) if frames
+                           else pd.DataFrame(columns=[self.group_col, self.life_col, self.cost_col]))
+        return self._table
+
+    def update_group(self, name, rows: pd.DataFrame):
+        """Reemplaza las variantes de ``name`` (o lo añade al final)."""
+        if not len(rows):
+            self.remove_group(name)
+            return
+        if name in self._rows:
+            g = self._names.index(name)
+            self._set_rows(name, rows)
+            self._pre_valid = min(self._pre_valid, g)
+            self._suf_valid = max(self._suf_valid, g + 1)
+            return
+        g = len(self._names)
+        self._names.append(name)
+        self._set_rows(name, rows)
+        self._pre.append(None)
+        self._pre_ch.append(None)
+        self._suf.insert(g, None)
+        self._suf_ch.insert(g, None)
+        self._suf_valid = g + 1
+
+    def remove_group(self, name):
+        """Quita el grupo ``name`` (no hace nada si no existe)."""
+        if name not in self._rows:
+            return
+        g = self._names.index(name)
+        del self._names[g]
+        del self._rows[name], self._costs[name], self._deltas[name]
+        self._table = None
+        del self._pre[g + 1]
+        del self._pre_ch[g]
+        del self._suf[g]
+        del self._suf_ch[g]
+        self._pre_valid = min(self._pre_valid, g)
+        self._suf_valid = max(self._suf_valid, g + 1) - 1
+
+    # -------------------------------------------------------------- #
+    # Tablas                                                         #
+    # -------------------------------------------------------------- #
+
+    def _step(self, dp: np.ndarray, name) -> Tuple[np.ndarray, np.ndarray]:
+        costs = self._costs[name]
+        row = np.zeros(len(dp), dtype=np.min_scalar_type(len(costs)))
+        return _mckp_dp_step(dp, costs, self._deltas[name], row), row
+
+    def _extend_prefix(self, g: int):
+        while self._pre_valid < g:
+            k = self._pre_valid
+            self._pre[k + 1], self._pre_ch[k] = self._step(self._pre[k], self._names[k])
+            self._pre_valid += 1
+
+    def _extend_suffix(self, g: int):
+        while self._suf_valid > g:
+            k = self._suf_valid - 1
+            self._suf[k], self._suf_ch[k] = self._step(self._suf[k + 1], self._names[k])
+            self._suf_valid -= 1
+
+    def _pivot(self) -> int:
+        """Grupo g que minimiza el trabajo para tener pre[g] y suf[g+1]."""
+        n = len(self._names)
+        lo, hi = self._suf_valid - 1, self._pre_valid
+        if lo <= hi:
+            return min(max(lo, 0), n - 1)
+        costs = [max(0, g - hi) + max(0, lo - g) for g in range(n)]
+        return int(np.argmin(costs))
+
+    # -------------------------------------------------------------- #
+    # Consultas                                                      #
+    # -------------------------------------------------------------- #
+
+    def _backtrack(self, g: int, b: int, sel: List[Tuple[int, int]]) -> int:
+        """Añade a ``sel`` las variantes de los grupos < g que terminan en la
+        celda b del prefijo g (como ``_mckp_backtrack``)."""
+        for h in range(g - 1, -1, -1):
+            k = int(self._pre_ch[h][b])
+            if k:
+                sel.append((h, k - 1))
+                b -= int(self._costs[self._names[h]][k - 1])
+        return b
+
+    def _exact_positions(self) -> List[Tuple[int, int]]:
+        """Selección de la DP hacia delante completa (la de una resolución nueva)."""
+        n = len(self._names)
+        self._extend_prefix(n)
+        sel: List[Tuple[int, int]] = []
+        self._backtrack(n, _best_budget_cell(self._pre[n]), sel)
+        sel.sort()
+        return sel
+
+    def _pivot_positions(self) -> List[Tuple[int, int]]:
+        """Selección óptima por pivote, como pares (grupo, variante)."""
+        n = len(self._names)
+        if not n:
+            return []
+        g = self._pivot()
+        self._extend_prefix(g)
+        self._extend_suffix(g + 1)
+
+        # Prefijo con el grupo pivote incluido
+        left, left_ch = self._step(self._pre[g], self._names[g])
+        right = self._suf[g + 1]
+        # Mejor sufijo con coste ≤ x (empate → más gasto)
+        run = np.maximum.accumulate(right)
+        cell = np.maximum.accumulate(np.where(right == run, np.arange(len(right)), 0))
+
+        B = self.budget_int
+        b1 = np.arange(B + 1)
+        b2 = cell[B - b1]
+        total = left + right[b2]
+        spend = b1 + b2
+        best = total.max()
+        cand = np.flatnonzero(total == best)
+        i = int(cand[np.argmax(spend[cand])])
+        b_left, b_right = i, int(b2[i])
+
+        sel = []
+        k = int(left_ch[b_left])
+        if k:
+            sel.append((g, k - 1))
+            b_left -= int(self._costs[self._names[g]][k - 1])
+        self._backtrack(g, b_left, sel)
+        for h in range(g + 1, n):
+            k = int(self._suf_ch[h][b_right])
+            if k:
+                sel.append((h, k - 1))
+                b_right -= int(self._costs[self._names[h]][k - 1])
+        sel.sort()
+        return sel
+
+    def solve(self, exact: bool = True) -> Tuple[pd.DataFrame, float, float]:
+        """Mismo formato que ``mckp_max_delta``: (opt_df, Δ, coste).
+
+        ``exact=False`` usa el pivote (ver la documentación del módulo).
+        """
+        sel = self._exact_positions() if exact else self._pivot_positions()
+        offsets = np.cumsum([0] + [len(self._rows[name]) for name in self._names])
+        labels = [int(offsets[g] + k) for g, k in sel]
+        delta = 0.0
+        for g, k in sel:  # mismo orden de suma que la DP hacia delante
+            delta += self._deltas[self._names[g]][k]
+        table = self.table.copy()
+        table["delta_vida"] = table[self.life_col] - self.base_life
+        opt_df, total_cost = _selection_frame(table, labels, self.cost_col, self.id_col)
+        return opt_df, delta, total_cost
+
+    def top_n(self, top_n: int = 100, method: str = "kbest") -> pd.DataFrame:
+        """``top_n_combinations`` completo sobre ``table`` (sin tablas
+        incrementales); ``_indices`` se refiere a ``table``."""
+        return top_n_combinations(
+            self.table, self.group_col, self.life_col, self.cost_col,
+            self.base_life, self.budget, id_col=self.id_col, scale=self.scale,
+            top_n=top_n, method=method,
+        )
@@ -0,0 +1,229 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+mochila_lotes.py  –  corridas por lotes de escenarios (presupuestos,
+líneas base, equipos) sobre la misma cartera de proyectos.
+
+El `__main__` de `mochila.py` resuelve un solo escenario por invocación.
+Aquí se lee una tabla de escenarios (CSV o JSON), se carga `Libro1.csv`
+una vez y se reparte el trabajo en un pool de procesos:
+
+• Cada proceso recibe los arreglos numéricos ya preparados **una sola
+  vez** (en el inicializador) y arma allí su DataFrame mínimo; cada tarea
+  solo envía el diccionario del escenario.
+• Todos los resultados van a un único archivo consolidado (formato
+  largo: una fila por óptimo y por combinación del top‑N).
+
+Columnas de la tabla de escenarios (solo `presupuesto` es obligatoria):
+
+    escenario, equipo, base_life, presupuesto, top_n, scale
+
+Uso:
+    python mochila_lotes.py escenarios.csv -o resultados.csv --workers 4
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from mochila_cache import SolverCache, cached_mckp_max_delta, cached_top_n_combinations
+from mochila_carga import read_projects
+
+# Columnas de Libro1.csv (las mismas que el __main__ de mochila.py)
+LIFE_COL = "vida"
+COST_COL = "valorinversion"
+NAME_COL = "proyecto"
+ID_COL = "id_proyecto"
+
+DEFAULTS = {"base_life": 72.68, "top_n": 20, "scale": 20, "equipo": ""}
+NUMERIC_FIELDS = ("presupuesto", "base_life", "top_n", "scale")
+
+# Estado por proceso (lo llena _init_worker)
+_PROJECTS: Optional[pd.DataFrame] = None
+_CACHE: Optional[SolverCache] = None
+
+
+# ------------------------------------------------------------------ #
+# 1. ENTRADAS                                                        #
+# ------------------------------------------------------------------ #
+
+def _read_projects(path: str) -> pd.DataFrame:
+    """Lee el CSV de proyectos con ``mochila_carga`` (usa su caché)."""
+    return read_projects(path, required=(NAME_COL, LIFE_COL, COST_COL, ID_COL))
+
+
+def read_scenarios(path: str) -> List[Dict]:
+    """Tabla de escenarios desde CSV (``;`` o ``,``) o JSON (lista).
+
+    En CSV las columnas numéricas aceptan coma decimal; un valor que no
+    sea número lanza ``ValueError``.
+    """
+    if path.lower().endswith(".json"):
+        with open(path, encoding="utf-8") as fh:
+            table = pd.DataFrame(json.load(fh))
+    else:
+        # Todo como texto: los `;` de Excel traen coma decimal ("72,68")
+        table = pd.read_csv(path, sep=None, engine="python", dtype=str)
+        for col in NUMERIC_FIELDS:
+            if col in table.columns:
+                table[col] = pd.to_numeric(
+                    table[col].str.strip().str.replace(",", ".", regex=False))
+    if "presupuesto" not in table.columns:
+        raise KeyError(f"La tabla de escenarios {path} no tiene columna 'presupuesto'")
+
+    scenarios = []
+    for i, row in enumerate(table.to_dict("records")):
+        sc = {**DEFAULTS, **{k: v for k, v in row.items() if pd.notna(v)}}
+        sc.setdefault("escenario", f"escenario_{i + 1}")
+        sc["presupuesto"] = float(sc["presupuesto"])
+        sc["base_life"] = float(sc["base_life"])
+        sc["top_n"] = int(sc["top_n"])
+        sc["scale"] = int(sc["scale"])
+        scenarios.append(sc)
+    return scenarios
+
+
+def prepare_arrays(df: pd.DataFrame) -> Dict[str, np.ndarray]:
+    """Arreglos compactos que necesitan los solvers (se envían una vez)."""
+    return {
+        NAME_COL: df[NAME_COL].to_numpy(),
+        LIFE_COL: df[LIFE_COL].to_numpy(dtype=float),
+        COST_COL: df[COST_COL].to_numpy(dtype=float),
+        ID_COL: df[ID_COL].to_numpy(),
+    }
+
+
+# ------------------------------------------------------------------ #
+# 2. TRABAJADORES                                                    #
+# ------------------------------------------------------------------ #
+
+def _init_worker(arrays: Dict[str, np.ndarray], cache_dir: Optional[str] = None):
+    global _PROJECTS, _CACHE
+    _PROJECTS = pd.DataFrame(arrays)
+    _CACHE = SolverCache(directory=cache_dir)
+
+
+def run_scenario(sc: Dict) -> List[Dict]:
+    """Óptimo + top‑N de un escenario, como filas planas."""
+    common = dict(
+        group_col=NAME_COL, life_col=LIFE_COL, cost_col=COST_COL,
+        base_life=sc["base_life"], budget=sc["presupuesto"],
+        id_col=ID_COL, scale=sc["scale"],
+    )
+    key = {k: sc[k] for k in ("escenario", "equipo", "base_life", "presupuesto", "top_n", "scale")}
+
+    opt_df, delta_opt, costo_opt = cached_mckp_max_delta(_PROJECTS, cache=_CACHE, **common)
+    rows = [{
+        **key, "tipo": "optimo", "rank": 0,
+        "delta_total": float(delta_opt), "costo_total": float(costo_opt),
+        "vida_total": float(opt_df[LIFE_COL].sum()),
+        "ratio": float(delta_opt / costo_opt) if costo_opt else 0.0,
+        "IDs": ", ".join(map(str, opt_df[ID_COL].tolist())),
+    }]
+
+    top_df = cached_top_n_combinations(_PROJECTS, top_n=sc["top_n"], cache=_CACHE, **common)
+    for rank, rec in enumerate(top_df.to_dict("records"), start=1):
+        rows.append({
+            **key, "tipo": "top", "rank": rank,
+            "delta_total": rec["delta_total"], "costo_total": rec["costo_total"],
+            "vida_total": rec["vida_total"], "ratio": rec["ratio"],
+            "IDs": ", ".join(map(str, rec["IDs"])),
+        })
+    return rows
+
+
+# ------------------------------------------------------------------ #
+# 3. LOTE                                                            #
+# ------------------------------------------------------------------ #
+
+def run_batch(
+    projects: pd.DataFrame,
+    scenarios: List[Dict],
+    workers: Optional[int] = None,
+    progress: bool = True,
+    cache_dir: Optional[str] = None,
+) -> pd.DataFrame:
+    """Ejecuta todos los escenarios y devuelve la tabla consolidada.
+
+    Con ``cache_dir`` los procesos comparten la caché en disco de
+    ``mochila_cache`` (escenarios repetidos no se resuelven dos veces).
+    """
+    arrays = prepare_arrays(projects)
+    workers = workers or os.cpu_count() or 1
+    results: Dict[int, List[Dict]] = {}
+    start = time.perf_counter()
+
+    def report(done: int, sc: Dict):
+        if progress:
+            print(f"[{done}/{len(scenarios)}] {sc['escenario']} "
+                  f"({time.perf_counter() - start:.1f}s)", file=sys.stderr)
+
+    if workers == 1:
+        _init_worker(arrays, cache_dir)
+        for i, sc in enumerate(scenarios):
+            results[i] = run_scenario(sc)
+            report(i + 1, sc)
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(arrays, cache_dir)) as pool:
+            futures = {pool.submit(run_scenario, sc): i for i, sc in enumerate(scenarios)}
+            for done, fut in enumerate(as_completed(futures), start=1):
+                i = futures[fut]
+                results[i] = fut.result()
+                report(done, scenarios[i])
+
+    rows = [row for i in range(len(scenarios)) for row in results[i]]
+    return pd.DataFrame(rows)
+
+
+def write_output(table: pd.DataFrame, path: str):
+    """Escribe la tabla consolidada según la extensión (.csv/.json/.xlsx/.parquet)."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".json":
+        table.to_json(path, orient="records", force_ascii=False, indent=2)
+    elif ext == ".xlsx":
+        table.to_excel(path, sheet_name="Resultados", index=False)
+    elif ext == ".parquet":
+        table.to_parquet(path, index=False)
+    else:
+        table.to_csv(path, index=False, sep=";", decimal=",")
+
+
+# ------------------------------------------------------------------ #
+# 4. MAIN                                                            #
+# ------------------------------------------------------------------ #
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Corre escenarios de mochila.py en lote.")
+    parser.add_argument("escenarios", help="Tabla de escenarios (CSV o JSON)")
+    parser.add_argument("-o", "--salida", default="resultados_lote.csv",
+                        help="Archivo consolidado (.csv, .json, .xlsx o .parquet)")
+    parser.add_argument("--proyectos", default="Libro1.csv", help="CSV de proyectos")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Procesos (por defecto, uno por núcleo)")
+    parser.add_argument("--cache", default=None,
+                        help="Directorio de caché de resultados (opcional)")
+    args = parser.parse_args()
+
+    try:
+        proyectos_df = _read_projects(args.proyectos)
+        escenarios = read_scenarios(args.escenarios)
+    except (OSError, KeyError, ValueError) as e:
+        print(f"Error: {e}")
+        exit(1)
+
+    print(f"{len(escenarios)} escenarios sobre {len(proyectos_df)} proyectos")
+    tabla = run_batch(proyectos_df, escenarios, workers=args.workers, cache_dir=args.cache)
+    try:
+        write_output(tabla, args.salida)
+    except ImportError as e:
+        print(f"Error: falta una librería para escribir {args.salida}: {e}")
+        exit(1)
+    print(f"Resultados consolidados en: {args.salida}")
@@ -0,0 +1,211 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+mochila_pareto.py  –  carteras Pareto‑óptimas por dimensión
+
+Los solvers de `mochila.py` resumen todo en `delta_vida`, que en la GP
+(`SimuladorGP.script_tool`) sale de pesos fijos:
+
+    INDICE = 0.45·Seguridad + 0.30·Gobernabilidad + 0.25·Desarrollo
+    VIDA   = 62 + (84 − 62)·INDICE / 100
+
+Aquí se calcula, con la misma regla MCKP (0 o 1 variante por grupo y
+coste ≤ presupuesto), el frente Pareto de carteras sobre las tres deltas
+por dimensión y el coste.  Para cualquier vector de pesos no negativo la
+mejor cartera está en ese frente, así que `ParetoFront.best()` reordena
+sin volver a resolver.
+
+Uso:
+    frente = pareto_portfolios(df, "proyecto", "valorinversion", 10_000,
+                               id_col="id_proyecto")
+    frente.best({"delta_seg": 0.6, "delta_gob": 0.2, "delta_des": 0.2})
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from mochila import _group_positions
+
+# Columnas de Libro1.csv y pesos de la GP
+DIM_COLS = ("delta_seg", "delta_gob", "delta_des")
+GP_WEIGHTS = {"delta_seg": 0.45, "delta_gob": 0.30, "delta_des": 0.25}
+
+_BLOCK = 512
+
+
+# ------------------------------------------------------------------ #
+# 1. FILTRO NO DOMINADO (vectorizado)                                #
+# ------------------------------------------------------------------ #
+
+def non_dominated(cost: np.ndarray, vals: np.ndarray, eps: float = 0.0) -> np.ndarray:
+    """Máscara de puntos no dominados (coste mínimo, ``vals`` máximos).
+
+    Se ordena por coste ascendente y suma de ``vals`` descendente: un
+    punto solo puede ser dominado por otro anterior en ese orden.  Se
+    procesa por bloques comparando contra los ya conservados y contra los
+    anteriores del propio bloque (por transitividad basta con eso).  Los
+    duplicados exactos conservan el primero; el orden de entrada decide
+    los empates.  Con ``eps`` > 0 basta con quedar a menos de ``eps`` en
+    cada dimensión para ser dominado (ε‑dominancia).
+    """
+    n = len(cost)
+    order = np.lexsort((-vals.sum(axis=1), cost))
+    keep = np.zeros(n, dtype=bool)
+    kept_c = np.empty(0)
+    kept_v = np.empty((0, vals.shape[1]))
+    earlier = np.tri(_BLOCK, k=-1, dtype=bool)  # earlier[j, i]: i < j
+
+    for start in range(0, n, _BLOCK):
+        idx = order[start:start + _BLOCK]
+        bc, bv = cost[idx], vals[idx]
+        # ¿algún conservado domina (débilmente) a cada punto del bloque?
+        dom = ((kept_c[None, :] <= bc[:, None])
+               & (kept_v[None, :, :] >= bv[:, None, :] - eps).all(axis=2)).any(axis=1)
+        # ¿algún anterior del bloque lo domina?
+        m = len(idx)
+        inner = ((bc[None, :] <= bc[:, None])
+                 & (bv[None, :, :] >= bv[:, None, :] - eps).all(axis=2)
+                 & earlier[:m, :m]).any(axis=1)
+        ok = ~(dom | inner)
+        keep[idx[ok]] = True
+        kept_c = np.concatenate((kept_c, bc[ok]))
+        kept_v = np.concatenate((kept_v, bv[ok]))
+    return keep
+
+
+# ------------------------------------------------------------------ #
+# 2. FRENTE PARETO DE CARTERAS                                       #
+# ------------------------------------------------------------------ #
+
+class ParetoFront:
+    """Carteras no dominadas en (coste, Δ por dimensión).
+
+    ``frame`` tiene una fila por cartera: ``costo_total``, una columna por
+    dimensión, ``IDs`` e ``_indices`` (etiquetas del DataFrame original).
+    """
+
+    def __init__(self, frame: pd.DataFrame, dim_cols: Sequence[str]):
+        self.frame = frame
+        self.dim_cols = list(dim_cols)
+        self._vals = frame[self.dim_cols].to_numpy(dtype=float)
+        self._cost = frame["costo_total"].to_numpy(dtype=float)
+
+    def __len__(self) -> int:
+        return len(self.frame)
+
+    def _weights(self, weights: Union[Dict[str, float], Sequence[float]]) -> np.ndarray:
+        if isinstance(weights, dict):
+            w = np.array([weights.get(col, 0.0) for col in self.dim_cols], dtype=float)
+        else:
+            w = np.asarray(weights, dtype=float)
+            if w.shape != (len(self.dim_cols),):
+                raise ValueError(f"se esperaban {len(self.dim_cols)} pesos, no {w.shape}")
+        if (w < 0).any():
+            raise ValueError("los pesos deben ser no negativos")
+        return w
+
+    def scores(self, weights) -> np.ndarray:
+        """Puntaje ponderado de cada cartera del frente."""
+        return self._vals @ self._weights(weights)
+
+    def rank(self, weights=GP_WEIGHTS, top: Optional[int] = None) -> pd.DataFrame:
+        """Frente ordenado por puntaje (a igualdad, más gasto)."""
+        score = self.scores(weights)
+        order = np.lexsort((-self._cost, -score))
+        out = self.frame.iloc[order[:top] if top else order].copy()
+        out.insert(0, "puntaje", score[out.index])
+        return out.reset_index(drop=True)
+
+    def best(self, weights=GP_WEIGHTS) -> pd.Series:
+        """Mejor cartera para ``weights`` sin volver a resolver."""
+        return self.rank(weights, top=1).iloc[0]
+
+
+def pareto_portfolios(
+    df: pd.DataFrame,
+    group_col: str,
+    cost_col: str,
+    budget: float,
+    dim_cols: Sequence[str] = DIM_COLS,
+    id_col: Optional[str] = None,
+    max_states: Optional[int] = None,
+    eps: float = 0.0,
+) -> ParetoFront:
+    """Frente Pareto de carteras MCKP sobre ``dim_cols`` y el coste.
+
+    Los estados (coste, deltas) se extienden grupo a grupo (omitir o una
+    variante) y tras cada grupo se filtran con ``non_dominated``; así solo
+    sobreviven prefijos que pueden acabar en el frente.  Los costes son
+    reales (sin ``scale``).
+
+    El frente exacto crece rápido con muchos grupos; ``eps`` > 0 usa
+    ε‑dominancia en cada paso, lo que acota el número de estados y deja
+    cada cartera Pareto a menos de ``eps`` × nº de grupos (por dimensión)
+    de alguna del frente devuelto.  ``max_states`` aborta con
+    ``ValueError`` si el frente intermedio crece más de lo aceptable.
+    """
+    dim_cols = list(dim_cols)
+    missing = [col for col in [group_col, cost_col, *dim_cols] if col not in df.columns]
+    if missing:
+        raise KeyError(f"Faltan columnas: {', '.join(missing)}")
+
+    groups = _group_positions(df, group_col)
+    costs = df[cost_col].to_numpy(dtype=float)
+    vals = df[dim_cols].to_numpy(dtype=float)
+    limit = budget + 1e-9 * max(1.0, abs(budget))
+
+    state_c = np.zeros(1)
+    state_v = np.zeros((1, len(dim_cols)))
+    steps: List[Tuple[np.ndarray, np.ndarray]] = []
+
+    for pos in groups:
+        cand_c, cand_v = [state_c], [state_v]
+        cand_parent, cand_item = [np.arange(len(state_c))], [np.full(len(state_c), -1)]
+        for p in pos:
+            c = state_c + costs[p]
+            ok = c <= limit
+            if not ok.any():
+                continue
+            cand_c.append(c[ok])
+            cand_v.append(state_v[ok] + vals[p])
+            cand_parent.append(np.flatnonzero(ok))
+            cand_item.append(np.full(int(ok.sum()), int(p)))
+        c, v = np.concatenate(cand_c), np.concatenate(cand_v)
+        parent, item = np.concatenate(cand_parent), np.concatenate(cand_item)
+
+        keep = non_dominated(c, v, eps)
+        state_c, state_v = c[keep], v[keep]
+        steps.append((parent[keep], item[keep]))
+        if max_states is not None and len(state_c) > max_states:
+            raise ValueError(
+                f"El frente intermedio tiene {len(state_c)} estados (> {max_states}); "
+                "reduzca el problema o aumente max_states."
+            )
+
+    # Reconstrucción de todas las carteras del frente (sin la vacía)
+    n = len(state_c)
+    cur = np.arange(n)
+    selections: List[List[int]] = [[] for _ in range(n)]
+    for parent, item in reversed(steps):
+        chosen = item[cur]
+        for k in np.flatnonzero(chosen >= 0):
+            selections[k].append(int(chosen[k]))
+        cur = parent[cur]
+
+    labels = df.index.to_numpy()
+    ids = df[id_col].to_numpy() if id_col and id_col in df.columns else labels
+    rows = []
+    for k, sel in enumerate(selections):
+        if not sel:
+            continue
+        sel.reverse()
+        row = {"costo_total": float(state_c[k])}
+        row.update({col: float(state_v[k, j]) for j, col in enumerate(dim_cols)})
+        row["IDs"] = ids[sel].tolist()
+        row["_indices"] = tuple(sorted(labels[sel].tolist()))
+        rows.append(row)
+
+    frame = pd.DataFrame(rows, columns=["costo_total", *dim_cols, "IDs", "_indices"])
+    frame.sort_values("costo_total", inplace=True, kind="stable")
+    return ParetoFront(frame.reset_index(drop=True), dim_cols)
@@ -0,0 +1,289 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+mochila_restricciones.py  –  selección MCKP con restricciones adicionales
+
+`mckp_max_delta` solo conoce una dimensión de coste.  Aquí, con la misma
+regla (0 o 1 variante por grupo, coste ≤ presupuesto), el mismo
+desempate (máximo Δ vida, luego más gasto, luego la primera opción) y el
+mismo formato de salida, se añaden:
+
+• mínimos de cobertura: ``minimums={"delta_seg": 0.3}`` → la suma de la
+  columna en la selección debe ser ≥ 0.3;
+• topes de cantidad: ``count_caps={"ubicacion": {"Deficiente": 2}}`` →
+  a lo sumo 2 variantes con ``ubicacion == "Deficiente"``;
+• topes de gasto: ``spend_caps={"municipio": {"Quibdó": 3000}}`` → el
+  coste de lo elegido en Quibdó no supera 3000.
+
+No hay arreglo denso multidimensional: como en ``engine="sparse"`` se
+extienden estados (Δ, coste, recursos usados, cobertura) grupo a grupo y
+tras cada grupo se podan
+
+• los que ya exceden un tope o no pueden alcanzar un mínimo ni sumando
+  lo mejor de los grupos restantes;
+• los que no pueden superar a la mejor selección factible conocida (un
+  greedy inicial o estados que ya cumplen todo) ni con la cota LP de los
+  grupos restantes (solo presupuesto, como en el B&B del top‑N); se poda
+  con desigualdad estricta, sin tocar empates;
+• los dominados: otro estado con Δ mayor (o igual Δ y mismo coste), coste
+  y recursos ≤ y cobertura ≥.  La cobertura se satura en el umbral a
+  partir del cual cualquier continuación cumple el mínimo, así que los
+  estados que ya lo aseguran no se distinguen por ella.
+
+Los costes son reales (sin ``scale``); recursos y topes suponen consumos
+≥ 0.  Sin restricciones el resultado es el de ``engine="sparse"``.
+
+Uso:
+    opt_df, delta, costo = mckp_constrained(
+        df, "proyecto", "vida", "valorinversion", 72.68, 10_000,
+        id_col="id_proyecto", minimums={"delta_seg": 0.3},
+        count_caps={"ubicacion": {"Deficiente": 1}})
+    opt_df.attrs["restricciones"]   # totales logrados por restricción
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, List, Optional, Tuple
+
+from mochila import (SolverStats, _LPBound, _group_hull, _group_positions, _instrument,
+                     _selection_frame)
+
+_BLOCK = 512
+
+
+# ------------------------------------------------------------------ #
+# 1. DOMINANCIA                                                      #
+# ------------------------------------------------------------------ #
+
+def dominance_filter(
+    delta: np.ndarray,
+    cost: np.ndarray,
+    used: np.ndarray,
+    cover: np.ndarray,
+) -> np.ndarray:
+    """Máscara de estados no dominados.
+
+    A domina a B si ``used`` y ``cost`` de A son ≤, ``cover`` ≥ y además
+    Δ_A > Δ_B, o Δ_A = Δ_B con el mismo coste (a igualdad de Δ el
+    desempate prefiere gastar más, así que uno más caro no se poda).
+
+    Se ordena por Δ descendente y coste ascendente (estable): un estado
+    solo puede ser dominado por otro anterior, y como la relación es
+    transitiva basta comparar contra los conservados.  Empates exactos
+    conservan el primero en el orden de entrada.
+    """
+    n = len(delta)
+    order = np.lexsort((cost, -delta))
+    keep = np.zeros(n, dtype=bool)
+    k_d, k_c = np.empty(0), np.empty(0)
+    k_u, k_v = np.empty((0, used.shape[1])), np.empty((0, cover.shape[1]))
+    earlier = np.tri(_BLOCK, k=-1, dtype=bool)  # earlier[j, i]: i < j
+
+    def dominated_by(bd, bc, bu, bv, ad, ac, au, av):
+        # [j, i]: el candidato i (A) domina al estado j (B) del bloque
+        return ((ac[None, :] <= bc[:, None])
+                & ((ad[None, :] > bd[:, None]) | ((ad[None, :] == bd[:, None]) & (ac[None, :] == bc[:, None])))
+                & (au[None, :, :] <= bu[:, None, :]).all(axis=2)
+                & (av[None, :, :] >= bv[:, None, :]).all(axis=2))
+
+    for start in range(0, n, _BLOCK):
+        idx = order[start:start + _BLOCK]
+        bd, bc, bu, bv = delta[idx], cost[idx], used[idx], cover[idx]
+        m = len(idx)
+        dom = dominated_by(bd, bc, bu, bv, k_d, k_c, k_u, k_v).any(axis=1)
+        inner = (dominated_by(bd, bc, bu, bv, bd, bc, bu, bv) & earlier[:m, :m]).any(axis=1)
+        ok = ~(dom | inner)
+        keep[idx[ok]] = True
+        k_d, k_c = np.concatenate((k_d, bd[ok])), np.concatenate((k_c, bc[ok]))
+        k_u, k_v = np.concatenate((k_u, bu[ok])), np.concatenate((k_v, bv[ok]))
+    return keep
+
+
+# ------------------------------------------------------------------ #
+# 2. RESTRICCIONES                                                   #
+# ------------------------------------------------------------------ #
+
+def _resources(
+    df: pd.DataFrame,
+    costs: np.ndarray,
+    count_caps: Dict[str, Dict[Any, int]],
+    spend_caps: Dict[str, Dict[Any, float]],
+) -> Tuple[np.ndarray, np.ndarray, List[Tuple[str, str, Any]]]:
+    """Consumo por variante (n × r), topes (r) y etiqueta de cada recurso."""
+    cols, caps, labels = [], [], []
+    for kind, spec, weight in (("conteo", count_caps, np.ones_like(costs)), ("gasto", spend_caps, costs)):
+        for col, limits in spec.items():
+            if col not in df.columns:
+                raise KeyError(f"Falta la columna '{col}' de las restricciones")
+            values = df[col].to_numpy()
+            for value, cap in limits.items():
+                cols.append(np.where(values == value, weight, 0.0))
+                caps.append(float(cap))
+                labels.append((kind, col, value))
+    used = np.column_stack(cols) if cols else np.zeros((len(costs), 0))
+    return used, np.array(caps, dtype=float), labels
+
+
+def _group_extremes(groups: List[np.ndarray], vals: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Por grupo y columna: mayor ganancia y mayor pérdida posibles (omitir = 0)."""
+    shape = (len(groups), vals.shape[1])
+    gain = np.array([np.maximum(vals[pos].max(axis=0), 0.0) for pos in groups]).reshape(shape)
+    loss = np.array([np.minimum(vals[pos].min(axis=0), 0.0) for pos in groups]).reshape(shape)
+    return gain, loss
+
+
+def _greedy_incumbent(
+    groups: List[np.ndarray],
+    costs: np.ndarray,
+    delta_vals: np.ndarray,
+    usage: np.ndarray,
+    cap_limit: np.ndarray,
+    limit: float,
+    cover_vals: np.ndarray,
+    req_limit: np.ndarray,
+) -> float:
+    """Δ de una selección factible greedy (mejor Δ/coste primero), o −inf."""
+    group_of = np.empty(len(costs), dtype=int)
+    for g, pos in enumerate(groups):
+        group_of[pos] = g
+    cand = np.flatnonzero((delta_vals > 0) & (costs >= 0))
+    eff = np.where(costs[cand] > 0, delta_vals[cand] / np.maximum(costs[cand], 1e-300), np.inf)
+    used_groups, spent, used = set(), 0.0, np.zeros(usage.shape[1])
+    sel = []
+    for p in cand[np.argsort(-eff, kind="stable")]:
+        g = group_of[p]
+        if g in used_groups or spent + costs[p] > limit or (used + usage[p] > cap_limit).any():
+            continue
+        used_groups.add(g)
+        spent += costs[p]
+        used += usage[p]
+        sel.append(p)
+    if (cover_vals[sel].sum(axis=0) < req_limit).any():
+        return -np.inf
+    return float(delta_vals[sel].sum())
+
+
+# ------------------------------------------------------------------ #
+# 3. SOLVER                                                          #
+# ------------------------------------------------------------------ #
+
+def mckp_constrained(
+    df: pd.DataFrame,
+    group_col: str,
+    life_col: str,
+    cost_col: str,
+    base_life: float,
+    budget: float,
+    id_col: Optional[str] = None,
+    minimums: Optional[Dict[str, float]] = None,
+    count_caps: Optional[Dict[str, Dict[Any, int]]] = None,
+    spend_caps: Optional[Dict[str, Dict[Any, float]]] = None,
+    max_states: Optional[int] = None,
+    stats: Optional[SolverStats] = None,
+) -> Tuple[pd.DataFrame, float, float]:
+    """MCKP con mínimos por columna y topes por categoría.
+
+    Devuelve lo mismo que ``mckp_max_delta`` (filas elegidas ordenadas por
+    Δ vida, Δ total y coste total); los totales de cada restricción van en
+    ``opt_df.attrs["restricciones"]``.  Lanza ``ValueError`` si ninguna
+    selección cumple los mínimos o si los estados intermedios superan
+    ``max_states``.
+    """
+    minimums, count_caps, spend_caps = minimums or {}, count_caps or {}, spend_caps or {}
+    with _instrument("mckp_constrained", stats, budget=budget, variants=len(df),
+                     minimums=len(minimums), caps=sum(map(len, count_caps.values()))
+                     + sum(map(len, spend_caps.values()))) as st:
+        with st.phase("prepare"):
+            df = df.copy()
+            df["delta_vida"] = df[life_col] - base_life
+            missing = [col for col in minimums if col not in df.columns]
+            if missing:
+                raise KeyError(f"Faltan columnas de los mínimos: {', '.join(missing)}")
+            groups = _group_positions(df, group_col)
+            costs = df[cost_col].to_numpy(dtype=float)
+            delta_vals = df["delta_vida"].to_numpy(dtype=float)
+            usage, caps, labels = _resources(df, costs, count_caps, spend_caps)
+            cover_vals = df[list(minimums)].to_numpy(dtype=float).reshape(len(df), -1)
+            required = np.array(list(minimums.values()), dtype=float)
+            tol = 1e-9 * np.maximum(1.0, np.abs(np.concatenate(([budget], caps, required))))
+            limit, cap_limit, req_limit = budget + tol[0], caps + tol[1:1 + len(caps)], required - tol[1 + len(caps):]
+
+            # Sufijos por grupo: lo máximo que aún se puede ganar y perder
+            gain, loss = _group_extremes(groups, cover_vals)
+            gain_after = np.vstack((np.cumsum(gain[::-1], axis=0)[::-1], np.zeros((1, len(required)))))
+            loss_after = np.vstack((np.cumsum(loss[::-1], axis=0)[::-1], np.zeros((1, len(required)))))
+            bound = _LPBound([
+                _group_hull(costs[pos[(costs[pos] >= 0) & (costs[pos] <= limit)]],
+                            delta_vals[pos[(costs[pos] >= 0) & (costs[pos] <= limit)]])
+                for pos in groups
+            ])
+
+        with st.phase("dp"):
+            s_d, s_c = np.zeros(1), np.zeros(1)
+            s_u, s_v = np.zeros((1, len(caps))), np.zeros((1, len(required)))
+            steps: List[Tuple[np.ndarray, np.ndarray]] = []
+            # Mejor Δ factible conocido: greedy inicial y estados que ya cumplen
+            incumbent = _greedy_incumbent(groups, costs, delta_vals, usage, cap_limit, limit,
+                                          cover_vals, req_limit)
+            if (req_limit <= 0).all():
+                incumbent = max(incumbent, 0.0)
+            for g, pos in enumerate(groups):
+                cand = [(s_d, s_c, s_u, s_v, np.arange(len(s_d)), np.full(len(s_d), -1))]
+                for p in pos:
+                    c, u = s_c + costs[p], s_u + usage[p]
+                    ok = (c <= limit) & (u <= cap_limit).all(axis=1)
+                    if ok.any():
+                        cand.append((s_d[ok] + delta_vals[p], c[ok], u[ok], s_v[ok] + cover_vals[p],
+                                     np.flatnonzero(ok), np.full(int(ok.sum()), int(p))))
+                d, c, u, v, parent, item = (np.concatenate(x) for x in zip(*cand))
+                st.count("states_generated", len(d))
+
+                # Mínimos inalcanzables o sin opción de superar a la mejor factible
+                reachable = (v + gain_after[g + 1] >= req_limit).all(axis=1)
+                st.count("states_unreachable", int((~reachable).sum()))
+                done = reachable & (v >= req_limit).all(axis=1)  # omitir el resto es factible
+                if done.any():
+                    incumbent = max(incumbent, float(d[done].max()))
+                promising = d + bound.many(g + 1, limit - c) >= incumbent - 1e-9 * max(1.0, abs(incumbent))
+                st.count("states_bounded", int((reachable & ~promising).sum()))
+                alive = reachable & promising
+                d, c, u, v, parent, item = d[alive], c[alive], u[alive], v[alive], parent[alive], item[alive]
+                v_key = np.minimum(v, required - loss_after[g + 1])
+
+                keep = dominance_filter(d, c, u, v_key)
+                s_d, s_c, s_u, s_v = d[keep], c[keep], u[keep], v[keep]
+                steps.append((parent[keep], item[keep]))
+                st.count("states_kept", len(s_d))
+                if max_states is not None and len(s_d) > max_states:
+                    raise ValueError(
+                        f"Hay {len(s_d)} estados intermedios (> {max_states}); "
+                        "relaje las restricciones o aumente max_states."
+                    )
+
+        with st.phase("backtrack"):
+            feasible = np.flatnonzero((s_v >= req_limit).all(axis=1))
+            if not len(feasible):
+                raise ValueError("Ninguna selección cumple los mínimos con este presupuesto y topes")
+            # Máximo Δ; a igualdad, más gasto; luego el primero
+            order = np.lexsort((-s_c[feasible], -s_d[feasible]))
+            best = int(feasible[order[0]])
+            best_delta = float(s_d[best])
+            sel = []
+            for parent, item in reversed(steps):
+                if item[best] >= 0:
+                    sel.append(int(item[best]))
+                best = int(parent[best])
+            sel.reverse()
+
+        with st.phase("frame"):
+            opt_df, total_cost = _selection_frame(df, df.index[sel].tolist(), cost_col, id_col)
+            achieved_u = usage[sel].sum(axis=0) if sel else np.zeros(len(caps))
+            achieved_v = cover_vals[sel].sum(axis=0) if sel else np.zeros(len(required))
+            opt_df.attrs["restricciones"] = {
+                "minimos": {col: {"requerido": float(req), "logrado": float(val)}
+                            for col, req, val in zip(minimums, required, achieved_v)},
+                "topes": [{"tipo": kind, "columna": col, "valor": value,
+                           "tope": float(cap), "usado": float(val)}
+                          for (kind, col, value), cap, val in zip(labels, caps, achieved_u)],
+            }
+    return opt_df, best_delta, total_cost
@@ -0,0 +1,231 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+mochila_robustez.py  –  robustez Monte Carlo de las carteras top‑N
+
+Los `vida` / `delta_vida` de `Libro1.csv` son estimaciones puntuales de
+la simulación raster (`SimuladorGP.script_tool`).  Aquí se sortean S
+escenarios de Δ vida por proyecto y se evalúan **todas** las carteras
+contra **todos** los escenarios de una vez:
+
+    puntajes (S × N) = muestras (S × m) @ incidencia (m × N)
+
+con m = proyectos que aparecen en alguna cartera.  Las carteras se
+procesan por bloques (`block`), así la memoria es O(S · block) y nunca
+hay bucles de Python por muestra.
+
+Ruido (por proyecto, con desviación ``rel_sd · |Δ|`` o la columna
+``sd_col``, y como mínimo ``abs_sd``):
+• ``dist="normal"``    – Δ + sd · z
+• ``dist="lognormal"`` – Δ · exp(σ z − σ²/2), misma media y sd relativa
+  (no cambia el signo de Δ)
+• ``sampler(rng, S, m)`` – ruido z propio (S × m).
+El z estándar se arma con un modelo de factores: ``common_corr`` comparte
+un factor entre todos los proyectos (error común del modelo raster) y
+``group_corr`` uno por ``group_col`` (variantes del mismo proyecto).
+
+Resultado: el top‑N con ``delta_media``, ``delta_sd``, ``delta_p<q>`` y
+``prob_mejor`` (fracción de escenarios en que la cartera es la mejor del
+conjunto; los empates se los lleva la de mejor rango nominal).
+
+Uso:
+    top = top_n_combinations(df, ..., top_n=1000)
+    rob = robustness(top, df, "vida", 72.68, n_samples=10_000, rel_sd=0.15,
+                     group_col="proyecto", group_corr=0.5, seed=1)
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Callable, Optional, Sequence
+
+from mochila import SolverStats, _instrument, top_n_combinations
+
+
+# ------------------------------------------------------------------ #
+# 1. MUESTRAS                                                        #
+# ------------------------------------------------------------------ #
+
+def _factor_noise(
+    rng: np.random.Generator,
+    n_samples: int,
+    codes: Optional[np.ndarray],
+    common_corr: float,
+    group_corr: float,
+    dtype,
+) -> np.ndarray:
+    """z estándar (S × m) con correlación ``common_corr`` entre todos y
+    ``common_corr + group_corr`` dentro de un mismo grupo."""
+    m = len(codes) if codes is not None else 0
+    idio = 1.0 - common_corr - group_corr
+    if min(common_corr, group_corr, idio) < 0:
+        raise ValueError("common_corr y group_corr deben ser ≥ 0 y sumar ≤ 1")
+    z = rng.standard_normal((n_samples, m), dtype=dtype)
+    z *= np.sqrt(idio)
+    if common_corr:
+        z += np.sqrt(common_corr) * rng.standard_normal((n_samples, 1), dtype=dtype)
+    if group_corr:
+        n_groups = int(codes.max()) + 1 if m else 0
+        z += np.sqrt(group_corr) * rng.standard_normal((n_samples, n_groups), dtype=dtype)[:, codes]
+    return z
+
+
+def sample_deltas(
+    delta: np.ndarray,
+    n_samples: int,
+    dist: str = "normal",
+    rel_sd: float = 0.1,
+    abs_sd: float = 0.0,
+    sd: Optional[np.ndarray] = None,
+    codes: Optional[np.ndarray] = None,
+    common_corr: float = 0.0,
+    group_corr: float = 0.0,
+    sampler: Optional[Callable[[np.random.Generator, int, int], np.ndarray]] = None,
+    seed: Optional[int] = None,
+    dtype=np.float32,
+) -> np.ndarray:
+    """Escenarios de Δ vida (S × m) alrededor de ``delta``.
+
+    ``sd`` (absoluta por proyecto) reemplaza a ``rel_sd · |Δ|``; ``codes``
+    (grupo de cada proyecto) solo hace falta con ``group_corr``.
+    """
+    delta = np.asarray(delta, dtype=dtype)
+    rng = np.random.default_rng(seed)
+    if codes is None:
+        codes = np.arange(len(delta))
+    if sampler is not None:
+        z = np.asarray(sampler(rng, n_samples, len(delta)), dtype=dtype)
+        if z.shape != (n_samples, len(delta)):
+            raise ValueError(f"sampler devolvió {z.shape}, se esperaba {(n_samples, len(delta))}")
+    else:
+        z = _factor_noise(rng, n_samples, codes, common_corr, group_corr, dtype)
+
+    if dist == "normal":
+        scale = np.abs(delta) * rel_sd if sd is None else np.asarray(sd, dtype=dtype)
+        scale = np.maximum(scale, abs_sd).astype(dtype)
+        z *= scale
+        z += delta
+        return z
+    if dist == "lognormal":
+        rel = np.full(len(delta), rel_sd) if sd is None else np.asarray(sd) / np.maximum(np.abs(delta), 1e-12)
+        sigma = np.sqrt(np.log1p(rel ** 2)).astype(dtype)
+        z *= sigma
+        z -= sigma ** 2 / 2
+        np.exp(z, out=z)
+        z *= delta
+        return z
+    raise ValueError(f"dist desconocida: {dist!r} (use 'normal' o 'lognormal')")
+
+
+# ------------------------------------------------------------------ #
+# 2. EVALUACIÓN                                                      #
+# ------------------------------------------------------------------ #
+
+def incidence(portfolios: Sequence[Sequence], labels: Sequence, dtype=np.float32) -> np.ndarray:
+    """Matriz m × N: 1 si el proyecto ``labels[i]`` está en la cartera j."""
+    pos = {label: i for i, label in enumerate(labels)}
+    rows = [pos[p] for sel in portfolios for p in sel]
+    cols = np.repeat(np.arange(len(portfolios)), [len(sel) for sel in portfolios])
+    inc = np.zeros((len(labels), len(portfolios)), dtype=dtype)
+    inc[rows, cols] = 1
+    return inc
+
+
+def robustness(
+    top_df: pd.DataFrame,
+    df: pd.DataFrame,
+    life_col: str,
+    base_life: float,
+    n_samples: int = 10_000,
+    dist: str = "normal",
+    rel_sd: float = 0.1,
+    abs_sd: float = 0.0,
+    sd_col: Optional[str] = None,
+    group_col: Optional[str] = None,
+    group_corr: float = 0.0,
+    common_corr: float = 0.0,
+    sampler: Optional[Callable[[np.random.Generator, int, int], np.ndarray]] = None,
+    percentiles: Sequence[float] = (5, 50, 95),
+    seed: Optional[int] = None,
+    block: int = 256,
+    dtype=np.float32,
+    stats: Optional[SolverStats] = None,
+) -> pd.DataFrame:
+    """Evalúa las carteras de ``top_df`` (columna ``_indices``) bajo ruido.
+
+    Devuelve una copia de ``top_df`` con ``delta_media``, ``delta_sd``,
+    ``delta_p<q>`` por percentil y ``prob_mejor``; los parámetros quedan
+    en ``attrs["robustez"]``.
+    """
+    with _instrument("robustness", stats, n_samples=n_samples, portfolios=len(top_df),
+                     dist=dist, block=block) as st:
+        with st.phase("sample"):
+            portfolios = list(top_df["_indices"]) if len(top_df) else []
+            labels = list(dict.fromkeys(p for sel in portfolios for p in sel))
+            rows = df.loc[labels]
+            delta = (rows[life_col] - base_life).to_numpy(dtype=float)
+            codes = pd.factorize(rows[group_col])[0] if group_col else None
+            if group_corr and codes is None:
+                raise ValueError("group_corr requiere group_col")
+            samples = sample_deltas(
+                delta, n_samples, dist=dist, rel_sd=rel_sd, abs_sd=abs_sd,
+                sd=rows[sd_col].to_numpy(dtype=float) if sd_col else None,
+                codes=codes, common_corr=common_corr, group_corr=group_corr,
+                sampler=sampler, seed=seed, dtype=dtype,
+            )
+            inc = incidence(portfolios, labels, dtype)
+        st.count("samples", n_samples)
+        st.count("projects", len(labels))
+
+        n = len(portfolios)
+        mean, sd = np.empty(n), np.empty(n)
+        pct = np.empty((len(percentiles), n))
+        best_val = np.full(n_samples, -np.inf, dtype=dtype)
+        best_idx = np.zeros(n_samples, dtype=np.int64)
+        with st.phase("evaluate"):
+            samples_t = samples.T
+            for start in range(0, n, block):
+                # bloque × S: cada cartera es una fila contigua (percentiles rápidos)
+                scores = inc[:, start:start + block].T @ samples_t
+                mean[start:start + block] = scores.mean(axis=1, dtype=np.float64)
+                sd[start:start + block] = scores.std(axis=1, dtype=np.float64)
+                if len(percentiles):
+                    pct[:, start:start + block] = np.percentile(scores, percentiles, axis=1)
+                # Mejor por escenario: > estricto, el empate queda con la de mejor rango
+                arg = scores.argmax(axis=0)
+                val = scores[arg, np.arange(n_samples)]
+                better = val > best_val
+                best_val[better] = val[better]
+                best_idx[better] = arg[better] + start
+                st.count("blocks")
+
+        out = top_df.copy()
+        out["delta_media"] = mean
+        out["delta_sd"] = sd
+        for q, values in zip(percentiles, pct):
+            out[f"delta_p{q:g}"] = values
+        out["prob_mejor"] = np.bincount(best_idx, minlength=n)[:n] / n_samples if n else []
+        out.attrs["robustez"] = {
+            "n_samples": n_samples, "dist": dist, "rel_sd": rel_sd, "abs_sd": abs_sd,
+            "sd_col": sd_col, "group_corr": group_corr, "common_corr": common_corr,
+            "seed": seed,
+        }
+    return out
+
+
+def robust_top_n(
+    df: pd.DataFrame,
+    group_col: str,
+    life_col: str,
+    cost_col: str,
+    base_life: float,
+    budget: float,
+    id_col: Optional[str] = None,
+    scale: int = 100,
+    top_n: int = 100,
+    method: str = "kbest",
+    **robust_kwargs,
+) -> pd.DataFrame:
+    """``top_n_combinations`` seguido de ``robustness`` (``robust_kwargs``)."""
+    top_df = top_n_combinations(df, group_col, life_col, cost_col, base_life, budget,
+                                id_col=id_col, scale=scale, top_n=top_n, method=method)
+    return robustness(top_df, df, life_col, base_life, group_col=group_col, **robust_kwargs)
@@ -0,0 +1,377 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+mochila_servicio.py  –  servicio HTTP local para optimizar portafolios
+desde la aplicación web
+
+`mochila.py` solo corre como script y deja un Excel.  Este servicio (solo
+biblioteca estándar + pandas/numpy) lo expone en la red local:
+
+• `Libro1.csv` se carga **una vez** (con `mochila_carga`) y los arreglos
+  van a un pool de procesos en su inicializador, igual que en
+  `mochila_lotes.py`; el bucle asyncio solo atiende conexiones.
+• Peticiones idénticas simultáneas (mismos parámetros normalizados) se
+  **coalescen**: la primera lanza el cálculo y las demás esperan el mismo
+  futuro.  Repeticiones posteriores las responde la caché de
+  `mochila_cache` de cada proceso (o la de disco con `--cache`).
+• Con más de `max_pending` cálculos distintos en curso se responde 503
+  con `Retry-After` en vez de encolar sin límite.
+• `presupuesto × scale` (celdas de la DP) está acotado por
+  `MAX_BUDGET_CELLS` (400 si se pasa), y el top‑N también por
+  `mochila.KBEST_MAX_PARTIALS` (400).  Una respuesta espera como mucho
+  `solve_timeout` segundos (504); el cálculo sigue en el pool y lo
+  aprovechan las peticiones iguales que lleguen después.
+• Si un proceso del pool muere (p. ej. sin memoria) el pool queda roto:
+  se crea uno nuevo y esa petición recibe 503 con `Retry-After`.
+
+Rutas (JSON, con CORS abierto para el front‑end):
+
+    GET  /salud        estado, proyectos cargados, cálculos en curso
+    GET  /proyectos    tabla de proyectos (id, proyecto, vida, costo)
+    POST /optimizar    {"presupuesto": 10000, "base_life": 72.68,
+                        "top_n": 20, "scale": 20, "ids": [1, 2, ...]}
+
+`ids` (opcional) restringe la cartera a los proyectos del equipo.
+
+Uso:
+    python mochila_servicio.py --puerto 8765 --workers 4
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from http import HTTPStatus
+from typing import Any, Dict, Optional, Tuple
+
+import pandas as pd
+
+import mochila_lotes as lotes
+from mochila_cache import cached_mckp_max_delta, cached_top_n_combinations
+from mochila_lotes import COST_COL, ID_COL, LIFE_COL, NAME_COL
+
+DEFAULTS = {"base_life": 72.68, "top_n": 20, "scale": 20}
+MAX_TOP_N = 1000
+MAX_SCALE = 100
+MAX_BUDGET_CELLS = 2_000_000  # presupuesto × scale (Libro1: 10 000 × 20)
+SOLVE_TIMEOUT = 120.0
+MAX_BODY = 1024 * 1024
+READ_TIMEOUT = 10.0
+
+
+class RequestError(ValueError):
+    """Error del cliente: se responde con ``status`` y el mensaje."""
+
+    def __init__(self, message: str, status: HTTPStatus = HTTPStatus.BAD_REQUEST):
+        super().__init__(message)
+        self.status = status
+
+
+# ------------------------------------------------------------------ #
+# 1. PARÁMETROS Y CÁLCULO (en el proceso trabajador)                 #
+# ------------------------------------------------------------------ #
+
+def normalize_params(body: Dict[str, Any]) -> Dict[str, Any]:
+    """Valida el cuerpo de ``/optimizar`` y lo deja en forma canónica.
+
+    Dos cuerpos equivalentes (orden de claves, ``ids`` repetidos o
+    desordenados, ``20`` vs ``20.0``) producen el mismo diccionario, que es
+    la clave de coalescencia.
+    """
+    if not isinstance(body, dict):
+        raise RequestError("El cuerpo debe ser un objeto JSON")
+    if "presupuesto" not in body:
+        raise RequestError("Falta 'presupuesto'")
+    unknown = set(body) - {"presupuesto", "ids", *DEFAULTS}
+    if unknown:
+        raise RequestError(f"Parámetros desconocidos: {', '.join(sorted(unknown))}")
+    params = {**DEFAULTS, **body}
+    try:
+        out = {
+            "presupuesto": float(params["presupuesto"]),
+            "base_life": float(params["base_life"]),
+            "top_n": int(params["top_n"]),
+            "scale": int(params["scale"]),
+        }
+        ids = params.get("ids")
+        out["ids"] = None if ids is None else sorted({int(i) for i in ids})
+    except (TypeError, ValueError) as e:
+        raise RequestError(f"Parámetro inválido: {e}")
+    if out["presupuesto"] < 0:
+        raise RequestError("'presupuesto' no puede ser negativo")
+    if not 1 <= out["top_n"] <= MAX_TOP_N:
+        raise RequestError(f"'top_n' debe estar entre 1 y {MAX_TOP_N}")
+    if not 1 <= out["scale"] <= MAX_SCALE:
+        raise RequestError(f"'scale' debe estar entre 1 y {MAX_SCALE}")
+    if out["presupuesto"] * out["scale"] > MAX_BUDGET_CELLS:
+        raise RequestError(f"'presupuesto' × 'scale' no puede superar {MAX_BUDGET_CELLS}")
+    return out
+
+
+def _key(params: Dict[str, Any]) -> Tuple:
+    return tuple((k, tuple(v) if isinstance(v, list) else v) for k, v in sorted(params.items()))
+
+
+def _plain(value):
+    """Escalares numpy → tipos de Python (para ``json.dumps``)."""
+    return value.item() if hasattr(value, "item") else value
+
+
+def solve(params: Dict[str, Any]) -> Dict[str, Any]:
+    """Óptimo + top‑N para ``params`` ya normalizados (corre en el pool)."""
+    df = lotes._PROJECTS
+    if params["ids"] is not None:
+        df = df[df[ID_COL].isin(params["ids"])]
+    common = dict(
+        group_col=NAME_COL, life_col=LIFE_COL, cost_col=COST_COL,
+        base_life=params["base_life"], budget=params["presupuesto"],
+        id_col=ID_COL, scale=params["scale"],
+    )
+    start = time.perf_counter()
+    opt_df, delta_opt, costo_opt = cached_mckp_max_delta(df, cache=lotes._CACHE, **common)
+    try:
+        top_df = cached_top_n_combinations(df, top_n=params["top_n"], cache=lotes._CACHE, **common)
+    except ValueError as e:  # tope de parciales de "kbest": petición demasiado grande
+        raise RequestError(str(e))
+
+    optimo = {
+        "delta_total": float(delta_opt),
+        "costo_total": float(costo_opt),
+        "vida_total": float(opt_df[LIFE_COL].sum()),
+        "ratio": float(delta_opt / costo_opt) if costo_opt else 0.0,
+        "IDs": [_plain(v) for v in opt_df[ID_COL].tolist()],
+    }
+    top = [{
+        "rank": rank,
+        "delta_total": float(rec["delta_total"]),
+        "costo_total": float(rec["costo_total"]),
+        "vida_total": float(rec["vida_total"]),
+        "ratio": float(rec["ratio"]),
+        "IDs": [_plain(v) for v in rec["IDs"]],
+    } for rank, rec in enumerate(top_df.to_dict("records"), start=1)]
+    return {"optimo": optimo, "top": top, "proyectos": len(df),
+            "segundos": round(time.perf_counter() - start, 4)}
+
+
+# ------------------------------------------------------------------ #
+# 2. SERVICIO                                                        #
+# ------------------------------------------------------------------ #
+
+class SolverService:
+    """Estado del servicio: pool de procesos y cálculos en curso."""
+
+    def __init__(
+        self,
+        projects: pd.DataFrame,
+        workers: Optional[int] = None,
+        cache_dir: Optional[str] = None,
+        max_pending: int = 64,
+        executor: Optional[Executor] = None,
+        solve_timeout: float = SOLVE_TIMEOUT,
+    ):
+        self.projects = projects
+        self.max_pending = max_pending
+        self.solve_timeout = solve_timeout
+        self.workers = workers or os.cpu_count() or 1
+        # Un executor externo no se puede recrear si se rompe
+        self._initargs = None if executor else (lotes.prepare_arrays(projects), cache_dir)
+        self.executor = executor or self._new_executor()
+        self._inflight: Dict[Tuple, asyncio.Future] = {}
+        self.computed = 0
+        self.coalesced = 0
+        self.restarts = 0
+
+    def _new_executor(self) -> Executor:
+        return ProcessPoolExecutor(max_workers=self.workers, initializer=lotes._init_worker,
+                                   initargs=self._initargs)
+
+    def _restart(self, broken: Executor):
+        """Reemplaza el pool roto (una sola vez aunque fallen varias peticiones)."""
+        if broken is not self.executor or self._initargs is None:
+            return
+        broken.shutdown(wait=False, cancel_futures=True)
+        self.executor = self._new_executor()
+        self.restarts += 1
+        print("Pool de procesos roto; se creó uno nuevo", file=sys.stderr)
+
+    async def optimize(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        params = normalize_params(body)
+        key = _key(params)
+        pool = self.executor
+        fut = self._inflight.get(key)
+        coalesced = fut is not None
+        if coalesced:
+            self.coalesced += 1
+        else:
+            if len(self._inflight) >= self.max_pending:
+                raise RequestError("Servicio saturado; reintente en unos segundos",
+                                   HTTPStatus.SERVICE_UNAVAILABLE)
+            loop = asyncio.get_running_loop()
+            try:
+                fut = loop.run_in_executor(pool, solve, params)
+            except BrokenProcessPool:  # se rompió sin una petición en curso
+                self._restart(pool)
+                pool = self.executor
+                fut = loop.run_in_executor(pool, solve, params)
+            self._inflight[key] = fut
+            fut.add_done_callback(lambda _: self._inflight.pop(key, None))
+            self.computed += 1
+        # shield: ni un cliente desconectado ni el plazo cancelan el cálculo de los demás
+        try:
+            result = await asyncio.wait_for(asyncio.shield(fut), self.solve_timeout)
+        except asyncio.TimeoutError:
+            raise RequestError(f"El cálculo superó {self.solve_timeout:g} s",
+                               HTTPStatus.GATEWAY_TIMEOUT)
+        except BrokenProcessPool:
+            self._restart(pool)
+            raise RequestError("Un proceso de cálculo terminó inesperadamente; reintente",
+                               HTTPStatus.SERVICE_UNAVAILABLE)
+        return {"parametros": params, **result, "coalescido": coalesced}
+
+    def health(self) -> Dict[str, Any]:
+        return {"estado": "ok", "proyectos": len(self.projects), "workers": self.workers,
+                "en_curso": len(self._inflight), "calculados": self.computed,
+                "coalescidos": self.coalesced, "reinicios": self.restarts}
+
+    def project_list(self):
+        cols = [ID_COL, NAME_COL, LIFE_COL, COST_COL]
+        return [{k: _plain(v) for k, v in rec.items()}
+                for rec in self.projects[cols].to_dict("records")]
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    # -------------------------------------------------------------- #
+    # HTTP/1.1 mínimo (una petición por conexión)
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            try:
+                method, path, body = await asyncio.wait_for(_read_request(reader), READ_TIMEOUT)
+                status, payload = HTTPStatus.OK, await self._route(method, path, body)
+            except RequestError as e:
+                status, payload = e.status, {"error": str(e)}
+            except asyncio.TimeoutError:
+                status, payload = HTTPStatus.REQUEST_TIMEOUT, {"error": "Tiempo de lectura agotado"}
+            except Exception as e:  # fallo del solver: se informa y el servicio sigue
+                print(f"Error interno: {e!r}", file=sys.stderr)
+                status, payload = HTTPStatus.INTERNAL_SERVER_ERROR, {"error": str(e)}
+            writer.write(_response(status, payload))
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _route(self, method: str, path: str, body: bytes):
+        path = path.split("?", 1)[0].rstrip("/") or "/"
+        routes = {"/salud": "GET", "/proyectos": "GET", "/optimizar": "POST"}
+        if method == "OPTIONS":
+            return None
+        if path not in routes:
+            raise RequestError(f"Ruta desconocida: {path}", HTTPStatus.NOT_FOUND)
+        if method != routes[path]:
+            raise RequestError(f"Use {routes[path]} en {path}", HTTPStatus.METHOD_NOT_ALLOWED)
+        if path == "/salud":
+            return self.health()
+        if path == "/proyectos":
+            return self.project_list()
+        try:
+            data = json.loads(body or b"{}")
+        except ValueError as e:
+            raise RequestError(f"JSON inválido: {e}")
+        return await self.optimize(data)
+
+
+async def _read_request(reader: asyncio.StreamReader) -> Tuple[str, str, bytes]:
+    try:
+        head = await reader.readuntil(b"\r\n\r\n")
+    except asyncio.IncompleteReadError:
+        raise RequestError("Petición incompleta")
+    except asyncio.LimitOverrunError:
+        raise RequestError("Encabezados demasiado largos",
+                           HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE)
+    lines = head.decode("latin1").split("\r\n")
+    try:
+        method, path, _ = lines[0].split(" ", 2)
+    except ValueError:
+        raise RequestError("Línea de petición inválida")
+    headers = {}
+    for line in lines[1:]:
+        if ":" in line:
+            name, value = line.split(":", 1)
+            headers[name.strip().lower()] = value.strip()
+    try:
+        length = int(headers.get("content-length", 0))
+    except ValueError:
+        raise RequestError("Content-Length inválido")
+    if length > MAX_BODY:
+        raise RequestError("Cuerpo demasiado grande", HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+    try:
+        body = await reader.readexactly(length) if length else b""
+    except asyncio.IncompleteReadError:
+        raise RequestError("Cuerpo incompleto")
+    return method.upper(), path, body
+
+
+def _response(status: HTTPStatus, payload) -> bytes:
+    body = b"" if payload is None else json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    head = [
+        f"HTTP/1.1 {status.value} {status.phrase}",
+        "Content-Type: application/json; charset=utf-8",
+        f"Content-Length: {len(body)}",
+        "Access-Control-Allow-Origin: *",
+        "Access-Control-Allow-Methods: GET, POST, OPTIONS",
+        "Access-Control-Allow-Headers: Content-Type",
+        "Connection: close",
+    ]
+    if status == HTTPStatus.SERVICE_UNAVAILABLE:
+        head.append("Retry-After: 2")
+    return ("\r\n".join(head) + "\r\n\r\n").encode("latin1") + body
+
+
+async def serve(service: SolverService, host: str = "127.0.0.1", port: int = 8765):
+    server = await asyncio.start_server(service.handle, host, port)
+    print(f"Servicio de mochila en http://{host}:{port} "
+          f"({len(service.projects)} proyectos, {service.workers} workers)")
+    async with server:
+        await server.serve_forever()
+
+
+# ------------------------------------------------------------------ #
+# 3. MAIN                                                            #
+# ------------------------------------------------------------------ #
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servicio HTTP local de mochila.py.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=8765)
+    parser.add_argument("--proyectos", default="Libro1.csv", help="CSV de proyectos")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Procesos (por defecto, uno por núcleo)")
+    parser.add_argument("--cache", default=None,
+                        help="Directorio de caché de resultados compartida (opcional)")
+    parser.add_argument("--max-pendientes", type=int, default=64,
+                        help="Cálculos distintos en curso antes de responder 503")
+    parser.add_argument("--timeout", type=float, default=SOLVE_TIMEOUT,
+                        help="Segundos máximos de espera por cálculo antes de responder 504")
+    args = parser.parse_args()
+
+    try:
+        proyectos_df = lotes._read_projects(args.proyectos)
+    except (OSError, KeyError, ValueError) as e:
+        print(f"Error: {e}")
+        exit(1)
+
+    servicio = SolverService(proyectos_df, workers=args.workers, cache_dir=args.cache,
+                             max_pending=args.max_pendientes, solve_timeout=args.timeout)
+    try:
+        asyncio.run(serve(servicio, args.host, args.puerto))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servicio.close()
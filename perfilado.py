@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+perfilado.py  –  estadísticas y registro JSON por línea de los solvers
+
+Compartido por los solvers de mochila (`mochila.py` y sus módulos) y por
+el motor de rásters (`simulador_distancia.py`): cada entrada acepta
+``stats=SolverStats()`` (tiempos por fase, contadores, pico de memoria) y
+``enable_profiling(ruta)`` o la variable de entorno ``MOCHILA_PROFILE``
+escriben un registro JSON por línea en cada llamada.
+"""
+
+import json
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional, Union
+
+
+class SolverStats:
+    """Tiempos por fase y contadores de una llamada a un solver.
+
+    Se pasa como ``stats=`` a ``mckp_max_delta``, ``frontier``,
+    ``top_n_combinations``, ``cost_distance``… y queda lleno al volver.  Con
+    ``track_memory=True`` se mide además el pico de memoria (tracemalloc,
+    bytes por encima de lo ya asignado al entrar).
+    """
+
+    def __init__(self, solver: str = "", track_memory: bool = False):
+        self.solver = solver
+        self.track_memory = track_memory
+        self.params: Dict[str, object] = {}
+        self.phases: Dict[str, float] = {}
+        self.counters: Dict[str, int] = {}
+        self.wall_time = 0.0
+        self.peak_bytes: Optional[int] = None
+
+    @contextmanager
+    def phase(self, name: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - t0
+
+    def count(self, name: str, n: int = 1):
+        self.counters[name] = self.counters.get(name, 0) + int(n)
+
+    def to_dict(self) -> dict:
+        return {
+            "solver": self.solver,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "wall_time": self.wall_time,
+            "phases": dict(self.phases),
+            "counters": dict(self.counters),
+            "peak_bytes": self.peak_bytes,
+            "params": dict(self.params),
+        }
+
+    def __repr__(self) -> str:
+        return f"SolverStats({self.to_dict()!r})"
+
+
+_PROFILE = {"hook": None, "memory": False, "depth": 0}
+
+
+def enable_profiling(target: Union[str, Callable[[dict], None]], memory: bool = False):
+    """Emite un registro por llamada a cada solver.
+
+    ``target`` es una ruta (se añade una línea JSON por registro) o una
+    función que recibe el dict.  También se activa al importar si existe
+    la variable de entorno ``MOCHILA_PROFILE`` (ruta del archivo).
+    """
+    if callable(target):
+        hook = target
+    else:
+        def hook(record: dict, path: str = target):
+            with open(path, "a", encoding="utf-8") as fh:
+                fh.write(json.dumps(record, default=str) + "\n")
+    _PROFILE.update(hook=hook, memory=memory)
+
+
+def disable_profiling():
+    _PROFILE.update(hook=None, memory=False)
+
+
+@contextmanager
+def instrument(solver: str, stats: Optional[SolverStats], **params):
+    """Marco común de las entradas: tiempo total, memoria y emisión."""
+    stats = stats if stats is not None else SolverStats(solver)
+    stats.solver = stats.solver or solver
+    stats.params.update(params)
+    # Solo la llamada más externa mide memoria (reset_peak afectaría a la de fuera)
+    track = (stats.track_memory or _PROFILE["memory"]) and _PROFILE["depth"] == 0
+    started = False
+    if track:
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+        else:
+            tracemalloc.start()
+            started = True
+        base = tracemalloc.get_traced_memory()[0]
+    _PROFILE["depth"] += 1
+    t0 = time.perf_counter()
+    try:
+        yield stats
+    finally:
+        stats.wall_time = time.perf_counter() - t0
+        _PROFILE["depth"] -= 1
+        if track:
+            stats.peak_bytes = max(0, tracemalloc.get_traced_memory()[1] - base)
+            if started:
+                tracemalloc.stop()
+        if _PROFILE["hook"] is not None:
+            _PROFILE["hook"](stats.to_dict())
+
+
+if os.environ.get("MOCHILA_PROFILE"):
+    enable_profiling(os.environ["MOCHILA_PROFILE"])
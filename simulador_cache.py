@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+"""
+Caché en disco de distancias ajustadas (``dist * raster_penalizacion``)
+por ubicación de proyecto
+
+Las variantes Óptima/Buena/Deficiente de `Libro1.csv` tienen x/y fijas,
+así que en una ronda del juego casi todos los equipos piden las mismas
+superficies.  La clave es
+    (lon, lat, extensión, cell_size, versión del ráster de penalización,
+     método de la superficie y sus parámetros, dtype)
+con lon/lat llevadas al centro de su celda: dos puntos en la misma
+celda producen la misma ``DistanceAccumulation``, así que comparten
+entrada.  El método separa superficies que no son intercambiables
+(``DistanceAccumulation`` de ArcGIS frente a la forma cerrada de
+`simulador_raster`, ``SURFACE_LAMBERT``).
+
+• Disco: un ``.npy`` por clave, leído como memory‑map (o ``.npz``
+  comprimido con ``compress=True``); cuando el total supera
+  ``max_bytes`` se borran los menos usados (por fecha de acceso).
+• Memoria: LRU con ``max_entries`` arreglos (o memory‑maps).
+Cada escritura va a un temporal propio (``mkstemp``) y se renombra, así
+que varios procesos pueden compartir el directorio.  Un archivo que no
+se puede borrar o reemplazar (p. ej. mapeado por otro proceso en
+Windows) simplemente se salta.
+
+Uso:
+    cache = DistanceCache(".cache_distancias")
+    res = simulate(entradas, proyectos, cache=cache)
+    cache.hits, cache.misses
+    for i, dist in cache.get_or_compute_many(claves, calcular_lote): ...
+"""
+
+import hashlib
+import os
+import tempfile
+import zipfile
+from collections import OrderedDict
+from typing import Callable, Hashable, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from simulador_raster import Grid, RasterInputs, adjusted_distance
+
+# Superficie de `simulador_raster.adjusted_distance` (geodésica de Lambert
+# al centro de la celda × penalización)
+SURFACE_LAMBERT = ("geodesic_distance", "lambert")
+
+
+class DistanceCache:
+    """Superficies de distancia ajustada en disco, con LRU por tamaño."""
+
+    def __init__(
+        self,
+        directory: str,
+        max_bytes: int = 2 * 1024 ** 3,
+        max_entries: int = 32,
+        compress: bool = False,
+        dtype=np.float32,
+    ):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.compress = compress
+        self.dtype = np.dtype(dtype)
+        self._mem: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    # ---- claves ----
+    def key(self, grid: Grid, lon: float, lat: float, penalty_version: str,
+            method: Hashable = SURFACE_LAMBERT) -> Optional[str]:
+        """Clave de la superficie del punto (None si cae fuera de la malla).
+
+        ``method`` identifica cómo se calculó la superficie (herramienta y
+        parámetros); su ``repr`` entra en la clave.
+        """
+        cell = grid.cell_of(lon, lat)
+        if cell is None:
+            return None
+        lon_c = grid.x_min + (cell[1] + 0.5) * grid.cell_size
+        lat_c = grid.y_max - (cell[0] + 0.5) * grid.cell_size
+        ident = (round(lon_c, 9), round(lat_c, 9), tuple(round(v, 9) for v in grid.extent),
+                 grid.cell_size, grid.shape, penalty_version, method, self.dtype.str)
+        return hashlib.blake2b(repr(ident).encode(), digest_size=20).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.{'npz' if self.compress else 'npy'}")
+
+    # ---- almacén ----
+    def get(self, key: str) -> Optional[np.ndarray]:
+        if key in self._mem:
+            self._mem.move_to_end(key)
+            return self._mem[key]
+        path = self._path(key)
+        try:
+            if self.compress:
+                with np.load(path) as npz:
+                    value = npz["dist"]
+            else:
+                value = np.load(path, mmap_mode="r")
+        except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+            return None
+        try:
+            os.utime(path)  # marca de uso para la expulsión LRU
+        except OSError:
+            pass
+        self._remember(key, value)
+        return value
+
+    def put(self, key: str, value: np.ndarray) -> np.ndarray:
+        """Guarda ``value`` (convertido a ``dtype``) y lo devuelve."""
+        value = np.asarray(value, dtype=self.dtype)
+        tmp = None
+        try:
+            fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "wb") as fh:
+                if self.compress:
+                    np.savez_compressed(fh, dist=value)
+                else:
+                    np.save(fh, value)
+            os.replace(tmp, self._path(key))
+        except OSError:
+            if tmp is not None:
+                try:
+                    os.remove(tmp)
+                except OSError:
+                    pass
+        self._remember(key, value)
+        self._evict_disk()
+        return value
+
+    def _remember(self, key: str, value: np.ndarray):
+        self._mem[key] = value
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.max_entries:
+            self._mem.popitem(last=False)
+
+    def _evict_disk(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith((".npy", ".npz")):
+                try:
+                    st = os.stat(os.path.join(self.directory, name))
+                except OSError:  # borrado por otro proceso
+                    continue
+                entries.append((st.st_mtime, st.st_size, name))
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self._mem.pop(name[:-4], None)
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            total -= size
+
+    def clear(self):
+        self._mem.clear()
+        for name in os.listdir(self.directory):
+            if name.endswith((".npy", ".npz")):
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+
+    # ---- superficies ----
+    def get_or_compute(self, key: Optional[str], compute: Callable[[], Optional[np.ndarray]]
+                       ) -> Optional[np.ndarray]:
+        """Entrada guardada o ``compute()`` (que se guarda); sin clave, solo calcula."""
+        if key is not None:
+            hit = self.get(key)
+            if hit is not None:
+                self.hits += 1
+                return hit
+        self.misses += 1
+        value = compute()
+        if key is not None and value is not None:
+            return self.put(key, value)
+        return value
+
+    def get_or_compute_many(
+        self,
+        keys: Sequence[Optional[str]],
+        compute: Callable[[List[int]], Iterable[Tuple[int, Optional[np.ndarray]]]],
+    ) -> Iterator[Tuple[int, Optional[np.ndarray]]]:
+        """(i, superficie) de cada clave, en streaming: primero las
+        guardadas; las demás las calcula ``compute(pendientes)`` en un solo
+        lote, que genera (i, valor) y se guardan al llegar."""
+        pending = []
+        for i, key in enumerate(keys):
+            hit = self.get(key) if key is not None else None
+            if hit is not None:
+                self.hits += 1
+                yield i, hit
+            else:
+                pending.append(i)
+        if not pending:
+            return
+        self.misses += len(pending)
+        for i, value in compute(pending):
+            if keys[i] is not None and value is not None:
+                value = self.put(keys[i], value)
+            yield i, value
+
+    def adjusted_distance(self, inputs: RasterInputs, lon: float, lat: float) -> Optional[np.ndarray]:
+        """``simulador_raster.adjusted_distance`` con caché."""
+        key = self.key(inputs.grid, lon, lat, inputs.penalty_version)
+        return self.get_or_compute(key, lambda: adjusted_distance(inputs, lon, lat))
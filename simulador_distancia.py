@@ -0,0 +1,287 @@
+# -*- coding: utf-8 -*-
+"""
+Distancias de muchos proyectos en una sola llamada (reemplazo de
+`DistanceAccumulation` por proyecto en `SimuladorGP.script_tool`)
+
+Dos caminos:
+· Sin superficie de costo (lo que usa la GP: GEODESIC, factores BINARY
+  sin ráster de superficie, penalización aplicada después) la distancia
+  acumulada es la geodésica al centro de la celda fuente →
+  forma cerrada, exacta salvo la fórmula de Lambert (< 0.1 m).
+· Con superficie de costo (p. ej. ``raster_penalizacion`` como
+  fricción) → camino mínimo sobre el grafo de la malla (el mismo
+  resultado que Dijkstra) por relajación con barridos Gauss‑Seidel
+  vectorizados:
+      - filas hacia abajo y hacia arriba, todas las fuentes a la vez
+        (eje 0 del arreglo S × filas × columnas);
+      - dentro de cada fila, propagación izquierda↔derecha exacta con
+        ``minimum.accumulate(d - W) + W`` (W = costo acumulado);
+      - se repite hasta que ningún valor baja.
+  Los caminos que serpentean entre barreras pueden necesitar muchos
+  barridos: tras ``max_sweeps`` pares, las fuentes que aún cambian se
+  resuelven con Dijkstra (cola de prioridad) sobre el mismo grafo.
+  Longitudes de paso geodésicas a ``cell_size`` (dependen de la
+  latitud de la fila); costo de un paso = longitud × costo medio de las
+  celdas que cruza.  NaN en el costo = NoData = barrera.
+
+Tolerancia frente a ArcGIS (documentada para pruebas de comparación):
+· costo uniforme / None: |Δ| < 0.1 m;
+· con costo, vecindad 16 (default): el grafo sobrestima como máximo
+  un 2.8 % la distancia en línea recta en un medio uniforme (ángulo de
+  13.3° entre direcciones de la vecindad; 8.3 % con ``neighbours=8``),
+  más la discretización del costo en los bordes de cada zona.
+  `tests/test_distancia.py` verifica ambas cotas contra
+  ``DistanceAccumulation`` sobre el fixture de `simulador_fixture.py`.
+
+Uso:
+    pts = [(p.lon, p.lat) for p in proyectos]
+    stack = distance_stack(grid, pts)                         # S × filas × columnas
+    for i, dist in iter_distances(grid, pts, chunk=8): ...    # en streaming
+    fric = distance_stack(grid, pts, cost=entradas.penalty)
+"""
+
+from typing import Iterator, Optional, Sequence, Tuple
+
+import heapq
+
+import numpy as np
+
+from perfilado import SolverStats, instrument
+from simulador_raster import Grid, geodesic, geodesic_distance
+
+
+# ───────────────────── 1 · FUENTES Y LONGITUDES DE PASO ─────────────────────
+def source_cells(grid: Grid, points: Sequence[Tuple[float, float]]) -> np.ndarray:
+    """(fila, columna) de cada punto (lon, lat); -1, -1 si cae fuera."""
+    cells = np.full((len(points), 2), -1, dtype=np.int64)
+    for i, (lon, lat) in enumerate(points):
+        cell = grid.cell_of(lon, lat)
+        if cell is not None:
+            cells[i] = cell
+    return cells
+
+
+def _step_lengths(grid: Grid) -> dict:
+    """Longitud geodésica (m) de cada tipo de paso entre centros de celda.
+
+    ``h[r]`` es el paso horizontal dentro de la fila r; los demás se
+    indexan por la fila de abajo del par (r-1, r) o (r-2, r).
+    """
+    lat = grid.lat_centers()
+    cs = grid.cell_size
+    n = grid.n_rows
+    out = {"h": geodesic(0.0, lat, cs, lat)}
+    for name, d_rows, d_cols in (("v", 1, 0), ("d", 1, 1), ("k1", 1, 2), ("k2", 2, 1)):
+        arr = np.zeros(n)
+        if n > d_rows:
+            arr[d_rows:] = geodesic(0.0, lat[:-d_rows], d_cols * cs, lat[d_rows:])
+        out[name] = arr
+    return out
+
+
+# ───────────────────── 2 · BARRIDOS ─────────────────────────────────────────
+def _relax_row(tgt: np.ndarray, row_w: np.ndarray):
+    """Propagación exacta dentro de una fila (S × C) con pesos entre
+    vecinas ``row_w`` (C-1), en ambos sentidos."""
+    cum = np.concatenate(([0.0], np.cumsum(row_w)))
+    np.minimum(tgt, np.minimum.accumulate(tgt - cum, axis=1) + cum, out=tgt)
+    back = np.minimum.accumulate((tgt + cum)[:, ::-1], axis=1)[:, ::-1] - cum
+    np.minimum(tgt, back, out=tgt)
+
+
+def _relax_horizontal(tgt: np.ndarray, row_w: np.ndarray):
+    """Como ``_relax_row`` pero cortando la fila en las barreras (peso inf)."""
+    if np.isfinite(row_w).all():
+        _relax_row(tgt, row_w)
+        return
+    cuts = np.flatnonzero(~np.isfinite(row_w)) + 1
+    bounds = np.concatenate(([0], cuts, [tgt.shape[1]]))
+    for a, b in zip(bounds[:-1], bounds[1:]):
+        if b - a > 1:
+            _relax_row(tgt[:, a:b], row_w[a:b - 1])
+
+
+def _relax_from(dist: np.ndarray, cost: np.ndarray, steps: dict,
+                r: int, s: int, sixteen: bool):
+    """Relaja la fila ``r`` desde las filas ``r - s`` y ``r - 2s``."""
+    n_rows = dist.shape[1]
+    tgt = dist[:, r, :]
+    kr = cost[r]
+    q = r - s
+    if 0 <= q < n_rows:
+        pair = max(r, q)
+        kq, src = cost[q], dist[:, q, :]
+        np.minimum(tgt, src + steps["v"][pair] * (kq + kr) / 2, out=tgt)
+        w = steps["d"][pair] * (kq[:-1] + kr[1:]) / 2
+        np.minimum(tgt[:, 1:], src[:, :-1] + w, out=tgt[:, 1:])
+        w = steps["d"][pair] * (kq[1:] + kr[:-1]) / 2
+        np.minimum(tgt[:, :-1], src[:, 1:] + w, out=tgt[:, :-1])
+        if sixteen and tgt.shape[1] > 2:
+            # salto de caballo 1 fila × 2 columnas: cruza (q, j∓1) y (r, j∓1)
+            w = steps["k1"][pair] * (kq[:-2] + kq[1:-1] + kr[1:-1] + kr[2:]) / 4
+            np.minimum(tgt[:, 2:], src[:, :-2] + w, out=tgt[:, 2:])
+            w = steps["k1"][pair] * (kq[2:] + kq[1:-1] + kr[1:-1] + kr[:-2]) / 4
+            np.minimum(tgt[:, :-2], src[:, 2:] + w, out=tgt[:, :-2])
+    q2 = r - 2 * s
+    if sixteen and 0 <= q2 < n_rows:
+        # 2 filas × 1 columna: cruza las dos celdas de la fila intermedia
+        pair = max(r, q2)
+        km, k2, src = cost[q], cost[q2], dist[:, q2, :]
+        w = steps["k2"][pair] * (k2[:-1] + km[:-1] + km[1:] + kr[1:]) / 4
+        np.minimum(tgt[:, 1:], src[:, :-1] + w, out=tgt[:, 1:])
+        w = steps["k2"][pair] * (k2[1:] + km[1:] + km[:-1] + kr[:-1]) / 4
+        np.minimum(tgt[:, :-1], src[:, 1:] + w, out=tgt[:, :-1])
+    _relax_horizontal(tgt, steps["h"][r] * (kr[:-1] + kr[1:]) / 2)
+
+
+def _dijkstra(cost: np.ndarray, steps: dict, cell: Tuple[int, int], sixteen: bool) -> np.ndarray:
+    """Costo acumulado desde ``cell`` con cola de prioridad: mismas aristas
+    y pesos que ``_relax_from`` (``cost`` con inf en las barreras)."""
+    n_rows, n_cols = cost.shape
+    k = cost.tolist()
+    h, v, d, k1, k2 = (steps[name].tolist() for name in ("h", "v", "d", "k1", "k2"))
+    moves = [(0, 1), (0, -1), (1, 0), (-1, 0), (1, 1), (1, -1), (-1, 1), (-1, -1)]
+    if sixteen:
+        moves += [(1, 2), (1, -2), (-1, 2), (-1, -2), (2, 1), (2, -1), (-2, 1), (-2, -1)]
+    dist = np.full(cost.shape, np.inf)
+    best = dist.tolist()
+    best[cell[0]][cell[1]] = 0.0
+    heap = [(0.0, cell[0], cell[1])]
+    while heap:
+        du, r, c = heapq.heappop(heap)
+        if du > best[r][c]:
+            continue
+        for dr, dc in moves:
+            r2, c2 = r + dr, c + dc
+            if not (0 <= r2 < n_rows and 0 <= c2 < n_cols):
+                continue
+            pair = max(r, r2)
+            if dr == 0:
+                w = h[r] * (k[r][c] + k[r2][c2]) / 2
+            elif dc == 0:
+                w = v[pair] * (k[r][c] + k[r2][c2]) / 2
+            elif abs(dr) == 1 and abs(dc) == 1:
+                w = d[pair] * (k[r][c] + k[r2][c2]) / 2
+            elif abs(dr) == 1:
+                cm = c + dc // 2
+                w = k1[pair] * (k[r][c] + k[r][cm] + k[r2][cm] + k[r2][c2]) / 4
+            else:
+                rm = r + dr // 2
+                w = k2[pair] * (k[r][c] + k[rm][c] + k[rm][c2] + k[r2][c2]) / 4
+            nd = du + w
+            if nd < best[r2][c2]:
+                best[r2][c2] = nd
+                heapq.heappush(heap, (nd, r2, c2))
+    dist[:] = best
+    return dist
+
+
+def cost_distance(
+    grid: Grid,
+    points: Sequence[Tuple[float, float]],
+    cost: Optional[np.ndarray] = None,
+    neighbours: int = 16,
+    max_sweeps: int = 100,
+    stats: Optional[SolverStats] = None,
+) -> np.ndarray:
+    """Costo acumulado mínimo (S × filas × columnas) desde cada punto.
+
+    ``cost`` (filas × columnas, > 0, NaN = barrera) multiplica la longitud
+    geodésica de cada paso; None equivale a 1.  Los puntos fuera de la
+    malla y las celdas inalcanzables quedan en NaN.  Las fuentes que no
+    convergen en ``max_sweeps`` pares de barridos se terminan con
+    ``_dijkstra`` (``stats`` cuenta ``dijkstra_sources``).
+    """
+    if neighbours not in (8, 16):
+        raise ValueError("neighbours debe ser 8 o 16")
+    with instrument("cost_distance", stats, sources=len(points), neighbours=neighbours,
+                     shape=grid.shape) as st:
+        with st.phase("setup"):
+            if cost is None:
+                cost = np.ones(grid.shape)
+            cost = np.asarray(cost, dtype=float)
+            if cost.shape != grid.shape:
+                raise ValueError(f"El costo mide {cost.shape}, la malla {grid.shape}")
+            if (cost[np.isfinite(cost)] <= 0).any():
+                raise ValueError("El costo debe ser > 0 (use NaN para barreras)")
+            cost = np.where(np.isnan(cost), np.inf, cost)
+            steps = _step_lengths(grid)
+            cells = source_cells(grid, points)
+            dist = np.full((len(points), *grid.shape), np.inf)
+            inside = cells[:, 0] >= 0
+            dist[np.flatnonzero(inside), cells[inside, 0], cells[inside, 1]] = 0.0
+
+        sixteen = neighbours == 16
+        pending = inside.copy()
+        with st.phase("sweeps"):
+            for _ in range(max_sweeps):
+                prev = dist.copy()
+                for r in range(grid.n_rows):
+                    _relax_from(dist, cost, steps, r, +1, sixteen)
+                for r in range(grid.n_rows - 1, -1, -1):
+                    _relax_from(dist, cost, steps, r, -1, sixteen)
+                st.count("sweeps")
+                pending = (dist < prev).any(axis=(1, 2))
+                if not pending.any():
+                    break
+        if pending.any():
+            # Sin converger (p. ej. laberintos de barreras): cola de prioridad
+            with st.phase("dijkstra"):
+                for i in np.flatnonzero(pending):
+                    dist[i] = _dijkstra(cost, steps, (int(cells[i, 0]), int(cells[i, 1])), sixteen)
+                    st.count("dijkstra_sources")
+        dist[~np.isfinite(dist)] = np.nan
+        dist[~inside] = np.nan
+    return dist
+
+
+# ───────────────────── 3 · API ──────────────────────────────────────────────
+def iter_distances(
+    grid: Grid,
+    points: Sequence[Tuple[float, float]],
+    cost: Optional[np.ndarray] = None,
+    chunk: int = 8,
+    **kwargs,
+) -> Iterator[Tuple[int, Optional[np.ndarray]]]:
+    """(i, distancia) por punto, en el orden de ``points``.
+
+    Sin ``cost`` usa la forma cerrada, una fuente por vez; con ``cost``
+    resuelve ``chunk`` fuentes por llamada a ``cost_distance``.  Un punto
+    fuera de la malla produce None, igual que ``geodesic_distance``.
+    """
+    if cost is None:
+        for i, (lon, lat) in enumerate(points):
+            yield i, geodesic_distance(grid, lon, lat)
+        return
+    for start in range(0, len(points), chunk):
+        block = points[start:start + chunk]
+        stack = cost_distance(grid, block, cost, **kwargs)
+        for k, (lon, lat) in enumerate(block):
+            yield start + k, (stack[k] if grid.cell_of(lon, lat) is not None else None)
+
+
+def distance_stack(
+    grid: Grid,
+    points: Sequence[Tuple[float, float]],
+    cost: Optional[np.ndarray] = None,
+    dtype=np.float64,
+    **kwargs,
+) -> np.ndarray:
+    """Todas las distancias juntas (S × filas × columnas; NaN fuera)."""
+    out = np.full((len(points), *grid.shape), np.nan, dtype=dtype)
+    for i, dist in iter_distances(grid, points, cost, **kwargs):
+        if dist is not None:
+            out[i] = dist
+    return out
+
+
+def max_relative_error(a: np.ndarray, b: np.ndarray, mask: Optional[np.ndarray] = None,
+                       min_dist: float = 0.0) -> float:
+    """max |a - b| / b sobre las celdas válidas (b > ``min_dist``) para
+    comparar contra rásters exportados de ArcGIS."""
+    valid = np.isfinite(a) & np.isfinite(b) & (b > min_dist)
+    if mask is not None:
+        valid &= np.broadcast_to(mask, valid.shape)
+    if not valid.any():
+        return 0.0
+    return float(np.max(np.abs(a[valid] - b[valid]) / b[valid]))
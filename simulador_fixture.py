@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+"""
+Fixture de referencia de ArcGIS para las pruebas del motor NumPy
+
+Corre en ArcGIS Pro (arcpy + Spatial Analyst).  Toma las entradas
+sintéticas de `simulador_raster.fixture_inputs` (pequeñas, para poder
+versionarlas), las escribe como rásters y ejecuta sobre ellas las mismas
+herramientas que `SimuladorGP.script_tool`.  En ``directorio`` quedan:
+
+· las entradas (``RasterInputs.save``: ``.npy`` + ``malla.json``) y
+  ``proyectos.json``;
+· ``distancia_<oid>.npy``: ``DistanceAccumulation`` (GEODESIC, factores
+  BINARY) de cada proyecto, sin penalización;
+· ``final_<dim>.npy`` y ``medias.json``: ``Con(base + inc_sum, ...)`` y
+  la media con la máscara del cálculo original sobre la malla completa;
+· ``desplazada/``: los finales ``Con(base + inc_sum, ...)`` del cálculo
+  original con un `area_interes` fuera de la retícula de las bases
+  (``final_<dim>.npy`` y su malla en ``final_<dim>.json``, más
+  ``area.json``), para comprobar la alineación de los finales de la GP.
+
+`tests/` compara contra estos archivos si existen (se saltan si no):
+    python simulador_fixture.py tests/fixtures/arcgis
+
+Sin ArcGIS, ``--referencia`` escribe la salida del motor NumPy sobre las
+mismas entradas (versionada en ``tests/fixtures/simulador``):
+    python simulador_fixture.py --referencia tests/fixtures/simulador
+"""
+
+import json
+import os
+import sys
+from typing import List
+
+import numpy as np
+
+from simulador_raster import (DIMENSIONES, LIMITE_SUPERIOR, Grid, Project, RasterInputs,
+                              fixture_inputs, indicadores, simulate)
+
+# ───────────────────── 1 · ENTRADAS DEL FIXTURE ─────────────────────────────
+FIXTURE_SHAPE = (40, 50)
+FIXTURE_SEED = 0
+
+
+def fixture_rasters() -> RasterInputs:
+    """Entradas del fixture (las mismas en ArcGIS y en las pruebas)."""
+    return fixture_inputs(*FIXTURE_SHAPE, seed=FIXTURE_SEED)
+
+
+def fixture_projects(inputs: RasterInputs) -> List[Project]:
+    """Proyectos fijos dentro de la malla (uno cerca de cada esquina, uno
+    en el parque y dos en la misma celda)."""
+    x0, y0, x1, y1 = inputs.grid.extent
+
+    def at(fx, fy):
+        return x0 + fx * (x1 - x0), y1 - fy * (y1 - y0)
+
+    return [
+        Project(1, *at(0.15, 0.20), 10, 0, 5, 1500),
+        Project(2, *at(0.80, 0.25), 0, 8, 0, 800),
+        Project(3, *at(0.60, 0.40), 5, 5, 5, 2500),   # dentro del parque
+        Project(4, *at(0.30, 0.85), 0, 0, 10, 1200),
+        Project(5, *at(0.30, 0.85), 6, 0, 0, 400),    # misma celda que el 4
+    ]
+
+
+def shifted_area(grid: Grid) -> tuple:
+    """Extensión de `area_interes` dentro de la malla pero desplazada una
+    fracción de celda respecto de ella (x_min, y_min, x_max, y_max)."""
+    x0, y0, x1, y1 = grid.extent
+    cs = grid.cell_size
+    return x0 + 2.3 * cs, y0 + 1.6 * cs, x1 - 3.7 * cs, y1 - 2.4 * cs
+
+
+# ───────────────────── 2 · EXPORTACIÓN (ArcGIS) ─────────────────────────────
+def export_arcgis_fixture(directorio: str, workspace: str = "memory"):
+    """Escribe el fixture de referencia (requiere arcpy + Spatial)."""
+    import arcpy  # opcional: solo en ArcGIS Pro
+    from arcpy.sa import CellStatistics, Con, DistanceAccumulation, Exp, Raster, SetNull
+
+    arcpy.CheckOutExtension("Spatial")
+    arcpy.env.overwriteOutput = True
+    inputs = fixture_rasters()
+    projects = fixture_projects(inputs)
+    grid = inputs.grid
+    sr = arcpy.SpatialReference(4326)
+    esquina = arcpy.Point(grid.extent[0], grid.extent[1])
+    os.makedirs(directorio, exist_ok=True)
+    inputs.save(directorio)
+    with open(os.path.join(directorio, "proyectos.json"), "w", encoding="utf-8") as fh:
+        json.dump([p._asdict() for p in projects], fh, indent=1)
+
+    def to_raster(arr: np.ndarray, name: str) -> str:
+        with arcpy.EnvManager(outputCoordinateSystem=sr):
+            ras = arcpy.NumPyArrayToRaster(np.asarray(arr, dtype=float), esquina,
+                                           grid.cell_size, grid.cell_size, np.nan)
+        path = f"{workspace}/{name}"
+        ras.save(path)
+        return path
+
+    def to_array(raster) -> np.ndarray:
+        return arcpy.RasterToNumPyArray(raster, esquina, grid.n_cols, grid.n_rows,
+                                        nodata_to_value=np.nan).astype(float)
+
+    ref = to_raster(inputs.penalty, "fx_penalizacion")
+    fc = arcpy.CreateFeatureclass_management(workspace, "fx_proyectos", "POINT",
+                                             spatial_reference=sr).getOutput(0)
+    arcpy.AddField_management(fc, "PROJECT_ID", "LONG")
+    with arcpy.da.InsertCursor(fc, ["SHAPE@XY", "PROJECT_ID"]) as ic:
+        for p in projects:
+            ic.insertRow([(p.lon, p.lat), p.oid])
+    lyr = arcpy.MakeFeatureLayer_management(fc, "fx_proyectos_lyr").getOutput(0)
+
+    env = dict(extent=ref, snapRaster=ref, cellSize=grid.cell_size, outputCoordinateSystem=sr)
+    for p in projects:
+        arcpy.SelectLayerByAttribute_management(lyr, "NEW_SELECTION", f"PROJECT_ID = {p.oid}")
+        with arcpy.EnvManager(**env):
+            dist = DistanceAccumulation(lyr, distance_method="GEODESIC",
+                                        vertical_factor="BINARY 1 -30 30",
+                                        horizontal_factor="BINARY 1 45")
+        np.save(os.path.join(directorio, f"distancia_{p.oid}.npy"), to_array(dist))
+
+    # Cálculo original de script_tool: Con(base + inc_sum, ...) sin snapRaster
+    bases = {dim: to_raster(inputs.bases[dim], f"fx_{dim.lower()}") for dim in DIMENSIONES}
+
+    def poligono(name: str, extent) -> str:
+        x_min, y_min, x_max, y_max = extent
+        path = arcpy.CreateFeatureclass_management(workspace, name, "POLYGON",
+                                                   spatial_reference=sr).getOutput(0)
+        with arcpy.da.InsertCursor(path, ["SHAPE@"]) as ic:
+            corners = [(x_min, y_min), (x_min, y_max), (x_max, y_max), (x_max, y_min)]
+            ic.insertRow([arcpy.Polygon(arcpy.Array([arcpy.Point(*c) for c in corners]), sr)])
+        return path
+
+    def finales_originales(area: str) -> dict:
+        deltas = {dim: [] for dim in DIMENSIONES}
+        for p in projects:
+            arcpy.SelectLayerByAttribute_management(lyr, "NEW_SELECTION", f"PROJECT_ID = {p.oid}")
+            with arcpy.EnvManager(extent=area, cellSize=grid.cell_size, outputCoordinateSystem=sr):
+                dist = DistanceAccumulation(lyr, distance_method="GEODESIC",
+                                            vertical_factor="BINARY 1 -30 30",
+                                            horizontal_factor="BINARY 1 45")
+            dist_adj = dist * Raster(ref)
+            for dim, valor in p.valores().items():
+                if valor > 0:
+                    impacto = Exp(-dist_adj / float(max(p.radio, 1))) + 1
+                    deltas[dim].append((impacto - 1) * valor * (1 - Raster(bases[dim]) / 100.0))
+        finales = {}
+        for dim, incs in deltas.items():
+            inc_sum = incs[0] if len(incs) == 1 else CellStatistics(incs, "SUM", "DATA")
+            base = Raster(bases[dim])
+            finales[dim] = Con(base + inc_sum > LIMITE_SUPERIOR, LIMITE_SUPERIOR, base + inc_sum)
+        return finales
+
+    # Área alineada (la malla completa): finales y medias con la máscara
+    mascara = SetNull(Raster(to_raster(inputs.mask.astype(float), "fx_mascara")) == 0, 1)
+    area = poligono("fx_area", grid.extent)
+    medias = {}
+    for dim, final_r in finales_originales(area).items():
+        np.save(os.path.join(directorio, f"final_{dim.lower()}.npy"), to_array(final_r))
+        with arcpy.EnvManager(mask=mascara, extent=area):
+            val = arcpy.GetRasterProperties_management(final_r, "MEAN").getOutput(0)
+        medias[dim] = float(val.replace(",", "."))
+    indice, vida = indicadores(medias)
+    with open(os.path.join(directorio, "medias.json"), "w", encoding="utf-8") as fh:
+        json.dump({"medias": medias, "indice": indice, "vida": vida}, fh, indent=1)
+
+    # Área desplazada una fracción de celda
+    extent = shifted_area(grid)
+    salida = os.path.join(directorio, "desplazada")
+    os.makedirs(salida, exist_ok=True)
+    with open(os.path.join(salida, "area.json"), "w", encoding="utf-8") as fh:
+        json.dump(list(extent), fh)
+    for dim, final_r in finales_originales(poligono("fx_area_desplazada", extent)).items():
+        desc = arcpy.Describe(final_r)
+        malla = {"x_min": desc.extent.XMin, "y_max": desc.extent.YMax,
+                 "cell_size": desc.meanCellWidth, "n_rows": desc.height, "n_cols": desc.width}
+        with open(os.path.join(salida, f"final_{dim.lower()}.json"), "w", encoding="utf-8") as fh:
+            json.dump(malla, fh)
+        np.save(os.path.join(salida, f"final_{dim.lower()}.npy"),
+                arcpy.RasterToNumPyArray(final_r, nodata_to_value=np.nan).astype(float))
+
+
+# ───────────────────── 3 · REFERENCIA DEL MOTOR (sin ArcGIS) ─────────────────
+def export_reference(directorio: str):
+    """Entradas, proyectos, medias y finales de `simulate` sobre el fixture.
+
+    Se versiona en ``tests/fixtures/simulador`` como ancla de regresión:
+    se regenera a propósito solo cuando cambia la fórmula del motor.
+    """
+    inputs = fixture_rasters()
+    projects = fixture_projects(inputs)
+    res = simulate(inputs, projects, keep_rasters=True)
+    inputs.save(directorio)
+    with open(os.path.join(directorio, "proyectos.json"), "w", encoding="utf-8") as fh:
+        json.dump([p._asdict() for p in projects], fh, indent=1)
+    with open(os.path.join(directorio, "medias.json"), "w", encoding="utf-8") as fh:
+        json.dump({"medias": res.medias, "indice": res.indice, "vida": res.vida}, fh, indent=1)
+    for dim, final in res.finales.items():
+        np.save(os.path.join(directorio, f"final_{dim.lower()}.npy"), final)
+
+
+if __name__ == "__main__":
+    # python simulador_fixture.py [directorio]            (ArcGIS Pro)
+    # python simulador_fixture.py --referencia [directorio]
+    args = sys.argv[1:]
+    if args[:1] == ["--referencia"]:
+        export_reference(args[1] if len(args) > 1 else os.path.join("tests", "fixtures", "simulador"))
+    else:
+        export_arcgis_fixture(args[0] if args else os.path.join("tests", "fixtures", "arcgis"))
@@ -0,0 +1,556 @@
+# -*- coding: utf-8 -*-
+"""
+Motor raster en NumPy del simulador de impacto (misma fórmula que
+`SimuladorGP.script_tool`, sin arcpy)
+· Rásters base (0-100), penalización y máscara como arreglos en memoria o
+  memory‑mapped (`.npy`)
+· Distancia geodésica (WGS84) desde cada proyecto al centro de cada celda
+· impacto = exp(-dist·penalización / radio) + 1
+  incremento = (impacto - 1) · valor · (1 - base/100), sumado por dimensión
+· Tope en `LIMITE_SUPERIOR`, media enmascarada, INDICE y VIDA
+arcpy solo se usa (opcional) para leer los rásters de la GP con
+`RasterInputs.from_arcpy`.
+
+Uso:
+    entradas = RasterInputs.from_directory("rasters/")        # .npy + malla.json
+    proyectos = projects_from_frame(read_projects("Libro1.csv"))   # mochila_carga
+    res = simulate(entradas, proyectos)
+    res.medias, res.indice, res.vida
+"""
+
+import hashlib
+import json
+import math
+import os
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+# ───────────────────── 1 · CONSTANTES (las de SimuladorGP) ──────────────────
+DIMENSIONES = ("SEGURIDAD", "GOBERNABILIDAD", "DESARROLLO")
+PESOS = {"SEGURIDAD": 0.45, "GOBERNABILIDAD": 0.30, "DESARROLLO": 0.25}
+LIMITE_SUPERIOR = 100
+CELL_SIZE = 0.002
+VIDA_MIN, VIDA_MAX = 62, 84
+
+# Elipsoide WGS84
+_WGS84_A = 6378137.0
+_WGS84_F = 1 / 298.257223563
+
+_ARCHIVOS = {"SEGURIDAD": "seguridad.npy", "GOBERNABILIDAD": "gobernabilidad.npy",
+             "DESARROLLO": "desarrollo.npy", "penalizacion": "penalizacion.npy",
+             "mascara": "mascara.npy"}
+
+
+# ───────────────────── 2 · MALLA Y ENTRADAS ─────────────────────────────────
+class Grid(NamedTuple):
+    """Malla geográfica norte‑arriba: la fila 0 es la de ``y_max``."""
+    x_min: float
+    y_max: float
+    cell_size: float
+    n_rows: int
+    n_cols: int
+
+    @classmethod
+    def from_extent(cls, x_min: float, y_min: float, x_max: float, y_max: float,
+                    cell_size: float = CELL_SIZE,
+                    origin: Optional[Tuple[float, float]] = None) -> "Grid":
+        """Malla que cubre la extensión.  Con ``origin`` (un vértice de otra
+        retícula, p. ej. la esquina de un ráster base) ``x_min`` baja e
+        ``y_max`` sube hasta esa retícula, como con ``arcpy.env.snapRaster``."""
+        if origin is not None:
+            ox, oy = origin
+            x_min = ox + math.floor(round((x_min - ox) / cell_size, 9)) * cell_size
+            y_max = oy + math.ceil(round((y_max - oy) / cell_size, 9)) * cell_size
+        n_cols = int(math.ceil(round((x_max - x_min) / cell_size, 9)))
+        n_rows = int(math.ceil(round((y_max - y_min) / cell_size, 9)))
+        return cls(x_min, y_max, cell_size, n_rows, n_cols)
+
+    @property
+    def shape(self):
+        return self.n_rows, self.n_cols
+
+    @property
+    def extent(self):
+        """(x_min, y_min, x_max, y_max)."""
+        return (self.x_min, self.y_max - self.n_rows * self.cell_size,
+                self.x_min + self.n_cols * self.cell_size, self.y_max)
+
+    def lon_centers(self) -> np.ndarray:
+        return self.x_min + (np.arange(self.n_cols) + 0.5) * self.cell_size
+
+    def lat_centers(self) -> np.ndarray:
+        return self.y_max - (np.arange(self.n_rows) + 0.5) * self.cell_size
+
+    def cell_of(self, lon: float, lat: float) -> Optional[tuple]:
+        """(fila, columna) de la celda que contiene el punto (None si cae fuera)."""
+        col = int(math.floor((lon - self.x_min) / self.cell_size))
+        row = int(math.floor((self.y_max - lat) / self.cell_size))
+        if 0 <= row < self.n_rows and 0 <= col < self.n_cols:
+            return row, col
+        return None
+
+
+class RasterInputs:
+    """Rásters de la simulación alineados a una misma ``Grid``.
+
+    ``bases``: dimensión → arreglo 0‑100 (NaN = NoData); ``penalty``: 1
+    normal, 2 parque (NaN = NoData); ``mask``: booleano, True dentro de
+    `area_interes`.  Los arreglos pueden ser memory‑maps de solo lectura.
+    """
+
+    def __init__(self, bases: Dict[str, np.ndarray], penalty: np.ndarray,
+                 mask: np.ndarray, grid: Grid):
+        missing = [dim for dim in DIMENSIONES if dim not in bases]
+        if missing:
+            raise KeyError(f"Faltan rásters base: {', '.join(missing)}")
+        for name, arr in [*bases.items(), ("penalizacion", penalty), ("mascara", mask)]:
+            if arr.shape != grid.shape:
+                raise ValueError(f"El ráster '{name}' mide {arr.shape}, la malla {grid.shape}")
+        self.bases = bases
+        self.penalty = penalty
+        self.mask = mask.astype(bool, copy=False)
+        self.grid = grid
+        self._penalty_version: Optional[str] = None
+
+    @property
+    def penalty_version(self) -> str:
+        """Hash del ráster de penalización (clave de `simulador_cache`)."""
+        if self._penalty_version is None:
+            self._penalty_version = array_version(self.penalty)
+        return self._penalty_version
+
+    @classmethod
+    def from_directory(cls, path: str, mmap: bool = True) -> "RasterInputs":
+        """Lee ``<dim>.npy``, ``penalizacion.npy``, ``mascara.npy`` y ``malla.json``."""
+        with open(os.path.join(path, "malla.json"), encoding="utf-8") as fh:
+            grid = Grid(**json.load(fh))
+        mode = "r" if mmap else None
+        arrays = {key: np.load(os.path.join(path, name), mmap_mode=mode)
+                  for key, name in _ARCHIVOS.items()}
+        return cls({dim: arrays[dim] for dim in DIMENSIONES}, arrays["penalizacion"],
+                   arrays["mascara"], grid)
+
+    def save(self, path: str):
+        """Escribe los arreglos para ``from_directory``."""
+        os.makedirs(path, exist_ok=True)
+        arrays = {**self.bases, "penalizacion": self.penalty, "mascara": self.mask}
+        for key, name in _ARCHIVOS.items():
+            np.save(os.path.join(path, name), np.asarray(arrays[key]))
+        with open(os.path.join(path, "malla.json"), "w", encoding="utf-8") as fh:
+            json.dump(self.grid._asdict(), fh)
+
+    @classmethod
+    def from_arcpy(cls, rasters_base: Dict[str, str], raster_penalizacion: str,
+                   area_interes: str, cell_size: float = CELL_SIZE,
+                   snap_raster: Optional[str] = None) -> "RasterInputs":
+        """Adaptador para las rutas de `SimuladorGP` (requiere arcpy + Spatial).
+
+        Todo se remuestrea a la extensión de ``area_interes`` con
+        ``cell_size`` (como el ``EnvManager`` de ``script_tool``).  Con
+        ``snap_raster`` la malla se alinea a las celdas de ese ráster, así
+        que los resultados caen sobre la retícula de las bases.
+        """
+        import arcpy  # opcional: solo en ArcGIS Pro / Enterprise
+        from arcpy.sa import Raster
+
+        ext = arcpy.Describe(area_interes).extent
+        origin = None
+        if snap_raster:
+            ref = arcpy.Describe(snap_raster).extent
+            origin = (ref.XMin, ref.YMax)
+        grid = Grid.from_extent(ext.XMin, ext.YMin, ext.XMax, ext.YMax, cell_size, origin)
+        corner = arcpy.Point(grid.extent[0], grid.extent[1])
+        sr = arcpy.SpatialReference(4326)
+
+        def to_array(raster) -> np.ndarray:
+            with arcpy.EnvManager(extent=area_interes, cellSize=cell_size,
+                                  outputCoordinateSystem=sr, snapRaster=snap_raster):
+                arr = arcpy.RasterToNumPyArray(raster * 1.0, corner, grid.n_cols, grid.n_rows,
+                                               nodata_to_value=np.nan)
+            return arr.astype(float, copy=False)
+
+        bases = {dim: to_array(Raster(path)) for dim, path in rasters_base.items()}
+        penalty = to_array(Raster(raster_penalizacion))
+        mask_path = "memory/mascara_area_interes"
+        with arcpy.EnvManager(extent=area_interes, cellSize=cell_size, outputCoordinateSystem=sr,
+                              snapRaster=snap_raster):
+            arcpy.conversion.FeatureToRaster(area_interes, arcpy.Describe(area_interes).OIDFieldName,
+                                             mask_path, cell_size)
+        mask = np.isfinite(to_array(Raster(mask_path)))
+        return cls(bases, penalty, mask, grid)
+
+
+def array_version(arr: np.ndarray) -> str:
+    """Hash del contenido, forma y tipo de un arreglo."""
+    arr = np.ascontiguousarray(arr)
+    h = hashlib.blake2b(digest_size=16)
+    h.update(repr((arr.shape, arr.dtype.str)).encode())
+    h.update(arr.data)
+    return h.hexdigest()
+
+
+class Project(NamedTuple):
+    oid: int
+    lon: float
+    lat: float
+    seguridad: float
+    gobernabilidad: float
+    desarrollo: float
+    radio: float   # AREAAFECTACION
+
+    def valores(self) -> Dict[str, float]:
+        return {"SEGURIDAD": self.seguridad, "GOBERNABILIDAD": self.gobernabilidad,
+                "DESARROLLO": self.desarrollo}
+
+
+def projects_from_json(atributos: List[dict], geometrias: List[dict]) -> List[Project]:
+    """Proyectos desde los JSON (ya parseados) de la GP: mismo cruce por ``objectid``."""
+    attr_by_id = {a["objectid"]: a for a in atributos}
+    out = []
+    for g in geometrias:
+        a = attr_by_id.get(g["objectid"])
+        if a:
+            out.append(Project(a["objectid"], float(g["longitude"]), float(g["latitude"]),
+                               float(a["seguridad"]), float(a["gobernabilidad"]),
+                               float(a["desarrollo"]), float(a["areaafectacion"])))
+    return out
+
+
+def projects_from_frame(df: pd.DataFrame, id_col: str = "id_proyecto") -> List[Project]:
+    """Proyectos desde filas con las columnas de `Libro1.csv` (x = lon, y = lat)."""
+    cols = [id_col, "x", "y", "seguridad", "gobernabilidad", "desarrollo", "areaafectacion"]
+    return [Project(int(r[0]), *map(float, r[1:])) for r in df[cols].itertuples(index=False, name=None)]
+
+
+# ───────────────────── 3 · DISTANCIA GEODÉSICA ──────────────────────────────
+def _lambert(beta1, beta2, h):
+    """Distancia de Lambert a partir de latitudes reducidas y el haversine
+    ``h = sin²(σ/2)`` (todo con broadcasting)."""
+    f = _WGS84_F
+    p, q = (beta1 + beta2) / 2, (beta2 - beta1) / 2
+    big_p = np.sin(p) ** 2 * np.cos(q) ** 2
+    big_q = np.cos(p) ** 2 * np.sin(q) ** 2
+    h = np.clip(h, 0.0, 1.0)
+    sigma = 2 * np.arcsin(np.sqrt(h))
+    sin_sigma = np.sin(sigma)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        # cos²(σ/2) = 1 - h,  sin²(σ/2) = h
+        corr = (sigma - sin_sigma) * big_p / (1 - h) + (sigma + sin_sigma) * big_q / h
+        dist = _WGS84_A * (sigma - f / 2 * corr)
+    return np.where(h > 0, dist, 0.0)
+
+
+def _reduced_lat(lat):
+    return np.arctan((1 - _WGS84_F) * np.tan(np.radians(lat)))
+
+
+def geodesic(lon1, lat1, lon2, lat2):
+    """Metros entre puntos (grados, WGS84) con broadcasting de NumPy.
+
+    Fórmula de Lambert para líneas largas: error < 10 m a 1000 km y de
+    centímetros a las distancias de la simulación (decenas de km).
+    """
+    beta1, beta2 = _reduced_lat(lat1), _reduced_lat(lat2)
+    dlon = np.radians(np.subtract(lon2, lon1))
+    h = np.sin((beta2 - beta1) / 2) ** 2 + np.cos(beta1) * np.cos(beta2) * np.sin(dlon / 2) ** 2
+    return _lambert(beta1, beta2, h)
+
+
+def geodesic_distance(grid: Grid, lon: float, lat: float, snap: bool = True) -> Optional[np.ndarray]:
+    """Metros (elipsoide WGS84) del proyecto al centro de cada celda.
+
+    Con ``snap`` el origen es el centro de la celda del proyecto, como al
+    rasterizar la fuente en ``DistanceAccumulation``; si cae fuera de la
+    malla devuelve None (la GP tampoco produce distancias para esa fuente).
+    Los términos del haversine son separables en filas × columnas, así
+    que solo la combinación final recorre la malla completa.
+    """
+    cell = grid.cell_of(lon, lat)
+    if cell is None:
+        return None
+    if snap:
+        lon = grid.x_min + (cell[1] + 0.5) * grid.cell_size
+        lat = grid.y_max - (cell[0] + 0.5) * grid.cell_size
+
+    beta1 = _reduced_lat(lat)
+    beta2 = _reduced_lat(grid.lat_centers())[:, None]
+    row_term = np.sin((beta2 - beta1) / 2) ** 2
+    col_term = np.sin(np.radians(grid.lon_centers() - lon) / 2)[None, :] ** 2
+    h = row_term + (np.cos(beta1) * np.cos(beta2)) * col_term
+    return _lambert(beta1, beta2, h)
+
+
+def impact_window(grid: Grid, lon: float, lat: float, radio: float, tol: float,
+                  p_min: float) -> Optional[Tuple[slice, slice]]:
+    """Filas y columnas fuera de las cuales ``exp(-dist·penalización / radio)``
+    es < ``tol``.
+
+    Alcance: ``radio · ln(1/tol) / p_min`` metros (``p_min`` = penalización
+    mínima), pasado a celdas con el paso más corto de la malla (meridiano
+    cerca del ecuador, paralelo en la fila más alejada de él) más una
+    celda de margen.  None si el punto cae fuera de la malla.
+    """
+    cell = grid.cell_of(lon, lat)
+    if cell is None:
+        return None
+    cs = grid.cell_size
+    lats = grid.lat_centers()[[0, -1]]
+    lat_far = float(np.max(np.abs(lats)))
+    lat_eq = float(np.clip(0.0, lats.min(), lats.max()))
+    dy = float(geodesic(0.0, lat_eq - cs / 2, 0.0, lat_eq + cs / 2))
+    dx = float(geodesic(0.0, lat_far, cs, lat_far))
+    reach = max(radio, 1) * math.log(1 / tol) / p_min
+    n_r, n_c = int(math.ceil(reach / dy)) + 1, int(math.ceil(reach / dx)) + 1
+    r, c = cell
+    return (slice(max(r - n_r, 0), min(r + n_r + 1, grid.n_rows)),
+            slice(max(c - n_c, 0), min(c + n_c + 1, grid.n_cols)))
+
+
+def window_adjusted_distance(inputs: RasterInputs, lon: float, lat: float,
+                             window: Tuple[slice, slice]) -> np.ndarray:
+    """``adjusted_distance`` calculada solo dentro de ``window``."""
+    grid = inputs.grid
+    rows, cols = window
+    row, col = grid.cell_of(lon, lat)
+    sub = Grid(grid.x_min + cols.start * grid.cell_size, grid.y_max - rows.start * grid.cell_size,
+               grid.cell_size, rows.stop - rows.start, cols.stop - cols.start)
+    lon_c = grid.x_min + (col + 0.5) * grid.cell_size
+    lat_c = grid.y_max - (row + 0.5) * grid.cell_size
+    return geodesic_distance(sub, lon_c, lat_c, snap=False) * inputs.penalty[window]
+
+
+# ───────────────────── 4 · MOTOR ────────────────────────────────────────────
+class SimulationResult(NamedTuple):
+    medias: Dict[str, float]
+    indice: float
+    vida: float
+    finales: Optional[Dict[str, np.ndarray]]   # con keep_rasters=True
+    error: Optional[Dict[str, float]] = None   # cota del modo con ventanas (tol)
+
+
+def indicadores(medias: Dict[str, float]) -> tuple:
+    """(INDICE, VIDA) a partir de las medias, como en ``script_tool``."""
+    indice = sum(medias[dim] * PESOS[dim] for dim in DIMENSIONES)
+    vida = VIDA_MIN + (VIDA_MAX - VIDA_MIN) * (indice / 100)
+    return indice, vida
+
+
+def masked_mean(raster: np.ndarray, mask: np.ndarray) -> float:
+    """MEAN de ``GetRasterProperties`` con máscara: ignora NoData (NaN)."""
+    vals = raster[mask]
+    vals = vals[np.isfinite(vals)]
+    return float(vals.mean()) if len(vals) else float("nan")
+
+
+def adjusted_distance(inputs: RasterInputs, lon: float, lat: float) -> Optional[np.ndarray]:
+    """``dist * Raster(raster_penalizacion)`` de ``script_tool`` (None fuera de la malla)."""
+    dist = geodesic_distance(inputs.grid, lon, lat)
+    if dist is None:
+        return None
+    return dist * inputs.penalty
+
+
+class ImpactAccumulator:
+    """Suma por dimensión de los incrementos, proyecto por proyecto.
+
+    Reemplaza la lista de rásters ``R_{dim}_{oid}_delta`` + ``CellStatistics``
+    de ``script_tool``: la memoria es una suma, una marca de datos y la
+    necesidad por dimensión más dos buffers de trabajo, sin importar
+    cuántos proyectos se agreguen.  ``exp(-dist_adj / radio)`` se calcula
+    una sola vez por proyecto.
+
+    Con ``window`` en ``add`` el incremento se suma solo en ese recorte;
+    lo que queda fuera (< ``tol`` · valor · necesidad por celda) se acota
+    en ``error_bound``.
+    """
+
+    def __init__(self, inputs: RasterInputs, dtype=np.float64, tol: Optional[float] = None):
+        shape = inputs.grid.shape
+        self.inputs = inputs
+        self.tol = tol
+        self.necesidad = {dim: (1 - inputs.bases[dim] / 100.0).astype(dtype, copy=False)
+                          for dim in DIMENSIONES}
+        self.sums = {dim: np.zeros(shape, dtype) for dim in DIMENSIONES}
+        self.has_data = {dim: np.zeros(shape, bool) for dim in DIMENSIONES}
+        self.counts = {dim: 0 for dim in DIMENSIONES}
+        self._windows: List[tuple] = []
+        self._expo = np.empty(shape, dtype)
+        self._inc = np.empty(shape, dtype)
+        self._ok = np.empty(shape, bool)
+
+    def add(self, dist_adj: np.ndarray, radio: float, valores: Dict[str, float],
+            window: Optional[Tuple[slice, slice]] = None):
+        """Suma el incremento de un proyecto con distancia ajustada ``dist_adj``
+        (del tamaño de ``window`` si se da)."""
+        dims = [(dim, valor) for dim, valor in valores.items() if valor > 0]
+        if not dims:
+            return
+        if window is None:
+            window = (slice(None), slice(None))
+        else:
+            if self.tol is None:
+                raise ValueError("add con window requiere un ImpactAccumulator con tol")
+            self._windows.append((window, dims))
+        h, w = dist_adj.shape
+        expo, inc, ok = self._expo[:h, :w], self._inc[:h, :w], self._ok[:h, :w]
+        np.divide(dist_adj, -float(max(radio, 1)), out=expo)
+        np.exp(expo, out=expo)                       # impacto - 1
+        for dim, valor in dims:
+            sums, has_data = self.sums[dim][window], self.has_data[dim][window]
+            np.multiply(expo, valor, out=inc)
+            np.multiply(inc, self.necesidad[dim][window], out=inc)
+            # NoData (NaN) no suma: CellStatistics(..., "DATA")
+            np.isfinite(inc, out=ok)
+            np.add(sums, inc, out=sums, where=ok)
+            np.logical_or(has_data, ok, out=has_data)
+            self.counts[dim] += 1
+
+    def _valid(self, dim: str) -> np.ndarray:
+        """Celdas donde la distancia completa daría un incremento con datos."""
+        return np.isfinite(self.inputs.penalty) & np.isfinite(self.inputs.bases[dim])
+
+    def final(self, dim: str) -> np.ndarray:
+        """``Con(base + suma > 100, 100, base + suma)``; NaN donde no hubo datos."""
+        has_data = self.has_data[dim]
+        if self._windows:
+            # fuera de las ventanas el incremento existe aunque sea ~0
+            has_data = has_data | self._valid(dim)
+        total = np.where(has_data, self.sums[dim], np.nan)
+        total += self.inputs.bases[dim]
+        np.minimum(total, LIMITE_SUPERIOR, out=total)
+        return total
+
+    def error_bound(self) -> Optional[Dict[str, float]]:
+        """Cota de lo que falta en cada media (y en INDICE y VIDA) por las
+        ventanas; None si no se usaron.
+
+        Cada celda fuera de la ventana de un proyecto pierde menos de
+        ``tol · valor · necesidad``; el tope en 100 no agranda el error.
+        La media exacta está en ``[media, media + cota]``.  La suma de
+        necesidad fuera de cada ventana sale de una tabla de sumas
+        acumuladas, una por dimensión.
+        """
+        if self.tol is None:
+            return None
+        mask = self.inputs.mask
+        bounds = {}
+        for dim in DIMENSIONES:
+            entries = [(win, valor) for win, dims in self._windows
+                       for d, valor in dims if d == dim]
+            valid = mask & self._valid(dim)
+            n_valid = int(valid.sum())
+            if not entries or not n_valid:
+                bounds[dim] = 0.0
+                continue
+            weight = np.where(valid, self.necesidad[dim], 0.0)
+            sat = np.zeros((weight.shape[0] + 1, weight.shape[1] + 1))
+            np.cumsum(np.cumsum(weight, axis=0), axis=1, out=sat[1:, 1:])
+            total = sat[-1, -1]
+            lost = 0.0
+            for (rows, cols), valor in entries:
+                inside = (sat[rows.stop, cols.stop] - sat[rows.start, cols.stop]
+                          - sat[rows.stop, cols.start] + sat[rows.start, cols.start])
+                lost += valor * max(total - inside, 0.0)
+            bounds[dim] = self.tol * lost / n_valid
+        indice, _ = indicadores(bounds)
+        bounds["INDICE"] = indice
+        bounds["VIDA"] = (VIDA_MAX - VIDA_MIN) * indice / 100
+        return bounds
+
+    def result(self, keep_rasters: bool = False) -> SimulationResult:
+        """Medias enmascaradas, INDICE y VIDA (media 0 si la dimensión no
+        recibió ningún incremento, igual que en la GP)."""
+        medias, finales = {}, {}
+        for dim in DIMENSIONES:
+            if not self.counts[dim]:
+                continue
+            final = self.final(dim)
+            medias[dim] = masked_mean(final, self.inputs.mask)
+            if keep_rasters:
+                finales[dim] = final
+        medias = {dim: medias.get(dim, 0) for dim in DIMENSIONES}
+        indice, vida = indicadores(medias)
+        return SimulationResult(medias, indice, vida, finales if keep_rasters else None,
+                                self.error_bound())
+
+
+def simulate(
+    inputs: RasterInputs,
+    projects: Iterable[Project],
+    keep_rasters: bool = False,
+    cache=None,
+    dtype=np.float64,
+    tol: Optional[float] = None,
+) -> SimulationResult:
+    """Medias por dimensión, INDICE y VIDA para un conjunto de proyectos.
+
+    Misma fórmula que ``script_tool``: un incremento por proyecto y
+    dimensión (solo si su valor es > 0), suma por celda (NoData se ignora
+    como en ``CellStatistics(..., "DATA")``), tope y media enmascarada.
+    Los incrementos se acumulan en un ``ImpactAccumulator``, así que la
+    memoria no crece con el número de proyectos.  Con ``cache`` (un
+    `simulador_cache.DistanceCache`) las distancias ajustadas se
+    reutilizan entre llamadas.
+
+    Con ``tol`` (0 < tol < 1) cada proyecto se evalúa solo en la ventana
+    de ``impact_window`` (costo proporcional al área de impacto, no a la
+    región) y ``result.error`` trae la cota de lo descartado.
+    """
+    p_min = None
+    if tol is not None:
+        if not 0 < tol < 1:
+            raise ValueError("tol debe estar en (0, 1)")
+        p_min = float(np.nanmin(inputs.penalty))
+        if not p_min > 0:
+            raise ValueError("El modo con ventanas requiere penalización > 0")
+    acc = ImpactAccumulator(inputs, dtype, tol)
+    for proj in projects:
+        if not any(valor > 0 for valor in proj.valores().values()):
+            continue
+        window = None
+        if tol is not None:
+            window = impact_window(inputs.grid, proj.lon, proj.lat, proj.radio, tol, p_min)
+            if window is None:
+                continue
+        if cache is not None:
+            dist_adj = cache.adjusted_distance(inputs, proj.lon, proj.lat)
+            if dist_adj is not None and window is not None:
+                dist_adj = dist_adj[window]   # memory-map: solo se leen esas páginas
+        elif window is not None:
+            dist_adj = window_adjusted_distance(inputs, proj.lon, proj.lat, window)
+        else:
+            dist_adj = adjusted_distance(inputs, proj.lon, proj.lat)
+        if dist_adj is None:
+            continue
+        acc.add(dist_adj, proj.radio, proj.valores(), window)
+    return acc.result(keep_rasters)
+
+
+# ───────────────────── 5 · RÁSTERS DE PRUEBA ────────────────────────────────
+def fixture_inputs(
+    n_rows: int = 300,
+    n_cols: int = 350,
+    x_min: float = -74.3,
+    y_max: float = 11.4,
+    cell_size: float = CELL_SIZE,
+    seed: int = 0,
+) -> RasterInputs:
+    """Rásters sintéticos sobre la zona de `Libro1.csv` (bases suaves 0‑100,
+    un "parque" con penalización 2, bordes NoData y máscara elíptica)."""
+    rng = np.random.default_rng(seed)
+    grid = Grid(x_min, y_max, cell_size, n_rows, n_cols)
+    yy, xx = np.mgrid[0:n_rows, 0:n_cols] / np.array([n_rows, n_cols])[:, None, None]
+    bases = {}
+    for dim in DIMENSIONES:
+        a, b, c = rng.uniform(0.5, 3, 3)
+        field = 50 + 30 * np.sin(a * np.pi * xx + c) * np.cos(b * np.pi * yy)
+        bases[dim] = np.clip(field + rng.normal(0, 3, grid.shape), 0, 100)
+    penalty = np.ones(grid.shape)
+    penalty[(xx - 0.6) ** 2 + (yy - 0.4) ** 2 < 0.03] = 2
+    penalty[:2, :] = np.nan
+    for arr in bases.values():
+        arr[:, -2:] = np.nan
+    mask = ((xx - 0.5) / 0.48) ** 2 + ((yy - 0.5) / 0.45) ** 2 <= 1
+    return RasterInputs(bases, penalty, mask, grid)
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+"""Instancias aleatorias con semilla para las pruebas de equivalencia."""
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+BASE_LIFE = 72.0
+
+
+def random_portfolio(seed: int, n_groups=(2, 6), n_variants=(1, 3), zero_share=0.25,
+                     tie_decimals=1) -> pd.DataFrame:
+    """Tabla tipo `Libro1.csv` (RangeIndex) con variantes de coste 0 y
+    Δ redondeados para forzar empates exactos."""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for g in range(int(rng.integers(*n_groups, endpoint=True))):
+        for _ in range(int(rng.integers(*n_variants, endpoint=True))):
+            cost = 0 if rng.random() < zero_share else int(rng.integers(1, 11)) * 10
+            delta = round(float(rng.uniform(-0.3, 1.0)), tie_decimals)
+            rows.append({"proyecto": f"P{g}", "vida": BASE_LIFE + delta,
+                         "valorinversion": cost, "id_proyecto": len(rows) + 1})
+    return pd.DataFrame(rows)
+
+
+def random_budget(df: pd.DataFrame, seed: int) -> float:
+    rng = np.random.default_rng(seed + 10_000)
+    return float(rng.integers(0, max(int(df["valorinversion"].sum() * 0.7), 1) // 10 + 1) * 10)
+
+
+def combos(result: pd.DataFrame):
+    """(Δ redondeado, coste, índices) de cada fila, en orden."""
+    if not len(result):
+        return []
+    return [(round(d, 9), c, tuple(i)) for d, c, i in
+            zip(result["delta_total"], result["costo_total"], result["_indices"])]
+
+
+ARCGIS_FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "arcgis")
+
+
+def arcgis_fixture(name: str = "malla.json") -> str:
+    """Directorio del fixture de ArcGIS (`simulador_fixture.py`); salta la
+    prueba si ``name`` no se ha exportado todavía."""
+    if not os.path.exists(os.path.join(ARCGIS_FIXTURE, name)):
+        pytest.skip(f"sin fixture de ArcGIS ({name}): python simulador_fixture.py {ARCGIS_FIXTURE}")
+    return ARCGIS_FIXTURE
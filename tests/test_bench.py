@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""mochila_bench: generador, verificación cruzada y comparación con la base."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import mochila_bench
+from mochila_bench import (BASE_LIFE, compare_baseline, default_budget, run_grid,
+                           synthetic_portfolio)
+
+TINY = {"groups": [6], "scale": [1], "top_n": [1, 4]}
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_synthetic_portfolio(seed):
+    df = synthetic_portfolio(40, max_variants=3, seed=seed)
+    pd.testing.assert_frame_equal(df, synthetic_portfolio(40, max_variants=3, seed=seed))
+    assert not df.equals(synthetic_portfolio(40, max_variants=3, seed=seed + 1))
+    assert df["proyecto"].nunique() == 40
+    assert df.groupby("proyecto").size().max() <= 3
+    assert df["id_proyecto"].tolist() == list(range(1, len(df) + 1))
+    cost = df["valorinversion"]
+    assert (cost % 100 == 0).all() and cost.between(1_200, 3_800).all()
+    dims = df[["delta_seg", "delta_gob", "delta_des"]].to_numpy()
+    np.testing.assert_allclose(df["delta_indice"], dims @ [0.45, 0.30, 0.25])
+    np.testing.assert_allclose(df["delta_vida"], 0.22 * df["delta_indice"])
+    np.testing.assert_allclose(df["vida"], BASE_LIFE + df["delta_vida"])
+
+
+def test_default_budget():
+    df = synthetic_portfolio(30, seed=2)
+    budget = default_budget(df)
+    assert budget % 100 == 0
+    per_group = df.groupby("proyecto")["valorinversion"].mean().sum()
+    assert abs(budget - 0.45 * per_group) <= 50
+    assert default_budget(df, share=0.9) > budget
+
+
+def _run(**kw):
+    return run_grid(TINY, repeat=1, memory=False, progress=False, **kw)
+
+
+def test_run_grid_cross_checks_every_solver():
+    report = _run()
+    assert report["mismatches"] == []
+    assert report["skipped"] == []
+    solvers = {(row["solver"], row["top_n"]) for row in report["results"]}
+    assert ("mckp:legacy", None) in solvers and ("frontier", None) in solvers
+    assert {name for name, n in solvers if n == 4} == {
+        "top_n:kbest", "top_n:kbest+reduce", "top_n:bnb", "top_n:anytime", "top_n:backtrack"}
+    assert all(row["time_min"] <= row["time_median"] for row in report["results"])
+    assert report["meta"]["grid"] == TINY
+
+
+def test_memory_is_measured_apart():
+    report = run_grid({"groups": [4], "scale": [1], "top_n": [2]}, repeat=1, progress=False)
+    assert all(row["peak_bytes"] > 0 for row in report["results"])
+
+
+def test_limits_skip_slow_solvers(monkeypatch):
+    monkeypatch.setitem(mochila_bench.LIMITS, "backtrack_groups", 5)
+    monkeypatch.setitem(mochila_bench.LIMITS, "legacy_cells", 1)
+    monkeypatch.setitem(mochila_bench.LIMITS, "bnb_work", 6)   # G·N: pasa N=1, no N=4
+    report = _run()
+    skipped = {(row["solver"], row["top_n"]) for row in report["skipped"]}
+    assert skipped == {("mckp:legacy", None), ("top_n:backtrack", 1), ("top_n:backtrack", 4),
+                       ("top_n:bnb", 4), ("top_n:anytime", 4)}
+    measured = {(row["solver"], row["top_n"]) for row in report["results"]}
+    assert not skipped & measured
+    assert report["mismatches"] == []
+
+
+def test_kbest_guard_skips_kbest(monkeypatch):
+    monkeypatch.setattr(mochila_bench, "KBEST_MAX_PARTIALS", 0)
+    report = _run()
+    assert {row["solver"] for row in report["skipped"]} == {"top_n:kbest", "top_n:kbest+reduce"}
+    assert report["mismatches"] == []
+
+
+def test_wrong_solver_is_reported(monkeypatch):
+    solvers = mochila_bench._top_n_solvers
+
+    def with_broken(*args):
+        out = solvers(*args)
+        good = out["top_n:bnb"]
+        out["top_n:bnb"] = lambda df, b, s, n: good(df, b, s, n).iloc[::-1]
+        return out
+
+    monkeypatch.setattr(mochila_bench, "_top_n_solvers", with_broken)
+    bad = _run()["mismatches"]
+    assert {(row["solver"], row["top_n"]) for row in bad} == {("top_n:bnb", 4)}
+
+
+def _row(solver, time_min, top_n=None):
+    return {"solver": solver, "groups": 10, "variants": 20, "scale": 1, "top_n": top_n,
+            "time_min": time_min}
+
+
+def test_compare_baseline():
+    baseline = {"results": [_row("a", 0.10), _row("b", 0.10), _row("c", 0.001),
+                            _row("d", 0.10, top_n=5)]}
+    report = {"results": [_row("a", 0.12),      # dentro de la tolerancia
+                          _row("b", 0.30),      # regresión ×3
+                          _row("c", 0.004),     # ambos bajo MIN_SECONDS
+                          _row("d", 0.50),      # otro N: sin base
+                          _row("e", 9.0)]}      # caso nuevo
+    regs = compare_baseline(report, baseline)
+    assert [r["case"] for r in regs] == ["b|G=10|V=20|scale=1|N=None"]
+    assert regs[0]["ratio"] == pytest.approx(3.0)
+    assert [r["case"] for r in compare_baseline(report, baseline, tolerance=1.1)] == \
+        ["a|G=10|V=20|scale=1|N=None", "b|G=10|V=20|scale=1|N=None"]
+    assert compare_baseline(report, {}) == []
@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+"""SolverCache y DistanceCache: claves, resultados guardados y disco compartido."""
+
+import os
+import threading
+
+import numpy as np
+import pytest
+
+from mochila import mckp_max_delta, top_n_combinations
+from mochila_cache import SolverCache, cached_mckp_max_delta, cached_top_n_combinations
+from simulador_cache import DistanceCache
+from simulador_raster import adjusted_distance, fixture_inputs
+from helpers import BASE_LIFE, combos, random_budget, random_portfolio
+
+ARGS = ("proyecto", "vida", "valorinversion", BASE_LIFE)
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_cached_results_match_solvers(seed, tmp_path):
+    df = random_portfolio(seed, zero_share=0.3)
+    budget = random_budget(df, seed)
+    cache = SolverCache(directory=str(tmp_path))
+    ref_top = top_n_combinations(df, *ARGS, budget, scale=1, top_n=5)
+    _, ref_delta, ref_cost = mckp_max_delta(df, *ARGS, budget, scale=1)
+    for _ in range(2):
+        assert combos(cached_top_n_combinations(df, *ARGS, budget, scale=1, top_n=5,
+                                                cache=cache)) == combos(ref_top)
+        assert combos(cached_top_n_combinations(df, *ARGS, budget, scale=1, top_n=2,
+                                                cache=cache)) == combos(ref_top)[:2]
+        _, delta, cost = cached_mckp_max_delta(df, *ARGS, budget, scale=1, cache=cache)
+        assert (delta, cost) == (ref_delta, ref_cost)
+    assert cache.misses == 2 and cache.hits == 4
+    # Otro proceso (otro objeto) lee el mismo directorio
+    other = SolverCache(directory=str(tmp_path))
+    assert combos(cached_top_n_combinations(df, *ARGS, budget, scale=1, top_n=5,
+                                            cache=other)) == combos(ref_top)
+    assert other.hits == 1
+
+
+def test_deadline_is_not_keyed_and_cut_results_are_not_stored():
+    df = random_portfolio(3, n_groups=(6, 6))
+    cache = SolverCache()
+    kw = dict(scale=1, top_n=3, method="anytime", cache=cache)
+    cut = cached_top_n_combinations(df, *ARGS, 200, deadline=0.0, **kw)
+    assert cut.attrs["exact"] is False
+    assert len(cache._mem) == 0
+    seen = []
+    full = cached_top_n_combinations(df, *ARGS, 200, deadline=30.0, callback=seen.append, **kw)
+    assert full.attrs["exact"] is True and seen
+    again = cached_top_n_combinations(df, *ARGS, 200, deadline=5.0, progress_interval=0.1, **kw)
+    assert cache.hits == 1 and combos(again) == combos(full)
+
+
+def test_concurrent_puts_share_the_directory(tmp_path):
+    caches = [SolverCache(directory=str(tmp_path), max_bytes=2_000) for _ in range(4)]
+    errors = []
+
+    def work(cache):
+        try:
+            for i in range(50):
+                cache.put(f"k{i % 5}", np.arange(100 + i))
+        except Exception as exc:  # pragma: no cover - lo que se prueba es que no pase
+            errors.append(exc)
+
+    threads = [threading.Thread(target=work, args=(c,)) for c in caches]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors
+    assert not [n for n in os.listdir(tmp_path) if n.endswith(".tmp")]
+    for name in os.listdir(tmp_path):
+        value = SolverCache(directory=str(tmp_path)).get(name[:-4])
+        assert value is not None and value[0] == 0
+
+
+def test_eviction_skips_vanished_files(tmp_path, monkeypatch):
+    cache = SolverCache(directory=str(tmp_path), max_bytes=0)
+    real_listdir = os.listdir
+    monkeypatch.setattr(os, "listdir", lambda d: real_listdir(d) + ["gone.pkl"])
+    cache.put("a", list(range(10)))
+    cache.clear()
+
+
+def test_distance_cache_matches_direct(tmp_path):
+    inputs = fixture_inputs(40, 50)
+    lon, lat = inputs.grid.x_min + 0.01, inputs.grid.y_max - 0.01
+    for compress in (False, True):
+        cache = DistanceCache(str(tmp_path / str(compress)), compress=compress, dtype=np.float64)
+        ref = adjusted_distance(inputs, lon, lat)
+        for _ in range(2):
+            np.testing.assert_array_equal(cache.adjusted_distance(inputs, lon, lat), ref)
+        assert (cache.hits, cache.misses) == (1, 1)
+        reread = DistanceCache(str(tmp_path / str(compress)), compress=compress, dtype=np.float64)
+        np.testing.assert_array_equal(reread.adjusted_distance(inputs, lon, lat), ref)
+        assert reread.hits == 1
+
+
+def test_distance_cache_concurrent_puts(tmp_path):
+    caches = [DistanceCache(str(tmp_path), max_bytes=20_000) for _ in range(4)]
+    errors = []
+
+    def work(cache):
+        try:
+            for i in range(50):
+                cache.put(f"k{i % 5}", np.full(1000, i % 5))
+        except Exception as exc:  # pragma: no cover
+            errors.append(exc)
+
+    threads = [threading.Thread(target=work, args=(c,)) for c in caches]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors
+    assert not [n for n in os.listdir(tmp_path) if n.endswith(".tmp")]
+    fresh = DistanceCache(str(tmp_path))
+    for name in os.listdir(tmp_path):
+        key = name[:-4]
+        assert fresh.get(key)[0] == int(key[1:])
+
+
+def test_numeric_params_share_a_key():
+    df = random_portfolio(2)
+    cache = SolverCache()
+    for budget, scale in ((200, 1), (200.0, 1.0), (np.int64(200), np.int32(1)),
+                          (np.float64(200), np.float64(1))):
+        cached_mckp_max_delta(df, *ARGS, budget, scale=scale, cache=cache)
+        cached_top_n_combinations(df, *ARGS, budget, scale=scale, top_n=3, cache=cache)
+    assert (cache.misses, cache.hits) == (2, 6)
+    cached_mckp_max_delta(df, *ARGS, 200.5, scale=1, cache=cache)
+    assert cache.misses == 3
+
+
+def test_returned_results_do_not_alias_the_cache(tmp_path):
+    df = random_portfolio(5, n_groups=(4, 4), zero_share=0.0)
+    kw = dict(id_col="id_proyecto", scale=1)
+    for cache in (SolverCache(), SolverCache(directory=str(tmp_path))):
+        top = cached_top_n_combinations(df, *ARGS, 300, top_n=3, cache=cache, **kw)
+        ref, ref_ids = combos(top), [list(ids) for ids in top["IDs"]]
+        top["IDs"].iloc[0].append(999)
+        top.loc[0, "delta_total"] = -1.0
+        again = cached_top_n_combinations(df, *ARGS, 300, top_n=3, cache=cache, **kw)
+        assert combos(again) == ref and again["IDs"].tolist() == ref_ids
+        again["IDs"].iloc[0].clear()
+        again = cached_top_n_combinations(df, *ARGS, 300, top_n=3, cache=cache, **kw)
+        assert again["IDs"].tolist() == ref_ids
+
+        opt, _, _ = cached_mckp_max_delta(df, *ARGS, 300, cache=cache, **kw)
+        ids = opt["id_proyecto"].tolist()
+        opt.drop(opt.index, inplace=True)
+        again, _, _ = cached_mckp_max_delta(df, *ARGS, 300, cache=cache, **kw)
+        assert again["id_proyecto"].tolist() == ids
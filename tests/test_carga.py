@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""Lector de `Libro1.csv`: parseo, encabezados, codificación y caché."""
+
+import os
+import sys
+
+import pytest
+
+from mochila_carga import (HEADER_ALIASES, cache_path, detect_encoding, parse_projects,
+                           read_projects)
+
+ROWS = ("A;72,5;1200;1\n"
+        "A;73,25;0;2\n"
+        "Educación;71;300,5;3\n")
+
+
+def _csv(header="proyecto;vida;valorinversion;id_proyecto", rows=ROWS):
+    return f"{header}\n{rows}"
+
+
+@pytest.mark.parametrize("encoding", ["utf-8", "utf-8-sig", "cp1252"])
+def test_parse_projects_reads_decimal_commas_in_any_encoding(encoding):
+    df = parse_projects(_csv().encode(encoding))
+    assert list(df.columns) == ["proyecto", "vida", "valorinversion", "id_proyecto"]
+    assert df["vida"].tolist() == [72.5, 73.25, 71.0]
+    assert df["valorinversion"].tolist() == [1200.0, 0.0, 300.5]
+    assert df["id_proyecto"].dtype == "int64"
+    assert df.loc[2, "proyecto"] == "Educación"
+    assert df.attrs["carga"] == {"fuente": "csv", "encoding": encoding, "advertencias": []}
+
+
+def test_detect_encoding():
+    assert detect_encoding("ñ".encode("utf-8")) == "utf-8"
+    assert detect_encoding(b"\xef\xbb\xbfa") == "utf-8-sig"
+    assert detect_encoding("ñ".encode("cp1252")) == "cp1252"
+    assert detect_encoding(b"\x81\x8d") == "latin1"   # indefinidos en cp1252
+
+
+@pytest.mark.parametrize("alias", sorted(HEADER_ALIASES))
+def test_header_aliases(alias):
+    raw = _csv(f"﻿proyecto ; vida;{alias};id_proyecto").encode("utf-8")
+    df = parse_projects(raw)
+    assert list(df.columns) == ["proyecto", "vida", HEADER_ALIASES[alias], "id_proyecto"]
+    assert df["valorinversion"].tolist() == [1200.0, 0.0, 300.5]
+
+
+def test_alias_survives_cp1252_header():
+    df = parse_projects(_csv("proyecto;vida;Valor Inversión (mill);id_proyecto").encode("cp1252"))
+    assert "valorinversion" in df.columns
+
+
+def test_missing_required_column_raises():
+    with pytest.raises(KeyError, match="valorinversion"):
+        parse_projects(_csv("proyecto;vida;costo;id_proyecto").encode())
+
+
+def test_text_in_required_column_becomes_zero_with_warning():
+    df = parse_projects(_csv(rows="A;72,5;n/d;1\nB;71;10;2\n").encode())
+    assert df["valorinversion"].tolist() == [0.0, 10.0]
+    assert df.attrs["carga"]["advertencias"]
+
+
+def test_text_in_integer_column_raises():
+    raw = _csv("proyecto;vida;valorinversion;id_proyecto;x",
+               rows="A;72;1;1;2\nB;71;1;x;3\n").encode()
+    with pytest.raises(ValueError, match="id_proyecto"):
+        parse_projects(raw, required=("proyecto", "vida", "valorinversion"))
+
+
+# ---- caché ----
+@pytest.fixture
+def libro(tmp_path):
+    path = tmp_path / "datos" / "Libro1.csv"
+    path.parent.mkdir()
+    path.write_bytes(_csv().encode("utf-8-sig"))
+    return str(path)
+
+
+def test_cache_lives_outside_the_source_folder(libro, tmp_path):
+    target = cache_path(libro, str(tmp_path / "cache"))
+    assert os.path.dirname(target) == str(tmp_path / "cache")
+    assert cache_path(libro, "c") != cache_path(str(tmp_path / "otro" / "Libro1.csv"), "c")
+
+
+def test_cache_hit_and_invalidation(libro, tmp_path):
+    pytest.importorskip("pyarrow")
+    cache_dir = str(tmp_path / "cache")
+    first = read_projects(libro, cache_dir=cache_dir)
+    assert first.attrs["carga"]["fuente"] == "csv"
+    assert os.listdir(os.path.dirname(libro)) == ["Libro1.csv"]
+    assert os.path.exists(cache_path(libro, cache_dir))
+
+    again = read_projects(libro, cache_dir=cache_dir)
+    assert again.attrs["carga"]["fuente"] == "cache"
+    assert again.equals(first)
+
+    os.utime(libro, ns=(0, 0))                       # touch: mismo hash
+    assert read_projects(libro, cache_dir=cache_dir).attrs["carga"]["fuente"] == "cache"
+
+    with open(libro, "ab") as fh:                    # contenido nuevo
+        fh.write("B;70;5;4\n".encode())
+    changed = read_projects(libro, cache_dir=cache_dir)
+    assert changed.attrs["carga"]["fuente"] == "csv"
+    assert len(changed) == 4
+
+    other_schema = read_projects(libro, required=("proyecto", "vida"), cache_dir=cache_dir)
+    assert other_schema.attrs["carga"]["fuente"] == "csv"
+
+
+def test_without_pyarrow_always_parses(libro, tmp_path, monkeypatch):
+    monkeypatch.setitem(sys.modules, "pyarrow", None)   # import pyarrow → ImportError
+    cache_dir = tmp_path / "cache"
+    for _ in range(2):
+        df = read_projects(libro, cache_dir=str(cache_dir))
+        assert df.attrs["carga"]["fuente"] == "csv"
+        assert df["vida"].tolist() == [72.5, 73.25, 71.0]
+    assert not cache_dir.exists() or not os.listdir(cache_dir)
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""ProjectTable / detalle contra la implementación original de `detalle`."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from mochila import ProjectTable, detalle, top_n_combinations
+from helpers import BASE_LIFE, random_portfolio
+
+COLS = ("vida", BASE_LIFE, "valorinversion")
+
+
+def _baseline(df, ids_or_indices, life_col, base_life_val, cost_col, id_col_name,
+              is_indices=False):
+    """`detalle` tal como estaba antes de ProjectTable (copia + filtro + sort)."""
+    sub_df = df.copy()
+    if not ids_or_indices:
+        return pd.DataFrame()
+    if is_indices:
+        valid = [i for i in ids_or_indices if i in sub_df.index]
+        rows = sub_df.loc[valid].copy() if valid else pd.DataFrame()
+    elif id_col_name and id_col_name in sub_df.columns:
+        rows = sub_df[sub_df[id_col_name].isin(ids_or_indices)].copy()
+    elif id_col_name and sub_df.index.name == id_col_name:
+        rows = sub_df[sub_df.index.isin(ids_or_indices)].copy()
+    else:
+        return pd.DataFrame()
+    if rows.empty:
+        return rows
+    rows["delta_vida"] = rows[life_col] - base_life_val
+    cols = [id_col_name] if id_col_name and id_col_name in rows.columns else []
+    cols += [c for c in ["Nombre del Proyecto", life_col, "delta_vida", "Seguridad",
+                         "Desarrollo", "Gobernabilidad", cost_col]
+             if c in rows.columns and c not in cols]
+    if id_col_name and rows.index.name == id_col_name:
+        rows = rows.reset_index()
+        cols.insert(0, id_col_name)
+    return rows[cols].sort_values("delta_vida", ascending=False).reset_index(drop=True)
+
+
+def _table(seed):
+    df = random_portfolio(seed, n_groups=(4, 8))
+    df["Nombre del Proyecto"] = df["proyecto"] + " #" + df["id_proyecto"].astype(str)
+    df["Seguridad"] = np.where(df.index % 3 == 0, np.nan, df.index * 0.5)
+    df["Gobernabilidad"] = df.index.astype(str)
+    df.index = df.index * 10 + 5   # etiquetas ≠ posiciones
+    return df
+
+
+def _check(df, sel, id_col="id_proyecto", is_indices=False):
+    expected = _baseline(df, sel, *COLS, id_col, is_indices)
+    got = detalle(df, sel, *COLS, id_col, is_indices=is_indices)
+    via_table = detalle(ProjectTable(df, "vida", BASE_LIFE, "valorinversion", id_col), sel,
+                        *COLS, id_col, is_indices=is_indices)
+    if expected.empty:
+        assert got.empty and via_table.empty
+        return
+    # El original ordenaba sin `kind="stable"`: los empates en Δ se comparan como conjunto
+    key = list(expected.columns)
+    pd.testing.assert_frame_equal(got, via_table)
+    pd.testing.assert_frame_equal(
+        got.sort_values(key, ignore_index=True, na_position="first"),
+        expected.sort_values(key, ignore_index=True, na_position="first"),
+        check_dtype=False)
+    assert got["delta_vida"].is_monotonic_decreasing
+
+
+@pytest.mark.parametrize("seed", range(15))
+def test_top_n_details_match_baseline(seed):
+    df = _table(seed)
+    top = top_n_combinations(df, "proyecto", "vida", "valorinversion", BASE_LIFE, 200,
+                             id_col="id_proyecto", scale=1, top_n=6)
+    for ids, idx in zip(top["IDs"], top["_indices"]):
+        _check(df, list(ids))
+        _check(df, list(idx), is_indices=True)
+    _check(df, list(df.index), is_indices=True)          # tabla completa
+    _check(df, list(df["id_proyecto"])[::-1])
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_edge_cases_match_baseline(seed):
+    df = _table(seed)
+    _check(df, [])
+    _check(df, [-1, 10 ** 6])                            # ids ausentes
+    _check(df, [-1, df.index[0]], is_indices=True)       # etiqueta ausente se omite
+    _check(df, [df.index[1], df.index[1]], is_indices=True)   # repetida: dos filas
+    _check(df, [1, 2], id_col=None)                      # sin forma de identificar
+    _check(df, [1, 2], id_col="no_existe")
+    dup = pd.concat([df, df.iloc[:2]])                   # ids repetidos en la tabla
+    dup.index = range(len(dup))
+    _check(dup, [int(df["id_proyecto"].iloc[0])])
+    by_index = df.set_index("id_proyecto")               # id como índice
+    _check(by_index, [1, 3, 4])
+
+
+def test_rows_and_ids_agree_with_frame():
+    df = _table(3)
+    table = ProjectTable(df, "vida", BASE_LIFE, "valorinversion", "id_proyecto")
+    labels = list(df.index[::2])
+    frame = table.frame(table.positions(labels))
+    pd.testing.assert_frame_equal(pd.DataFrame(table.rows(labels), columns=table.columns), frame,
+                                  check_dtype=False)
+    assert table.columns == list(frame.columns)
+    pos = table.positions_by_id(frame["id_proyecto"])
+    assert sorted(table.ids(pos)) == sorted(frame["id_proyecto"])
+    assert len(table) == len(df)
+    assert table.positions_by_id([]).size == 0
+    no_ids = ProjectTable(df, "vida", BASE_LIFE, "valorinversion")
+    assert no_ids.ids(np.array([0, 1])) == list(df.index[:2])
+    assert no_ids.positions_by_id([1]).size == 0
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""cost_distance contra un Dijkstra de referencia sobre el mismo grafo."""
+
+import heapq
+import json
+import os
+
+import numpy as np
+import pytest
+
+from helpers import arcgis_fixture
+from mochila import SolverStats
+from simulador_distancia import _step_lengths, cost_distance, distance_stack
+from simulador_raster import Grid, Project, RasterInputs
+
+
+def _reference(grid, cost, cell, sixteen=True):
+    n_rows, n_cols = grid.shape
+    st = _step_lengths(grid)
+    cost = np.where(np.isnan(cost), np.inf, cost)
+    dist = np.full(grid.shape, np.inf)
+    dist[cell] = 0
+    heap = [(0.0, cell)]
+    moves = [(0, 1), (0, -1), (1, 0), (-1, 0), (1, 1), (1, -1), (-1, 1), (-1, -1)]
+    if sixteen:
+        moves += [(1, 2), (1, -2), (-1, 2), (-1, -2), (2, 1), (2, -1), (-2, 1), (-2, -1)]
+    while heap:
+        d, (r, c) = heapq.heappop(heap)
+        if d > dist[r, c]:
+            continue
+        for dr, dc in moves:
+            r2, c2 = r + dr, c + dc
+            if not (0 <= r2 < n_rows and 0 <= c2 < n_cols):
+                continue
+            lo = max(r, r2)
+            if dr == 0:
+                w = st["h"][r] * (cost[r, c] + cost[r2, c2]) / 2
+            elif abs(dr) == 1 and dc == 0:
+                w = st["v"][lo] * (cost[r, c] + cost[r2, c2]) / 2
+            elif abs(dr) == 1 and abs(dc) == 1:
+                w = st["d"][lo] * (cost[r, c] + cost[r2, c2]) / 2
+            elif abs(dr) == 1:
+                cm = c + dc // 2
+                w = st["k1"][lo] * (cost[r, c] + cost[r, cm] + cost[r2, cm] + cost[r2, c2]) / 4
+            else:
+                rm = r + dr // 2
+                w = st["k2"][lo] * (cost[r, c] + cost[rm, c] + cost[rm, c2] + cost[r2, c2]) / 4
+            if d + w < dist[r2, c2]:
+                dist[r2, c2] = d + w
+                heapq.heappush(heap, (d + w, (r2, c2)))
+    dist[~np.isfinite(dist)] = np.nan
+    return dist
+
+
+def _assert_same(ref, got):
+    assert np.array_equal(np.isnan(ref), np.isnan(got))
+    ok = np.isfinite(ref)
+    np.testing.assert_allclose(got[ok], ref[ok], rtol=1e-9, atol=1e-6)
+
+
+def _maze(n_rows, n_cols):
+    """Pasillo en serpentina: cada fila impar es una pared con un hueco alternado."""
+    cost = np.ones((n_rows, n_cols))
+    for r in range(1, n_rows - 1, 2):
+        cost[r, :] = np.nan
+        cost[r, -1 if (r // 2) % 2 == 0 else 0] = 1.0
+    return cost
+
+
+@pytest.mark.parametrize("seed", range(6))
+@pytest.mark.parametrize("neighbours", [8, 16])
+def test_matches_dijkstra(seed, neighbours):
+    rng = np.random.default_rng(seed)
+    grid = Grid(-74.0, 11.0, 0.002, int(rng.integers(5, 30)), int(rng.integers(5, 30)))
+    cost = rng.choice([1.0, 2.0, 5.0], size=grid.shape, p=[.6, .3, .1])
+    cost[rng.random(grid.shape) < 0.08] = np.nan
+    pts = [(grid.x_min + rng.uniform(0, grid.n_cols) * grid.cell_size,
+            grid.y_max - rng.uniform(0, grid.n_rows) * grid.cell_size) for _ in range(3)]
+    stack = distance_stack(grid, pts + [(0.0, 0.0)], cost=cost, neighbours=neighbours)
+    for k, p in enumerate(pts):
+        _assert_same(_reference(grid, cost, grid.cell_of(*p), neighbours == 16), stack[k])
+    assert np.isnan(stack[-1]).all()
+
+
+def test_maze_falls_back_to_priority_queue():
+    grid = Grid(-74.0, 11.0, 0.002, 41, 12)
+    cost = _maze(*grid.shape)
+    src = (grid.x_min + 0.5 * grid.cell_size, grid.y_max - 0.5 * grid.cell_size)
+    ref = _reference(grid, cost, (0, 0))
+    stats = SolverStats()
+    _assert_same(ref, cost_distance(grid, [src], cost, max_sweeps=2, stats=stats)[0])
+    assert stats.counters["dijkstra_sources"] == 1
+    stats = SolverStats()
+    _assert_same(ref, cost_distance(grid, [src], cost, stats=stats)[0])
+    assert "dijkstra_sources" not in stats.counters
+
+
+# ───── Contra DistanceAccumulation (fixture exportado en ArcGIS Pro) ─────
+def _arcgis_reference():
+    path = arcgis_fixture()
+    inputs = RasterInputs.from_directory(path, mmap=False)
+    with open(os.path.join(path, "proyectos.json"), encoding="utf-8") as fh:
+        projects = [Project(**p) for p in json.load(fh)]
+    refs = [np.load(os.path.join(path, f"distancia_{p.oid}.npy")) for p in projects]
+    return inputs, projects, refs
+
+
+def test_closed_form_matches_arcgis():
+    inputs, projects, refs = _arcgis_reference()
+    stack = distance_stack(inputs.grid, [(p.lon, p.lat) for p in projects])
+    for ref, got in zip(refs, stack):
+        ok = ~np.isnan(ref)
+        assert np.abs(got[ok] - ref[ok]).max() < 0.1
+
+
+def test_uniform_cost_within_documented_bound_of_arcgis():
+    inputs, projects, refs = _arcgis_reference()
+    stack = cost_distance(inputs.grid, [(p.lon, p.lat) for p in projects],
+                          cost=np.ones(inputs.grid.shape))
+    for ref, got in zip(refs, stack):
+        ok = ~np.isnan(ref)
+        assert np.all(got[ok] >= ref[ok] - 0.1)
+        assert np.all(got[ok] <= ref[ok] * 1.028 + 0.1)
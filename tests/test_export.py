@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""Escritores de mochila_export contra `detalle` y el top‑N original."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import mochila_export
+from mochila import ProjectTable, detalle, mckp_max_delta, top_n_combinations
+from mochila_export import export_top_n
+from helpers import BASE_LIFE, random_portfolio
+
+ARGS = ("proyecto", "vida", "valorinversion", BASE_LIFE)
+
+
+@pytest.fixture
+def solved():
+    df = random_portfolio(4, n_groups=(5, 5))
+    df["Nombre del Proyecto"] = df["proyecto"] + " / " + df["id_proyecto"].astype(str)
+    df["Seguridad"] = np.where(df.index % 3 == 0, np.nan, df.index * 1.5)  # huecos
+    df["Desarrollo"] = None                                                # sin valores
+    top = top_n_combinations(df, *ARGS, 250, id_col="id_proyecto", scale=1, top_n=6)
+    opt, _, _ = mckp_max_delta(df, *ARGS, 250, id_col="id_proyecto", scale=1)
+    table = ProjectTable(df, "vida", BASE_LIFE, "valorinversion", "id_proyecto")
+    return df, top, opt[["id_proyecto", "proyecto", "vida", "valorinversion"]], table
+
+
+def _expected_detail(df, top):
+    frames = [detalle(df, list(idx), "vida", BASE_LIFE, "valorinversion", "id_proyecto",
+                      is_indices=True).assign(combinacion=i)
+              for i, idx in enumerate(top["_indices"], start=1)]
+    out = pd.concat(frames, ignore_index=True)
+    return out[["combinacion"] + [c for c in out.columns if c != "combinacion"]]
+
+
+def test_csv_writer(solved, tmp_path):
+    df, top, opt, table = solved
+    paths = export_top_n(str(tmp_path / "res.csv"), top, table, optimal=opt)
+    assert [p[len(str(tmp_path)) + 1:] for p in paths] == \
+        ["res_resumen.csv", "res_detalle.csv", "res_optimo.csv"]
+
+    summary = pd.read_csv(paths[0], sep=";")
+    assert summary["delta_total"].tolist() == pytest.approx(top["delta_total"].tolist())
+    assert summary["IDs"].tolist() == [", ".join(map(str, ids)) for ids in top["IDs"]]
+
+    detail = pd.read_csv(paths[1], sep=";")
+    expected = _expected_detail(df, top)
+    assert detail.columns.tolist() == expected.columns.tolist()
+    assert detail["id_proyecto"].tolist() == expected["id_proyecto"].tolist()
+    assert detail["combinacion"].tolist() == expected["combinacion"].tolist()
+    np.testing.assert_allclose(detail["delta_vida"], expected["delta_vida"])
+
+    optimo = pd.read_csv(paths[2], sep=";")
+    assert optimo["id_proyecto"].tolist() == opt["id_proyecto"].tolist()
+
+
+def test_csv_without_optimal(solved, tmp_path):
+    _, top, _, table = solved
+    assert len(export_top_n(str(tmp_path / "res.csv"), top, table)) == 2
+    assert len(export_top_n(str(tmp_path / "res.csv"), top, table,
+                            optimal=pd.DataFrame())) == 2
+
+
+def test_parquet_writer_keeps_one_schema(solved, tmp_path, monkeypatch):
+    pytest.importorskip("pyarrow")
+    df, top, opt, table = solved
+    monkeypatch.setattr(mochila_export, "_PARQUET_BATCH", 1)   # un lote por fila
+    paths = export_top_n(str(tmp_path / "res.parquet"), top, table, optimal=opt)
+    assert [p.rsplit("_", 1)[1] for p in paths] == \
+        ["resumen.parquet", "detalle.parquet", "optimo.parquet"]
+    detail = pd.read_parquet(paths[1])
+    expected = _expected_detail(df, top)
+    assert detail["id_proyecto"].tolist() == expected["id_proyecto"].tolist()
+    np.testing.assert_allclose(detail["Seguridad"], expected["Seguridad"].astype(float))
+    assert detail["Desarrollo"].isna().all()
+    assert pd.read_parquet(paths[2])["id_proyecto"].tolist() == opt["id_proyecto"].tolist()
+
+
+@pytest.mark.parametrize("layout", ["sheets", "long"])
+def test_excel_writer(solved, tmp_path, layout):
+    pytest.importorskip("openpyxl")
+    df, top, opt, table = solved
+    path = str(tmp_path / "res.xlsx")
+    assert export_top_n(path, top, table, optimal=opt, layout=layout) == [path]
+    sheets = pd.read_excel(path, sheet_name=None)
+    assert sheets["Optimal_Combination_Details"]["id_proyecto"].tolist() == \
+        opt["id_proyecto"].tolist()
+    expected = _expected_detail(df, top)
+    if layout == "long":
+        assert sheets["Details"]["id_proyecto"].tolist() == expected["id_proyecto"].tolist()
+    else:
+        first = sheets["Combination_1_Details"]
+        assert first["id_proyecto"].tolist() == \
+            expected.loc[expected["combinacion"] == 1, "id_proyecto"].tolist()
+
+
+def test_unknown_format_and_layout(solved, tmp_path):
+    _, top, _, table = solved
+    with pytest.raises(ValueError, match="layout"):
+        export_top_n(str(tmp_path / "res.csv"), top, table, layout="wide")
+    with pytest.raises(ValueError, match="Formato"):
+        export_top_n(str(tmp_path / "res.txt"), top, table)
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""IncrementalMCKP contra una resolución nueva después de cada edición."""
+
+import numpy as np
+import pytest
+
+from mochila import mckp_max_delta, top_n_combinations
+from mochila_incremental import IncrementalMCKP
+from helpers import BASE_LIFE, combos, random_portfolio
+
+ARGS = ("proyecto", "vida", "valorinversion", BASE_LIFE)
+
+
+def _check(inc: IncrementalMCKP):
+    table = inc.table
+    ref_df, ref_delta, ref_cost = mckp_max_delta(table, *ARGS, inc.budget, id_col="id_proyecto",
+                                                 scale=1, engine="array")
+    # Pivote: mismo óptimo (la selección puede diferir en empates)
+    opt_df, delta, cost = inc.solve(exact=False)
+    assert delta == pytest.approx(ref_delta, abs=1e-9)
+    assert cost == ref_cost
+    assert opt_df["valorinversion"].sum() == cost
+    assert opt_df["proyecto"].is_unique
+    # Exacto: idéntico a la resolución nueva, también en empates
+    opt_df, delta, cost = inc.solve()
+    assert (delta, cost) == (ref_delta, ref_cost)
+    assert opt_df["id_proyecto"].tolist() == ref_df["id_proyecto"].tolist()
+    ref_top = top_n_combinations(table, *ARGS, inc.budget, id_col="id_proyecto", scale=1, top_n=4)
+    assert combos(inc.top_n(4)) == combos(ref_top)
+
+
+@pytest.mark.parametrize("seed", range(25))
+def test_edits_match_fresh_solve(seed):
+    rng = np.random.default_rng(seed)
+    df = random_portfolio(seed, n_groups=(3, 7), zero_share=0.3)
+    budget = float(rng.integers(0, 30) * 10)
+    inc = IncrementalMCKP(df, *ARGS, budget, id_col="id_proyecto", scale=1)
+    _check(inc)
+    for step in range(8):
+        new = random_portfolio(1000 * seed + step, n_groups=(1, 1), zero_share=0.3)
+        new["id_proyecto"] += 100 * (step + 1)
+        action = rng.integers(0, 3)
+        groups = inc.groups
+        if action == 0 and groups:
+            inc.update_group(groups[int(rng.integers(len(groups)))], new)
+        elif action == 1:
+            inc.update_group(f"N{step}", new)
+        elif groups:
+            inc.remove_group(groups[int(rng.integers(len(groups)))])
+        if inc.groups:
+            _check(inc)
+
+
+def test_exact_solve_recomputes_only_from_the_edited_group():
+    df = random_portfolio(3, n_groups=(6, 6))
+    inc = IncrementalMCKP(df, *ARGS, 200, id_col="id_proyecto", scale=1)
+    steps = []
+    step = inc._step
+    inc._step = lambda dp, name: steps.append(name) or step(dp, name)
+    inc.solve()
+    assert steps == []
+    last = inc.groups[-1]
+    inc.update_group(last, df[df["proyecto"] == last].assign(vida=BASE_LIFE + 5))
+    inc.solve()
+    assert steps == [last]
+    inc.update_group("nuevo", df.iloc[:1].assign(proyecto="nuevo", id_proyecto=99))
+    steps.clear()
+    inc.solve()
+    assert steps == ["nuevo"]
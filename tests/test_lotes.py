@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""Corridas por lotes: tabla de escenarios, resultados y salida consolidada."""
+
+import json
+
+import pandas as pd
+import pytest
+
+from mochila import mckp_max_delta, top_n_combinations
+from mochila_lotes import read_scenarios, run_batch, write_output
+from helpers import random_portfolio
+
+ARGS = ("proyecto", "vida", "valorinversion")
+
+
+def test_semicolon_scenarios_with_decimal_commas(tmp_path):
+    path = tmp_path / "escenarios.csv"
+    path.write_text("escenario;equipo;base_life;presupuesto;top_n\n"
+                    "a;07;72,68;1500,5;5\n"
+                    "b;;71;200;\n", encoding="utf-8")
+    a, b = read_scenarios(str(path))
+    assert (a["escenario"], a["equipo"], a["base_life"], a["presupuesto"], a["top_n"]) == \
+        ("a", "07", 72.68, 1500.5, 5)
+    assert (b["equipo"], b["base_life"], b["presupuesto"], b["top_n"], b["scale"]) == \
+        ("", 71.0, 200.0, 20, 20)
+
+
+def test_comma_and_json_scenarios(tmp_path):
+    csv = tmp_path / "escenarios.csv"
+    csv.write_text('presupuesto,base_life\n300,"72,5"\n400.5,72\n', encoding="utf-8")
+    js = tmp_path / "escenarios.json"
+    js.write_text(json.dumps([{"presupuesto": 300, "base_life": 72.5},
+                              {"presupuesto": 400.5, "escenario": "x"}]), encoding="utf-8")
+    assert [(s["escenario"], s["presupuesto"], s["base_life"]) for s in read_scenarios(str(csv))] \
+        == [("escenario_1", 300.0, 72.5), ("escenario_2", 400.5, 72.0)]
+    assert [(s["escenario"], s["presupuesto"], s["base_life"]) for s in read_scenarios(str(js))] \
+        == [("escenario_1", 300.0, 72.5), ("x", 400.5, 72.68)]
+
+
+def test_bad_scenario_tables(tmp_path):
+    path = tmp_path / "escenarios.csv"
+    path.write_text("escenario;base_life\na;72\n", encoding="utf-8")
+    with pytest.raises(KeyError, match="presupuesto"):
+        read_scenarios(str(path))
+    path.write_text("escenario;presupuesto\na;mucho\n", encoding="utf-8")
+    with pytest.raises(ValueError):
+        read_scenarios(str(path))
+
+
+def _projects(seed):
+    return random_portfolio(seed, n_groups=(4, 6))
+
+
+SCENARIOS = [
+    {"escenario": "bajo", "equipo": "e1", "base_life": 72.0, "presupuesto": 80.0,
+     "top_n": 3, "scale": 1},
+    {"escenario": "alto", "equipo": "e2", "base_life": 71.5, "presupuesto": 250.0,
+     "top_n": 4, "scale": 1},
+]
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_batch_matches_single_solves(seed):
+    df = _projects(seed)
+    out = run_batch(df, SCENARIOS, workers=1, progress=False)
+    for sc in SCENARIOS:
+        rows = out[out["escenario"] == sc["escenario"]]
+        args = (*ARGS, sc["base_life"], sc["presupuesto"])
+        opt_df, delta, cost = mckp_max_delta(df, *args, id_col="id_proyecto", scale=1)
+        opt = rows[rows["tipo"] == "optimo"].iloc[0]
+        assert (opt["delta_total"], opt["costo_total"]) == pytest.approx((delta, cost))
+        assert opt["IDs"] == ", ".join(map(str, opt_df["id_proyecto"]))
+
+        ref = top_n_combinations(df, *args, id_col="id_proyecto", scale=1, top_n=sc["top_n"])
+        top = rows[rows["tipo"] == "top"]
+        assert top["rank"].tolist() == list(range(1, len(ref) + 1))
+        assert top["delta_total"].tolist() == pytest.approx(ref["delta_total"].tolist())
+        assert top["IDs"].tolist() == [", ".join(map(str, ids)) for ids in ref["IDs"]]
+        assert (rows["equipo"] == sc["equipo"]).all()
+
+
+def test_pool_and_shared_cache_match_serial(tmp_path):
+    df = _projects(7)
+    serial = run_batch(df, SCENARIOS, workers=1, progress=False)
+    pooled = run_batch(df, SCENARIOS * 2, workers=2, progress=False, cache_dir=str(tmp_path))
+    pd.testing.assert_frame_equal(pooled.iloc[:len(serial)].reset_index(drop=True), serial)
+    pd.testing.assert_frame_equal(pooled.iloc[len(serial):].reset_index(drop=True), serial)
+
+
+@pytest.mark.parametrize("ext", [".csv", ".json"])
+def test_write_output_round_trip(tmp_path, ext):
+    out = run_batch(_projects(1), SCENARIOS, workers=1, progress=False)
+    path = str(tmp_path / f"resultados{ext}")
+    write_output(out, path)
+    if ext == ".csv":
+        back = pd.read_csv(path, sep=";", decimal=",", dtype={"equipo": str})
+    else:
+        back = pd.read_json(path, orient="records")
+    assert back["escenario"].tolist() == out["escenario"].tolist()
+    assert back["delta_total"].tolist() == pytest.approx(out["delta_total"].tolist())
+    assert back["IDs"].tolist() == out["IDs"].tolist()
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""mckp_max_delta: motores exactos entre sí y garantías del aproximado."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from mochila import frontier, mckp_max_delta
+from helpers import BASE_LIFE, random_budget, random_portfolio
+
+ARGS = ("proyecto", "vida", "valorinversion", BASE_LIFE)
+
+
+def _solve(df, budget, engine, **kwargs):
+    return mckp_max_delta(df, *ARGS, budget, id_col="id_proyecto", scale=1, engine=engine, **kwargs)
+
+
+@pytest.mark.parametrize("seed", range(60))
+def test_exact_engines_agree(seed):
+    df = random_portfolio(seed)
+    budget = random_budget(df, seed)
+    ref_df, ref_delta, ref_cost = _solve(df, budget, "legacy")
+    for engine in ("array", "sparse", "auto"):
+        opt_df, delta, cost = _solve(df, budget, engine)
+        assert delta == pytest.approx(ref_delta, abs=1e-9), engine
+        assert cost == ref_cost, engine
+        assert sorted(opt_df["id_proyecto"]) == sorted(ref_df["id_proyecto"]), engine
+
+
+def test_approx_zero_cost_regression():
+    df = pd.DataFrame({"proyecto": ["A", "B", "Z"], "vida": [1.02, 1.9, 0.5],
+                       "valorinversion": [51, 100, 0], "id_proyecto": [1, 2, 3]})
+    opt_df, delta, _ = mckp_max_delta(df, "proyecto", "vida", "valorinversion", 0.0, 100,
+                                      scale=1, engine="approx", eps=0.05)
+    assert delta >= 0.95 * 2.4
+    assert opt_df.attrs["approx"]["upper_bound"] >= 2.4 - 1e-9
+
+
+@pytest.mark.parametrize("seed", range(80))
+@pytest.mark.parametrize("eps", [0.01, 0.05, 0.3])
+def test_approx_guarantee_and_bound(seed, eps):
+    df = random_portfolio(seed, n_groups=(3, 10), zero_share=0.3, tie_decimals=3)
+    budget = random_budget(df, seed)
+    _, opt, _ = _solve(df, budget, "sparse")
+    opt_df, delta, cost = _solve(df, budget, "approx", eps=eps)
+    info = opt_df.attrs["approx"]
+    tol = 1e-9 * max(1.0, abs(opt))
+    assert info["upper_bound"] >= opt - tol
+    assert delta >= (1 - eps) * opt - tol
+    assert cost <= budget
+    assert delta == pytest.approx((opt_df["vida"] - BASE_LIFE).sum(), abs=1e-9)
+
+
+@pytest.mark.parametrize("seed", range(30))
+@pytest.mark.parametrize("reduce", [False, True])
+def test_frontier_matches_solver(seed, reduce):
+    # Índice de texto barajado: las etiquetas no son posiciones
+    df = random_portfolio(seed, zero_share=0.3).sample(frac=1, random_state=seed)
+    df.index = [f"r{i}" for i in df.index]
+    budget = random_budget(df, seed)
+    fr = frontier(df, *ARGS, budget, id_col="id_proyecto", scale=1, reduce=reduce)
+    rows = fr.to_frame(list(range(0, int(budget) + 1, 10)))
+    for row in rows.itertuples():
+        opt_df, delta, cost = _solve(df, row.presupuesto, "array")
+        assert row.delta_total == pytest.approx(delta, abs=1e-9)
+        assert row.costo_total == cost
+        assert sorted(df.loc[list(row._5), "id_proyecto"]) == sorted(opt_df["id_proyecto"])
+        sel = fr.selection(row.presupuesto)
+        assert sorted(sel["id_proyecto"]) == sorted(opt_df["id_proyecto"])
+        assert list(sel.columns) == list(opt_df.columns)
+    with pytest.raises(ValueError):
+        fr.to_frame([budget + 10])
+    with pytest.raises(ValueError):
+        fr.selection(budget + 10)
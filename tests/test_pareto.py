@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+"""non_dominated y pareto_portfolios contra la dominancia por fuerza bruta."""
+
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import mochila_pareto
+from mochila_pareto import DIM_COLS, non_dominated, pareto_portfolios
+
+
+def _dominates(cj, vj, ci, vi, eps=0.0):
+    return cj <= ci and all(a >= b - eps for a, b in zip(vj, vi))
+
+
+def _brute_non_dominated(cost, vals, eps=0.0):
+    """Se descarta un punto si lo domina otro anterior en el orden (coste,
+    −suma, entrada); con eps = 0 es la dominancia débil usual."""
+    order = sorted(range(len(cost)), key=lambda i: (cost[i], -vals[i].sum(), i))
+    keep = np.zeros(len(cost), dtype=bool)
+    for r, i in enumerate(order):
+        keep[i] = not any(_dominates(cost[j], vals[j], cost[i], vals[i], eps) for j in order[:r])
+    return keep
+
+
+def _points(seed, n=60, dims=3):
+    rng = np.random.default_rng(seed)
+    # Enteros: sumas exactas y muchos empates / duplicados
+    return rng.integers(0, 8, n).astype(float), rng.integers(-3, 6, (n, dims)).astype(float)
+
+
+@pytest.mark.parametrize("seed", range(20))
+@pytest.mark.parametrize("block", [512, 7])
+def test_non_dominated_matches_brute_force(seed, block, monkeypatch):
+    monkeypatch.setattr(mochila_pareto, "_BLOCK", block)
+    cost, vals = _points(seed)
+    np.testing.assert_array_equal(non_dominated(cost, vals), _brute_non_dominated(cost, vals))
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_eps_dominance(seed, monkeypatch):
+    cost, vals = _points(seed)
+    # Un solo bloque: cada punto se compara con todos los anteriores
+    np.testing.assert_array_equal(non_dominated(cost, vals, eps=1.0),
+                                  _brute_non_dominated(cost, vals, eps=1.0))
+    # Por bloques: los conservados no se ε‑dominan entre sí en el orden y
+    # todo descartado está ε‑dominado por uno anterior
+    monkeypatch.setattr(mochila_pareto, "_BLOCK", 7)
+    keep = non_dominated(cost, vals, eps=1.0)
+    order = sorted(range(len(cost)), key=lambda i: (cost[i], -vals[i].sum(), i))
+    for r, i in enumerate(order):
+        earlier = [j for j in order[:r] if _dominates(cost[j], vals[j], cost[i], vals[i], 1.0)]
+        if keep[i]:
+            assert not any(keep[j] for j in earlier)
+        else:
+            assert earlier
+    assert keep.sum() <= non_dominated(cost, vals).sum()
+
+
+# ---- carteras ----
+def _portfolio(seed):
+    rng = np.random.default_rng(seed)
+    rows = []
+    for g in range(int(rng.integers(2, 6))):
+        for _ in range(int(rng.integers(1, 4))):
+            rows.append({"proyecto": f"P{g}", "valorinversion": float(rng.integers(0, 8) * 10),
+                         "id_proyecto": len(rows) + 1,
+                         **{col: float(rng.integers(-2, 6)) for col in DIM_COLS}})
+    return pd.DataFrame(rows)
+
+
+def _all_portfolios(df, budget):
+    """(coste, deltas, etiquetas) de toda selección 0‑1 por grupo (incluye la vacía)."""
+    options = [[None] + list(g.index) for _, g in df.groupby("proyecto", sort=False)]
+    costs = df["valorinversion"].to_dict()
+    vals = dict(zip(df.index, df[list(DIM_COLS)].to_numpy()))
+    out = []
+    for combo in itertools.product(*options):
+        sel = tuple(i for i in combo if i is not None)
+        cost = float(sum(costs[i] for i in sel))
+        if cost <= budget:
+            v = sum((vals[i] for i in sel), np.zeros(len(DIM_COLS)))
+            out.append((cost, tuple(v.tolist()), sel))
+    return out
+
+
+def _exact_front(portfolios):
+    points = {(c, v) for c, v, _ in portfolios}
+    front = {(c, v) for c, v in points
+             if not any(_dominates(c2, v2, c, v) and (c2, v2) != (c, v) for c2, v2 in points)}
+    return front - {(0.0, (0.0,) * len(DIM_COLS))}
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_front_matches_brute_force(seed):
+    df = _portfolio(seed)
+    budget = float(df["valorinversion"].sum() * 0.6)
+    front = pareto_portfolios(df, "proyecto", "valorinversion", budget, id_col="id_proyecto")
+    frame = front.frame
+    got = {(c, tuple(v)) for c, v in zip(frame["costo_total"], frame[list(DIM_COLS)].to_numpy())}
+    assert len(got) == len(frame)
+    assert got == _exact_front(_all_portfolios(df, budget))
+    for rec in frame.to_dict("records"):
+        sel = list(rec["_indices"])
+        assert rec["costo_total"] == df.loc[sel, "valorinversion"].sum()
+        assert [rec[col] for col in DIM_COLS] == df.loc[sel, list(DIM_COLS)].sum().tolist()
+        assert sorted(rec["IDs"]) == sorted(df.loc[sel, "id_proyecto"].tolist())
+        assert df.loc[sel, "proyecto"].is_unique
+
+
+@pytest.mark.parametrize("seed", range(15))
+def test_eps_front_covers_the_exact_front(seed):
+    df = _portfolio(seed)
+    budget = float(df["valorinversion"].sum() * 0.6)
+    eps = 0.5
+    approx = pareto_portfolios(df, "proyecto", "valorinversion", budget, eps=eps).frame
+    n_groups = df["proyecto"].nunique()
+    pts = list(zip(approx["costo_total"], approx[list(DIM_COLS)].to_numpy()))
+    for c, v in _exact_front(_all_portfolios(df, budget)):
+        assert any(_dominates(c2, v2, c, v, eps * n_groups) for c2, v2 in pts) or \
+            all(x <= eps * n_groups for x in v)   # solo la cartera vacía la cubre
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_best_reweights_without_resolving(seed):
+    df = _portfolio(seed)
+    budget = float(df["valorinversion"].sum() * 0.6)
+    front = pareto_portfolios(df, "proyecto", "valorinversion", budget)
+    portfolios = [p for p in _all_portfolios(df, budget) if p[2]]
+    rng = np.random.default_rng(seed)
+    for w in (rng.random(3), np.array([1.0, 0.0, 0.0]), np.array([0.45, 0.30, 0.25])):
+        brute = max(float(np.dot(w, v)) for _, v, _ in portfolios)
+        best = front.best(dict(zip(DIM_COLS, w)))
+        assert best["puntaje"] == pytest.approx(brute)
+        ranked = front.rank(list(w))
+        assert ranked["puntaje"].tolist() == pytest.approx(
+            (ranked[list(DIM_COLS)].to_numpy() @ w).tolist())
+        keys = list(zip(-ranked["puntaje"], -ranked["costo_total"]))
+        assert keys == sorted(keys)
+        assert ranked.iloc[0]["_indices"] == best["_indices"]
+    assert len(front.rank(top=2)) == min(2, len(front))
+
+
+def test_bad_weights():
+    front = pareto_portfolios(_portfolio(0), "proyecto", "valorinversion", 100)
+    with pytest.raises(ValueError):
+        front.scores([1.0, -0.1, 0.0])
+    with pytest.raises(ValueError):
+        front.scores([1.0, 0.0])
+    with pytest.raises(KeyError):
+        pareto_portfolios(_portfolio(0), "proyecto", "costo", 100)
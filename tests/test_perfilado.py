@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""Registro JSON por línea de perfilado.py (enable_profiling / MOCHILA_PROFILE)."""
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+import perfilado
+from mochila import (SolverStats, disable_profiling, enable_profiling, mckp_max_delta,
+                     top_n_combinations)
+from perfilado import instrument
+from helpers import BASE_LIFE, random_portfolio
+
+ARGS = ("proyecto", "vida", "valorinversion", BASE_LIFE)
+KEYS = {"solver", "timestamp", "wall_time", "phases", "counters", "peak_bytes", "params"}
+
+
+@pytest.fixture(autouse=True)
+def _off():
+    disable_profiling()
+    yield
+    disable_profiling()
+    assert perfilado._PROFILE["depth"] == 0
+
+
+def _lines(path):
+    with open(path, encoding="utf-8") as fh:
+        return [json.loads(line) for line in fh]
+
+
+def _well_formed(rec):
+    assert set(rec) == KEYS
+    assert isinstance(rec["solver"], str) and rec["solver"]
+    assert rec["wall_time"] >= 0
+    assert all(isinstance(v, float) and v >= 0 for v in rec["phases"].values())
+    assert all(isinstance(v, int) for v in rec["counters"].values())
+    assert sum(rec["phases"].values()) <= rec["wall_time"] + 1e-6
+
+
+def test_file_hook_appends_one_json_line_per_call(tmp_path):
+    path = str(tmp_path / "perfil.jsonl")
+    df = random_portfolio(3, n_groups=(5, 5))
+    enable_profiling(path)
+    mckp_max_delta(df, *ARGS, 200, scale=1)
+    top_n_combinations(df, *ARGS, 200, scale=1, top_n=3)
+    disable_profiling()
+    mckp_max_delta(df, *ARGS, 200, scale=1)           # ya no se registra
+
+    records = _lines(path)
+    assert [r["solver"] for r in records] == ["mckp_max_delta", "top_n_combinations"]
+    for rec in records:
+        _well_formed(rec)
+        assert rec["params"]["budget"] == 200 and rec["peak_bytes"] is None
+    assert records[1]["params"]["method"] == "kbest"
+
+
+def test_params_that_are_not_json_are_stringified(tmp_path):
+    path = str(tmp_path / "perfil.jsonl")
+    enable_profiling(path)
+    with instrument("raro", None, ruta=tmp_path, conjunto={1}):
+        pass
+    (rec,) = _lines(path)
+    assert rec["params"] == {"ruta": str(tmp_path), "conjunto": "{1}"}
+
+
+def test_callable_hook_and_caller_stats():
+    seen = []
+    enable_profiling(seen.append)
+    st = SolverStats()
+    mckp_max_delta(random_portfolio(1), *ARGS, 150, scale=1, stats=st)
+    (rec,) = seen
+    _well_formed(rec)
+    assert rec["counters"] == st.counters and rec["wall_time"] == st.wall_time
+
+
+def test_nested_calls_emit_inner_first_and_measure_memory_once():
+    seen = []
+    enable_profiling(seen.append, memory=True)
+    df = random_portfolio(2, n_groups=(6, 6))
+    with instrument("externo", None) as outer:
+        with outer.phase("resolver"):
+            mckp_max_delta(df, *ARGS, 200, scale=1)
+            top_n_combinations(df, *ARGS, 200, scale=1, top_n=2)
+        outer.count("llamadas", 2)
+    assert [r["solver"] for r in seen] == ["mckp_max_delta", "top_n_combinations", "externo"]
+    for rec in seen:
+        _well_formed(rec)
+    assert seen[0]["peak_bytes"] is None and seen[1]["peak_bytes"] is None
+    assert seen[2]["peak_bytes"] >= 0 and seen[2]["counters"] == {"llamadas": 2}
+    assert seen[2]["wall_time"] >= seen[0]["wall_time"] + seen[1]["wall_time"]
+
+
+def test_failed_call_is_still_recorded():
+    seen = []
+    enable_profiling(seen.append)
+    with pytest.raises(RuntimeError):
+        with instrument("falla", None, n=1):
+            raise RuntimeError("x")
+    assert [r["solver"] for r in seen] == ["falla"]
+
+
+def test_environment_variable_enables_the_file_hook(tmp_path):
+    path = tmp_path / "env.jsonl"
+    code = ("from mochila import mckp_max_delta; import pandas as pd; "
+            "df = pd.DataFrame({'proyecto': ['a', 'b'], 'vida': [73.0, 72.5], "
+            "'valorinversion': [1.0, 1.0]}); "
+            "mckp_max_delta(df, 'proyecto', 'vida', 'valorinversion', 72.0, 2, scale=1)")
+    env = dict(os.environ, MOCHILA_PROFILE=str(path))
+    subprocess.run([sys.executable, "-c", code], check=True, env=env,
+                   cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    (rec,) = _lines(path)
+    _well_formed(rec)
+    assert rec["solver"] == "mckp_max_delta"
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""mckp_constrained contra fuerza bruta (con variantes de coste 0)."""
+
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from mochila import mckp_max_delta
+from mochila_restricciones import mckp_constrained
+from helpers import BASE_LIFE, random_budget, random_portfolio
+
+ARGS = ("proyecto", "vida", "valorinversion", BASE_LIFE)
+
+
+def _with_columns(df: pd.DataFrame, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed + 500)
+    df = df.copy()
+    df["delta_seg"] = np.round(rng.uniform(-0.2, 0.6, len(df)), 2)
+    df["ubicacion"] = rng.choice(["Óptima", "Buena", "Deficiente"], len(df))
+    df["municipio"] = rng.choice(["A", "B"], len(df))
+    return df
+
+
+def _brute(df, budget, minimums, count_caps, spend_caps):
+    groups = [list(g.index) for _, g in df.groupby("proyecto", sort=False)]
+    best = None
+    for combo in itertools.product(*[[None] + g for g in groups]):
+        sel = df.loc[[p for p in combo if p is not None]]
+        cost = sel["valorinversion"].sum()
+        if cost > budget + 1e-9:
+            continue
+        if any(sel[col].sum() < req - 1e-9 for col, req in minimums.items()):
+            continue
+        if any((sel[col] == val).sum() > cap for col, m in count_caps.items() for val, cap in m.items()):
+            continue
+        if any(sel.loc[sel[col] == val, "valorinversion"].sum() > cap + 1e-9
+               for col, m in spend_caps.items() for val, cap in m.items()):
+            continue
+        key = (round(float((sel["vida"] - BASE_LIFE).sum()), 9), float(cost))
+        if best is None or key > best:
+            best = key
+    return best
+
+
+def test_zero_cost_regression():
+    df = pd.DataFrame({"proyecto": ["A", "A", "Z"], "vida": [1.0, 0.9, 0.5],
+                       "valorinversion": [100, 100, 0]})
+    _, delta, cost = mckp_constrained(df, "proyecto", "vida", "valorinversion", 0.0, 100,
+                                      count_caps={"proyecto": {"A": 1}})
+    assert (delta, cost) == (pytest.approx(1.5), 100)
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_matches_brute_force(seed):
+    df = _with_columns(random_portfolio(seed, zero_share=0.3), seed)
+    budget = random_budget(df, seed)
+    rng = np.random.default_rng(seed)
+    minimums = {"delta_seg": float(rng.uniform(0, 0.8))} if seed % 2 else {}
+    count_caps = {"ubicacion": {"Deficiente": int(rng.integers(0, 3))}}
+    spend_caps = {"municipio": {"A": float(rng.integers(0, 20) * 10)}}
+    expected = _brute(df, budget, minimums, count_caps, spend_caps)
+    try:
+        _, delta, cost = mckp_constrained(df, *ARGS, budget, minimums=minimums,
+                                          count_caps=count_caps, spend_caps=spend_caps)
+        got = (round(delta, 9), float(cost))
+    except ValueError:
+        got = None
+    assert got == expected
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_unconstrained_equals_sparse(seed):
+    df = random_portfolio(seed, zero_share=0.3)
+    budget = random_budget(df, seed)
+    a_df, a_delta, a_cost = mckp_constrained(df, *ARGS, budget, id_col="id_proyecto")
+    r_df, r_delta, r_cost = mckp_max_delta(df, *ARGS, budget, id_col="id_proyecto", engine="sparse")
+    assert (a_delta, a_cost) == (r_delta, r_cost)
+    assert a_df.equals(r_df)
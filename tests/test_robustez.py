@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""robust_top_n contra un Monte Carlo escalar con la misma semilla."""
+
+import numpy as np
+import pytest
+
+from mochila import top_n_combinations
+from mochila_robustez import incidence, robust_top_n, robustness, sample_deltas
+from helpers import BASE_LIFE, random_budget, random_portfolio
+
+ARGS = ("proyecto", "vida", "valorinversion", BASE_LIFE)
+
+
+def _brute(top, df, n_samples, seed, percentiles, **noise):
+    """Cartera por cartera y escenario por escenario, sumando en Python."""
+    portfolios = list(top["_indices"])
+    labels = list(dict.fromkeys(p for sel in portfolios for p in sel))
+    delta = (df.loc[labels, "vida"] - BASE_LIFE).to_numpy()
+    samples = sample_deltas(delta, n_samples, seed=seed, dtype=np.float64, **noise)
+    col = {label: i for i, label in enumerate(labels)}
+    scores = np.array([[sum(float(row[col[p]]) for p in sel) for row in samples]
+                       for sel in portfolios])
+    best = np.zeros(len(portfolios))
+    for s in range(n_samples):
+        best[int(np.argmax(scores[:, s]))] += 1   # empate → primera (mejor rango)
+    return {"delta_media": scores.mean(axis=1), "delta_sd": scores.std(axis=1),
+            **{f"delta_p{q:g}": np.percentile(scores, q, axis=1) for q in percentiles},
+            "prob_mejor": best / n_samples}
+
+
+@pytest.mark.parametrize("seed", range(6))
+@pytest.mark.parametrize("dist", ["normal", "lognormal"])
+def test_robust_top_n_matches_brute_force(seed, dist):
+    df = random_portfolio(seed, n_groups=(3, 6), zero_share=0.0)
+    budget = random_budget(df, seed)
+    noise = dict(dist=dist, rel_sd=0.2, abs_sd=0.05 if dist == "normal" else 0.0)
+    got = robust_top_n(df, *ARGS, budget, scale=1, top_n=8, n_samples=300, seed=seed,
+                       percentiles=(5, 50, 95), block=3, dtype=np.float64, **noise)
+    top = top_n_combinations(df, *ARGS, budget, scale=1, top_n=8)
+    assert list(got["_indices"]) == list(top["_indices"])
+    ref = _brute(top, df, 300, seed, (5, 50, 95), **noise)
+    for name, values in ref.items():
+        np.testing.assert_allclose(got[name], values, rtol=1e-9, atol=1e-9, err_msg=name)
+    assert got["prob_mejor"].sum() == pytest.approx(1.0)
+
+
+def test_incidence():
+    inc = incidence([(3, 1), (1,), ()], [1, 3, 7])
+    np.testing.assert_array_equal(inc, [[1, 1, 0], [1, 0, 0], [0, 0, 0]])
+
+
+def test_correlated_noise_and_seed():
+    df = random_portfolio(2, n_groups=(4, 4), zero_share=0.0)
+    top = top_n_combinations(df, *ARGS, 300, scale=1, top_n=5)
+    kw = dict(n_samples=200, rel_sd=0.3, abs_sd=0.1, group_col="proyecto", group_corr=0.4,
+              common_corr=0.3, seed=11)
+    a, b = robustness(top, df, "vida", BASE_LIFE, **kw), robustness(top, df, "vida", BASE_LIFE, **kw)
+    np.testing.assert_array_equal(a["prob_mejor"], b["prob_mejor"])
+    assert a.attrs["robustez"]["group_corr"] == 0.4
+    with pytest.raises(ValueError):
+        robustness(top, df, "vida", BASE_LIFE, group_corr=0.4)
+    with pytest.raises(ValueError):
+        robustness(top, df, "vida", BASE_LIFE, group_col="proyecto", group_corr=0.8,
+                   common_corr=0.4)
+
+
+def test_without_noise_the_nominal_best_always_wins():
+    df = random_portfolio(4, n_groups=(4, 4))
+    top = top_n_combinations(df, *ARGS, 300, scale=1, top_n=5)
+    out = robustness(top, df, "vida", BASE_LIFE, n_samples=50, rel_sd=0.0, seed=0)
+    assert out["prob_mejor"].tolist() == [1.0] + [0.0] * (len(top) - 1)
+    np.testing.assert_allclose(out["delta_media"], top["delta_total"], atol=1e-5)
+    np.testing.assert_allclose(out["delta_sd"], 0, atol=1e-6)
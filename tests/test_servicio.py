@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""SolverService: validación, plazo, pool roto y respuestas HTTP."""
+
+import asyncio
+import json
+import os
+import signal
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+
+import pytest
+
+import mochila_lotes as lotes
+import mochila_servicio as servicio
+from mochila import mckp_max_delta
+from mochila_servicio import MAX_BUDGET_CELLS, RequestError, SolverService, normalize_params
+from helpers import random_portfolio
+
+BODY = {"presupuesto": 200, "base_life": 72.0, "top_n": 3, "scale": 1}
+
+
+@pytest.fixture
+def projects():
+    df = random_portfolio(7, n_groups=(6, 6))
+    lotes._init_worker(lotes.prepare_arrays(df))  # estado del "trabajador" en este proceso
+    return df
+
+
+def test_budget_cells_are_capped():
+    normalize_params({"presupuesto": MAX_BUDGET_CELLS / 20, "scale": 20})
+    with pytest.raises(RequestError) as err:
+        normalize_params({"presupuesto": MAX_BUDGET_CELLS / 20 + 1, "scale": 20})
+    assert err.value.status == HTTPStatus.BAD_REQUEST
+
+
+def test_optimize_matches_solver(projects):
+    svc = SolverService(projects, executor=ThreadPoolExecutor(2))
+    res = asyncio.run(svc.optimize(BODY))
+    _, delta, cost = mckp_max_delta(projects, "proyecto", "vida", "valorinversion", 72.0, 200, scale=1)
+    assert res["optimo"]["delta_total"] == pytest.approx(delta)
+    assert res["optimo"]["costo_total"] == cost
+    svc.close()
+
+
+def test_solve_timeout(projects, monkeypatch):
+    def slow(params):
+        time.sleep(0.5)
+        return {}
+
+    monkeypatch.setattr(servicio, "solve", slow)
+    svc = SolverService(projects, executor=ThreadPoolExecutor(1), solve_timeout=0.05)
+    with pytest.raises(RequestError) as err:
+        asyncio.run(svc.optimize(BODY))
+    assert err.value.status == HTTPStatus.GATEWAY_TIMEOUT
+    svc.close()
+
+
+def _kill_workers(svc):
+    for pid in list(svc.executor._processes):
+        os.kill(pid, signal.SIGKILL)
+
+
+def test_broken_pool_is_replaced(projects):
+    svc = SolverService(projects, workers=1)
+
+    async def run():
+        first = await svc.optimize(BODY)
+        _kill_workers(svc)  # pool roto sin cálculos en curso: se recrea al enviar
+        await asyncio.sleep(0.5)
+        again = await svc.optimize({**BODY, "top_n": 4})
+        assert again["optimo"] == first["optimo"]
+
+    try:
+        asyncio.run(run())
+        assert svc.restarts == 1
+    finally:
+        svc.close()
+
+
+def test_worker_death_during_solve_returns_503():
+    big = random_portfolio(1, n_groups=(1500, 1500))
+    svc = SolverService(big, workers=1)
+    body = {"presupuesto": 20_000, "scale": 100, "top_n": 5}
+
+    async def run():
+        task = asyncio.ensure_future(svc.optimize(body))
+        await asyncio.sleep(1.0)
+        assert not task.done()
+        _kill_workers(svc)
+        with pytest.raises(RequestError) as err:
+            await task
+        assert err.value.status == HTTPStatus.SERVICE_UNAVAILABLE
+        res = await svc.optimize({**BODY, "ids": [1, 2, 3]})
+        assert res["proyectos"] == 3
+
+    try:
+        asyncio.run(run())
+        assert svc.restarts == 1
+    finally:
+        svc.close()
+
+
+def test_http_rejects_oversized_budget(projects):
+    svc = SolverService(projects, executor=ThreadPoolExecutor(1))
+
+    async def run():
+        server = await asyncio.start_server(svc.handle, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        body = json.dumps({"presupuesto": MAX_BUDGET_CELLS, "scale": 2}).encode()
+        writer.write(b"POST /optimizar HTTP/1.1\r\nContent-Length: %d\r\n\r\n%s" % (len(body), body))
+        await writer.drain()
+        raw = await reader.read()
+        writer.close()
+        server.close()
+        await server.wait_closed()
+        return raw
+
+    raw = asyncio.run(run())
+    assert raw.startswith(b"HTTP/1.1 400")
+    assert "presupuesto" in json.loads(raw.split(b"\r\n\r\n", 1)[1])["error"]
+    svc.close()
+
+
+def test_kbest_guard_is_a_client_error(projects, monkeypatch):
+    monkeypatch.setattr("mochila.KBEST_MAX_PARTIALS", 10)
+    svc = SolverService(projects, executor=ThreadPoolExecutor(1))
+    with pytest.raises(RequestError) as err:
+        asyncio.run(svc.optimize(BODY))
+    assert err.value.status == HTTPStatus.BAD_REQUEST
+    assert "KBEST_MAX_PARTIALS" in str(err.value)
+    svc.close()
@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+"""simulate contra la suma directa de ``script_tool`` (un ráster por proyecto)."""
+
+import json
+import os
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from simulador_cache import SURFACE_LAMBERT, DistanceCache
+from simulador_fixture import fixture_projects, fixture_rasters, shifted_area
+from simulador_raster import (DIMENSIONES, Grid, Project, RasterInputs, adjusted_distance,
+                              fixture_inputs, indicadores, masked_mean, simulate)
+from helpers import arcgis_fixture
+
+# Salida del motor sobre el fixture (python simulador_fixture.py --referencia)
+REFERENCIA = os.path.join(os.path.dirname(__file__), "fixtures", "simulador")
+
+
+@pytest.fixture(scope="module")
+def inputs():
+    return fixture_inputs(60, 70)
+
+
+def _projects(inputs, n, seed):
+    rng = np.random.default_rng(seed)
+    x0, y0, x1, y1 = inputs.grid.extent
+    return [Project(i, float(rng.uniform(x0, x1)), float(rng.uniform(y0, y1)),
+                    *[float(v) for v in rng.choice([0, 0, 5, 10], 3)],
+                    float(rng.uniform(0, 3000)))
+            for i in range(n)]
+
+
+def _naive(inputs, projects):
+    """Lista de incrementos por proyecto + CellStatistics(SUM, DATA) + Con + media."""
+    medias = {}
+    for dim in DIMENSIONES:
+        base = inputs.bases[dim]
+        deltas = []
+        for p in projects:
+            valor = p.valores()[dim]
+            dist = adjusted_distance(inputs, p.lon, p.lat)
+            if valor > 0 and dist is not None:
+                deltas.append(np.exp(-dist / max(p.radio, 1)) * valor * (1 - base / 100))
+        if not deltas:
+            medias[dim] = 0
+            continue
+        stack = np.array(deltas)
+        total = np.where(np.isfinite(stack).any(axis=0), np.nansum(stack, axis=0), np.nan)
+        medias[dim] = masked_mean(np.minimum(base + total, 100), inputs.mask)
+    return medias
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_simulate_matches_naive(inputs, seed, tmp_path):
+    projects = _projects(inputs, 8, seed)
+    ref = _naive(inputs, projects)
+    for kwargs in ({}, {"cache": DistanceCache(str(tmp_path), dtype=np.float64)}):
+        res = simulate(inputs, projects, **kwargs)
+        for dim in DIMENSIONES:
+            assert res.medias[dim] == pytest.approx(ref[dim], rel=1e-12, abs=1e-12), dim
+        assert (res.indice, res.vida) == pytest.approx(indicadores(ref))
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_windowed_mean_is_within_bound(inputs, seed):
+    projects = _projects(inputs, 8, seed)
+    exact = simulate(inputs, projects)
+    approx = simulate(inputs, projects, tol=1e-3)
+    for key in (*DIMENSIONES, "INDICE"):
+        lo = approx.medias[key] if key in DIMENSIONES else approx.indice
+        hi = exact.medias[key] if key in DIMENSIONES else exact.indice
+        assert lo - 1e-9 <= hi <= lo + approx.error[key] + 1e-9, key
+
+
+def test_memory_does_not_grow_with_projects(inputs):
+    peaks = []
+    for n in (10, 100):
+        projects = _projects(inputs, n, 0)
+        tracemalloc.start()
+        simulate(inputs, projects)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    assert peaks[1] < 1.1 * peaks[0]
+
+
+def test_cache_key_separates_surface_methods(inputs, tmp_path):
+    cache = DistanceCache(str(tmp_path))
+    p = _projects(inputs, 1, 0)[0]
+    args = (inputs.grid, p.lon, p.lat, inputs.penalty_version)
+    arcgis = ("DistanceAccumulation", "GEODESIC", "BINARY 1 -30 30", "BINARY 1 45")
+    assert cache.key(*args) == cache.key(*args, SURFACE_LAMBERT)
+    assert cache.key(*args) != cache.key(*args, arcgis)
+    assert cache.key(*args, arcgis) != cache.key(*args, arcgis[:3] + ("BINARY 1 90",))
+
+
+def test_get_or_compute_many_computes_only_misses(inputs, tmp_path):
+    cache = DistanceCache(str(tmp_path), dtype=np.float64)
+    projects = _projects(inputs, 4, 1)
+    keys = [cache.key(inputs.grid, p.lon, p.lat, inputs.penalty_version) for p in projects]
+    batches = []
+
+    def compute(pending):
+        batches.append(list(pending))
+        for i in pending:
+            yield i, adjusted_distance(inputs, projects[i].lon, projects[i].lat)
+
+    cache.put(keys[2], adjusted_distance(inputs, projects[2].lon, projects[2].lat))
+    got = dict(cache.get_or_compute_many(keys, compute))
+    assert batches == [[0, 1, 3]]
+    assert (cache.hits, cache.misses) == (1, 3)
+    for i, p in enumerate(projects):
+        np.testing.assert_array_equal(got[i], adjusted_distance(inputs, p.lon, p.lat))
+    assert dict(cache.get_or_compute_many(keys, compute)).keys() == got.keys()
+    assert len(batches) == 1 and cache.hits == 5
+
+
+def _load(directorio):
+    """Entradas, proyectos, medias y finales escritos por `simulador_fixture`."""
+    inputs = RasterInputs.from_directory(directorio)
+    with open(os.path.join(directorio, "proyectos.json"), encoding="utf-8") as fh:
+        projects = [Project(**p) for p in json.load(fh)]
+    with open(os.path.join(directorio, "medias.json"), encoding="utf-8") as fh:
+        medias = json.load(fh)
+    finales = {dim: np.load(os.path.join(directorio, f"final_{dim.lower()}.npy"))
+               for dim in DIMENSIONES}
+    return inputs, projects, medias, finales
+
+
+def test_reference_inputs_are_the_fixture():
+    inputs, projects, _, _ = _load(REFERENCIA)
+    fixture = fixture_rasters()
+    assert inputs.grid == fixture.grid
+    for dim in DIMENSIONES:
+        np.testing.assert_array_equal(inputs.bases[dim], fixture.bases[dim])
+    np.testing.assert_array_equal(inputs.penalty, fixture.penalty)
+    np.testing.assert_array_equal(inputs.mask, fixture.mask)
+    assert projects == fixture_projects(fixture)
+
+
+def test_simulate_matches_committed_reference():
+    inputs, projects, ref, finales = _load(REFERENCIA)
+    res = simulate(inputs, projects, keep_rasters=True)
+    assert res.medias == pytest.approx(ref["medias"], rel=1e-9)
+    assert (res.indice, res.vida) == pytest.approx((ref["indice"], ref["vida"]), rel=1e-9)
+    for dim in DIMENSIONES:
+        np.testing.assert_allclose(res.finales[dim], finales[dim], rtol=1e-9, atol=1e-9)
+    # Con ventanas: la media de referencia cae en [media, media + cota]
+    windowed = simulate(inputs, projects, tol=1e-6)
+    for dim in DIMENSIONES:
+        assert windowed.medias[dim] - 1e-9 <= ref["medias"][dim] <= \
+            windowed.medias[dim] + windowed.error[dim] + 1e-9
+
+
+def test_simulate_matches_arcgis_means():
+    """Contra el cálculo original en ArcGIS (DistanceAccumulation + Con +
+    GetRasterProperties); la distancia difiere < 0.1 m, así que finales y
+    medias coinciden a ~1e-3."""
+    inputs, projects, ref, finales = _load(arcgis_fixture("medias.json"))
+    res = simulate(inputs, projects, keep_rasters=True)
+    assert res.medias == pytest.approx(ref["medias"], abs=1e-3)
+    assert (res.indice, res.vida) == pytest.approx((ref["indice"], ref["vida"]), abs=1e-3)
+    for dim in DIMENSIONES:
+        np.testing.assert_array_equal(np.isnan(res.finales[dim]), np.isnan(finales[dim]))
+        np.testing.assert_allclose(res.finales[dim], finales[dim], atol=1e-2)
+
+
+def _offset(value, cell_size):
+    """Celdas enteras de ``value`` (falla si no cae en la retícula)."""
+    cells = value / cell_size
+    assert cells == pytest.approx(round(cells), abs=1e-6)
+    return int(round(cells))
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_snapped_grid_lies_on_the_base_lattice(seed):
+    rng = np.random.default_rng(seed)
+    cs = 0.002
+    ox, oy = rng.uniform(-75, -73), rng.uniform(10, 12)
+    x0, y0 = ox + rng.uniform(-0.3, 0.3), oy - rng.uniform(0.1, 0.5)
+    x1, y1 = x0 + rng.uniform(0.01, 0.2), y0 + rng.uniform(0.01, 0.2)
+    grid = Grid.from_extent(x0, y0, x1, y1, cs, origin=(ox, oy))
+    _offset(grid.x_min - ox, cs)
+    _offset(grid.y_max - oy, cs)
+    gx0, gy0, gx1, gy1 = grid.extent
+    assert gx0 <= x0 < gx0 + cs and gy1 - cs < y1 <= gy1      # la menor que cubre
+    assert gx1 - cs < x1 + 1e-9 <= gx1 + 1e-9 and gy0 - 1e-9 <= y0 < gy0 + cs
+    # Sin origen: la esquina queda donde empieza la extensión
+    assert Grid.from_extent(x0, y0, x1, y1, cs)[:2] == (x0, y1)
+    # Sobre la retícula ya no se mueve
+    assert Grid.from_extent(*grid.extent, cs, origin=(ox, oy)) == grid
+
+
+def test_gp_finals_align_with_the_original_con_output():
+    """Finales de la GP (malla alineada a las bases) contra
+    ``Con(base + inc_sum, ...)`` del cálculo original con un `area_interes`
+    fuera de la retícula (fixture de `simulador_fixture.py`)."""
+    carpeta = os.path.join(arcgis_fixture(os.path.join("desplazada", "area.json")), "desplazada")
+    inputs = fixture_rasters()
+    base = inputs.grid
+    cs = base.cell_size
+    with open(os.path.join(carpeta, "area.json"), encoding="utf-8") as fh:
+        area = json.load(fh)
+    assert area == pytest.approx(list(shifted_area(base)))
+    # Lo que arma RasterInputs.from_arcpy con snap_raster = base
+    gp = Grid.from_extent(*area, cs, origin=(base.x_min, base.y_max))
+    r_gp, c_gp = _offset(base.y_max - gp.y_max, cs), _offset(gp.x_min - base.x_min, cs)
+    finales = simulate(inputs, fixture_projects(inputs), keep_rasters=True).finales
+
+    for dim in DIMENSIONES:
+        with open(os.path.join(carpeta, f"final_{dim.lower()}.json"), encoding="utf-8") as fh:
+            malla = Grid(**json.load(fh))
+        ref = np.load(os.path.join(carpeta, f"final_{dim.lower()}.npy"))
+        assert ref.shape == malla.shape and malla.cell_size == pytest.approx(cs)
+        r0, c0 = _offset(base.y_max - malla.y_max, cs), _offset(malla.x_min - base.x_min, cs)
+        # Las celdas de la salida original están dentro de la malla de la GP
+        assert r_gp <= r0 and r0 + malla.n_rows <= r_gp + gp.n_rows
+        assert c_gp <= c0 and c0 + malla.n_cols <= c_gp + gp.n_cols
+
+        # Y coinciden celda a celda: ningún corrimiento de una celda ajusta mejor
+        inner = ref[1:-1, 1:-1]
+        errors = {}
+        for dr in (-1, 0, 1):
+            for dc in (-1, 0, 1):
+                ours = finales[dim][r0 + 1 + dr:r0 + malla.n_rows - 1 + dr,
+                                    c0 + 1 + dc:c0 + malla.n_cols - 1 + dc]
+                both = np.isfinite(inner) & np.isfinite(ours)
+                errors[dr, dc] = float(np.abs(inner[both] - ours[both]).mean())
+        assert min(errors, key=errors.get) == (0, 0), errors
+        np.testing.assert_array_equal(np.isnan(inner), np.isnan(inputs.bases[dim][
+            r0 + 1:r0 + malla.n_rows - 1, c0 + 1:c0 + malla.n_cols - 1]))
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""top_n_combinations: todos los métodos contra la enumeración exhaustiva."""
+
+import pandas as pd
+import pytest
+
+import mochila
+from mochila import SolverStats, _group_hull_points, top_n_combinations
+from helpers import BASE_LIFE, combos, random_budget, random_portfolio
+
+ARGS = ("proyecto", "vida", "valorinversion", BASE_LIFE)
+
+
+def _top(df, budget, method, top_n, **kwargs):
+    return top_n_combinations(df, *ARGS, budget, scale=1, top_n=top_n, method=method, **kwargs)
+
+
+def test_hull_keeps_origin_with_zero_cost_variant():
+    import numpy as np
+    pts = _group_hull_points(np.array([0.0, 50.0]), np.array([0.5, 1.0]))
+    assert pts[0] == (0.0, 0.0, -1)
+    assert pts[1] == (0.0, 0.5, 0)
+
+
+def test_bnb_zero_cost_regression():
+    df = pd.DataFrame({"proyecto": ["A", "A", "Z"], "vida": [1.0, 0.9, 0.5],
+                       "valorinversion": [100, 100, 0]})
+    for method in ("bnb", "anytime", "kbest"):
+        res = top_n_combinations(df, "proyecto", "vida", "valorinversion", 0.0, 100,
+                                 scale=1, top_n=2, method=method)
+        assert res["_indices"].tolist() == [(0, 2), (1, 2)], method
+
+
+@pytest.mark.parametrize("seed", range(60))
+@pytest.mark.parametrize("method", ["bnb", "anytime"])
+def test_branch_and_bound_matches_backtrack(seed, method):
+    df = random_portfolio(seed)
+    budget = random_budget(df, seed)
+    for top_n in (1, 3, 8):
+        ref = _top(df, budget, "backtrack", top_n)
+        got = _top(df, budget, method, top_n)
+        assert combos(got) == combos(ref), (seed, top_n)
+        if method == "anytime":
+            assert got.attrs["exact"] is True
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_anytime_deadline_bound_is_certified(seed):
+    df = random_portfolio(seed, n_groups=(5, 8), zero_share=0.3)
+    budget = random_budget(df, seed)
+    top_n = 5
+    ref = _top(df, budget, "backtrack", top_n)
+    for deadline in (0.0, 10.0):
+        got = _top(df, budget, "anytime", top_n, deadline=deadline)
+        if got.attrs["exact"]:
+            assert got.attrs["upper_bound"] is None
+            assert combos(got) == combos(ref), (seed, deadline)
+            continue
+        # Corte: lo que falta del top‑N exacto no supera la cota
+        missing = set(ref["_indices"]) - set(got["_indices"])
+        worst = ref.set_index("_indices")["delta_total"]
+        assert all(worst[m] <= got.attrs["upper_bound"] + 1e-9 for m in missing), seed
+        assert got.attrs["gap"] >= 0
+
+
+def test_kbest_zero_cost_regression():
+    # semilla 34, top_n=1: el parcial vacío ocupaba la única plaza del
+    # coste 0 y se perdía la selección (1,) de Δ 0 y coste 0
+    df = random_portfolio(34)
+    budget = random_budget(df, 34)
+    assert combos(_top(df, budget, "kbest", 1)) == combos(_top(df, budget, "backtrack", 1))
+
+
+@pytest.mark.parametrize("seed", range(80))
+def test_kbest_matches_backtrack(seed):
+    df = random_portfolio(seed, zero_share=0.35)
+    budget = random_budget(df, seed)
+    for top_n in (1, 2, 5):
+        assert combos(_top(df, budget, "kbest", top_n)) == \
+            combos(_top(df, budget, "backtrack", top_n)), (seed, top_n)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_kbest_partials_bound(seed):
+    df = random_portfolio(seed, n_groups=(3, 8), zero_share=0.35)
+    budget = random_budget(df, seed)
+    st = SolverStats()
+    top_n_combinations(df, *ARGS, budget, scale=1, top_n=5, stats=st)   # "kbest" por defecto
+    groups = mochila._group_positions(df, "proyecto")
+    cost_int = df["valorinversion"].round().astype(int).to_numpy()
+    bound = mochila._kbest_partials(groups, cost_int, int(budget), 5)
+    assert st.counters["partials_generated"] <= bound
+
+
+def test_kbest_guard(monkeypatch):
+    df = random_portfolio(1, n_groups=(8, 8))
+    monkeypatch.setattr(mochila, "KBEST_MAX_PARTIALS", 10)
+    with pytest.raises(ValueError, match="KBEST_MAX_PARTIALS"):
+        top_n_combinations(df, *ARGS, 300, scale=1, top_n=5)
+    # Los demás métodos no tienen tope
+    assert combos(_top(df, 300, "bnb", 5)) == combos(_top(df, 300, "backtrack", 5))
+
+
+@pytest.mark.parametrize("seed", range(60))
+@pytest.mark.parametrize("method", ["kbest", "bnb", "anytime"])
+def test_reduce_matches_backtrack(seed, method):
+    # Filas barajadas: los grupos quedan intercalados y reduce_variants
+    # renumera las variantes en otro orden que las etiquetas originales
+    df = random_portfolio(seed, zero_share=0.3).sample(frac=1, random_state=seed)
+    df = df.reset_index(drop=True)
+    budget = random_budget(df, seed)
+    for top_n in (1, 2, 4):
+        ref = _top(df, budget, "backtrack", top_n)
+        assert combos(_top(df, budget, method, top_n, reduce=True)) == combos(ref), (seed, top_n)